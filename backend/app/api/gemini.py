@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime
 from typing import List
 import json
@@ -7,31 +7,25 @@ import asyncio
 from app.models.schemas import PSWriteRequest
 from app.services.gemini import GeminiService
 from app.services.prompts import format_enhanced_research_prompt
+from app.services.routing import OPERATION_RESEARCH
 from app.core.config import get_settings
+from app.core.dependencies import get_gemini_service
 
 settings = get_settings()
 
 router = APIRouter(prefix="/api/gemini", tags=["gemini"])
 
 @router.post("/ps-write/generate")
-async def generate_content(request: PSWriteRequest):
+async def generate_content(
+    request: PSWriteRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
     """
     生成内容（非流式版本）
 
     与前端保持兼容的API端点
     """
     try:
-        # 从环境变量获取API密钥
-        api_key = settings.GEMINI_API_KEY
-        if not api_key or len(api_key) < 10:
-            raise HTTPException(
-                status_code=500,
-                detail="服务器未配置Gemini API密钥，请联系管理员设置GEMINI_API_KEY环境变量"
-            )
-
-        # 初始化Gemini服务
-        gemini = GeminiService(api_key=api_key)
-
         # 构建提示词
         prompt = format_enhanced_research_prompt(
             school=request.school,
@@ -40,11 +34,23 @@ async def generate_content(request: PSWriteRequest):
             extracurricular=request.extracurricular
         )
 
+        # 生成参数：按路由表选择模型，请求中的参数需要通过服务端校验
+        try:
+            params = gemini.resolve_params(
+                OPERATION_RESEARCH,
+                model_name=request.model_name,
+                temperature=request.temperature,
+                max_output_tokens=request.max_output_tokens
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # 生成内容
-        result = await gemini.generate_enhanced_research(prompt)
+        result = await gemini.generate_enhanced_research(prompt, params)
 
         return {
-            "result": result,
+            "result": result.text,
+            "model_name": result.model_name,
             "timestamp": datetime.now().isoformat(),
             "status": "success"
         }
@@ -58,6 +64,22 @@ async def generate_content(request: PSWriteRequest):
         )
 
 
+@router.get("/stats")
+async def get_gemini_stats(gemini: GeminiService = Depends(get_gemini_service)):
+    """
+    获取Gemini调用统计信息
+
+    - 当前并发上限、进行中和排队的请求数
+    - 排队等待时间
+    - 限流（配额/429）错误次数
+    - 模型路由配置
+    - 各模型的熔断状态和模型级联（备用模型切换）统计
+    """
+    return {
+        "gemini_stats": gemini.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.get("/test")
 async def test_gemini_endpoint():
     """测试Gemini API端点"""
@@ -65,6 +87,7 @@ async def test_gemini_endpoint():
         "message": "Gemini API端点运行正常",
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
-            "generate": "POST /api/gemini/ps-write/generate"
+            "generate": "POST /api/gemini/ps-write/generate",
+            "stats": "GET /api/gemini/stats"
         }
     }
\ No newline at end of file
@@ -1,14 +1,24 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse, Response
 from datetime import datetime
-from typing import List
+from functools import partial
+from contextlib import aclosing
+from typing import Any, Callable, List, Optional, AsyncIterator, Tuple, Union
+import asyncio
+import json
 
 from app.models.schemas import (
-    PSWriteRequest, PSGenerationRequest, PersonalStatement,
+    PSWriteRequest, PSGenerationRequest, SessionPSGenerationRequest, PersonalStatement,
     ResearchOptionsResponse, ErrorResponse, ResearchOption
 )
+from app.services.cascade import GenerationResult
 from app.services.gemini import GeminiService
+from app.services.routing import OPERATION_PERSONAL_STATEMENT, OPERATION_RESEARCH, GenerationParams
 from app.services.selection import SelectionService
-from app.services.cache import ResearchCache
+from app.services.cache import ResearchCache, PersonalStatementCache
+from app.services.store import SQLiteKeyValueStore
+from app.services.prefetch import PersonalStatementPrefetcher
+from app.services.executor import CPUExecutor
 from app.services.prompts import (
     format_enhanced_research_prompt,
     format_personal_statement_prompt,
@@ -17,23 +27,146 @@ from app.services.prompts import (
 )
 from app.services.parser import (
     parse_research_options,
-    parse_research_options_with_domain_texts,
+    parse_and_enhance_research_options,
     parse_personal_statement,
+    IncrementalResearchParser,
+    IncrementalPersonalStatementParser,
     enhance_research_option_with_scoring,
-    validate_and_score_references
+    validate_and_score_references,
+    configure_scoring_lexicons,
+    get_reference_score_cache_info
 )
 from app.core.config import get_settings
+from app.core.dependencies import get_gemini_service
 
 settings = get_settings()
 
 router = APIRouter(prefix="/api/ps-write", tags=["ps-write"])
 
 # 初始化服务
-selection_service = SelectionService()
-research_cache = ResearchCache(ttl_hours=24, max_entries=1000)
+selection_service = SelectionService(
+    ttl_minutes=settings.session_ttl_minutes,
+    max_sessions=settings.session_max_entries,
+    max_bytes=settings.session_max_bytes,
+    store=SQLiteKeyValueStore(settings.cache_db_path, table="selection_sessions") if settings.cache_db_path else None
+)
+research_cache = ResearchCache(
+    ttl_hours=settings.research_cache_ttl_hours,
+    max_entries=settings.research_cache_max_entries,
+    max_bytes=settings.research_cache_max_bytes,
+    similarity_threshold=settings.research_cache_similarity_threshold,
+    store=SQLiteKeyValueStore(settings.cache_db_path, table="research_cache") if settings.cache_db_path else None
+)
+ps_cache = PersonalStatementCache(
+    ttl_hours=settings.ps_cache_ttl_hours,
+    max_entries=settings.ps_cache_max_entries,
+    max_bytes=settings.ps_cache_max_bytes
+)
+ps_prefetcher = PersonalStatementPrefetcher(
+    ps_cache,
+    mode=settings.ps_prefetch_mode,
+    max_concurrency=settings.ps_prefetch_concurrency,
+    session_ttl_seconds=settings.session_ttl_minutes * 60
+)
+
+# 评分关键词表（一次性预编译；进程池子进程启动时同样应用）
+apply_scoring_lexicons = partial(
+    configure_scoring_lexicons,
+    authoritative_sources=settings.scoring_authoritative_sources,
+    journal_keywords=settings.scoring_journal_keywords,
+    content_keywords=settings.scoring_content_keywords,
+    required_sections=settings.scoring_required_sections
+)
+apply_scoring_lexicons()
+
+# 解析、评分和统计等CPU密集任务的执行器（不阻塞事件循环）
+cpu_executor = CPUExecutor(
+    max_threads=settings.cpu_executor_threads,
+    max_processes=settings.cpu_executor_processes,
+    process_threshold_chars=settings.cpu_process_threshold_chars,
+    initializer=apply_scoring_lexicons
+)
+
+# 包含用户背景信息（school/major/courses/extracurricular）的请求
+UserProfile = Union[PSWriteRequest, PSGenerationRequest]
+# 可以指定生成参数（model_name/temperature/max_output_tokens）的请求
+GenerationRequest = Union[PSWriteRequest, PSGenerationRequest, SessionPSGenerationRequest]
+
+def _generation_params(gemini: GeminiService, operation: str, request: Optional[GenerationRequest] = None) -> GenerationParams:
+    """
+    按路由表和请求中的生成参数确定本次调用的生成参数
+
+    Raises:
+        HTTPException: 模型不在允许列表中或参数超出范围时返回400
+    """
+    try:
+        if request is None:
+            return gemini.resolve_params(operation)
+        return gemini.resolve_params(
+            operation,
+            model_name=request.model_name,
+            temperature=request.temperature,
+            max_output_tokens=request.max_output_tokens
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _generate_enhanced_options(
+    request: PSWriteRequest,
+    gemini: GeminiService,
+    params: GenerationParams
+) -> Tuple[List[ResearchOption], str]:
+    """
+    调用Gemini生成调研结果，解析并使用评分算法增强
+
+    Returns:
+        Tuple[调研选项列表, 实际生成结果的模型]
+
+    Raises:
+        HTTPException: 解析失败或选项数量不正确时抛出
+    """
+    # 构建提示词
+    prompt = format_enhanced_research_prompt(
+        school=request.school,
+        major=request.major,
+        courses=request.courses,
+        extracurricular=request.extracurricular
+    )
+
+    # 生成调研结果（主模型超时或过载时由备用模型生成）
+    result = await gemini.generate_enhanced_research(prompt, params)
+    research_text = result.text
+
+    # 解析调研结果并使用评分算法和参考文献验证增强（在执行器中运行）
+    try:
+        research_options = await cpu_executor.run(
+            parse_and_enhance_research_options,
+            research_text,
+            request.courses,
+            request.extracurricular,
+            size=len(research_text)
+        )
+    except ValueError as e:
+        # 如果解析失败，记录原始文本并返回错误
+        raise HTTPException(
+            status_code=500,
+            detail=f"解析调研结果失败: {str(e)}。原始文本: {research_text[:500]}..."
+        )
+
+    # 验证解析结果
+    if len(research_options) != 3:
+        raise HTTPException(
+            status_code=500,
+            detail=f"期望3个调研选项，但解析出{len(research_options)}个"
+        )
+
+    return research_options, result.model_name
 
 @router.post("/generate-with-selection", response_model=ResearchOptionsResponse)
-async def generate_research_options(request: PSWriteRequest):
+async def generate_research_options(
+    request: PSWriteRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
     """
     生成调研选项供用户选择
 
@@ -42,103 +175,37 @@ async def generate_research_options(request: PSWriteRequest):
     - 创建会话并返回会话ID和调研选项
     """
     try:
-        # 从环境变量获取API密钥
-        api_key = settings.GEMINI_API_KEY
-        if not api_key or len(api_key) < 10:
-            raise HTTPException(
-                status_code=500,
-                detail="服务器未配置Gemini API密钥，请联系管理员设置GEMINI_API_KEY环境变量"
-            )
+        params = _generation_params(gemini, OPERATION_RESEARCH, request)
 
-        # 检查缓存
-        cached_research = research_cache.get_cached_research(
+        # 检查缓存（缓存键包含请求的生成参数，条目记录实际生成的模型）；相同输入的并发请求共享同一次Gemini调用
+        cache_entry, cache_status, similarity = await research_cache.get_or_generate_research(
             school=request.school,
             major=request.major,
             courses=request.courses,
-            extracurricular=request.extracurricular
+            extracurricular=request.extracurricular,
+            generate=lambda: _generate_enhanced_options(request, gemini, params),
+            generation_params=params.cache_params()
         )
 
-        if cached_research:
-            # 使用缓存结果
-            research_options = cached_research
-            cache_hit = True
-        else:
-            # 缓存未命中，调用Gemini API
-            cache_hit = False
-
-            # 初始化Gemini服务
-            gemini = GeminiService(api_key=api_key)
-
-            # 测试连接（可选）
-            # if not await gemini.test_connection():
-            #     raise HTTPException(status_code=401, detail="Gemini API密钥无效或连接失败")
-
-            # 构建提示词
-            prompt = format_enhanced_research_prompt(
-                school=request.school,
-                major=request.major,
-                courses=request.courses,
-                extracurricular=request.extracurricular
-            )
-
-            # 生成调研结果
-            research_text = await gemini.generate_enhanced_research(prompt)
-
-            # 解析调研结果（获取选项和原始文本）
-            try:
-                research_options, domain_texts = parse_research_options_with_domain_texts(research_text)
-            except ValueError as e:
-                # 如果解析失败，记录原始文本并返回错误
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"解析调研结果失败: {str(e)}。原始文本: {research_text[:500]}..."
-                )
-
-            # 验证解析结果
-            if len(research_options) != 3:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"期望3个调研选项，但解析出{len(research_options)}个"
-                )
-
-            # 增强调研选项（使用评分算法和参考文献验证）
-            enhanced_options = []
-            for i, option in enumerate(research_options):
-                domain_text = domain_texts[i] if i < len(domain_texts) else ""
-                enhanced_option = enhance_research_option_with_scoring(
-                    option=option,
-                    original_text=domain_text,
-                    user_courses=request.courses,
-                    user_extracurricular=request.extracurricular
-                )
-                enhanced_options.append(enhanced_option)
-
-            # 更新为增强后的选项
-            research_options = enhanced_options
-
-            # 缓存增强后的结果
-            research_cache.cache_research(
-                school=request.school,
-                major=request.major,
-                courses=request.courses,
-                extracurricular=request.extracurricular,
-                research_options=research_options
-            )
+        # 注意：缓存条目中保存的是增强后的选项
 
-        # 注意：缓存命中的情况下，research_options已经是增强后的选项
+        # 创建会话（直接引用缓存中的选项数据，不经过pydantic转换）
+        session_id = await selection_service.create_session_from_data(
+            cache_entry['research_options'], _session_profile(request), cache_entry['options_bytes']
+        )
 
-        # 创建会话
-        session_id = selection_service.create_session(research_options)
+        # 按需在后台预取个人陈述
+        _start_ps_prefetch(session_id, request, cache_entry['research_options'], gemini)
 
         # 添加缓存命中信息到消息
         message = "请从以上3个选项中选择一个作为文书写作方向"
-        if cache_hit:
+        if cache_status == "hit":
             message += " (结果来自缓存)"
+        elif cache_status == "approximate":
+            message += " (结果来自相似背景的缓存)"
 
-        return ResearchOptionsResponse(
-            session_id=session_id,
-            research_options=research_options,
-            message=message
+        return _research_options_response(
+            session_id, cache_entry['options_json'], message, similarity, cache_entry.get('model_name')
         )
 
     except HTTPException:
@@ -149,66 +216,373 @@ async def generate_research_options(request: PSWriteRequest):
             detail=f"生成调研选项时出错: {str(e)}"
         )
 
-@router.post("/generate-ps", response_model=PersonalStatement)
-async def generate_personal_statement(request: PSGenerationRequest):
+def _session_profile(request: PSWriteRequest) -> dict:
+    """保存到会话中的用户背景信息"""
+    return {
+        'school': request.school,
+        'major': request.major,
+        'courses': request.courses,
+        'extracurricular': request.extracurricular
+    }
+
+def _research_options_response(
+    session_id: str,
+    options_json: str,
+    message: str,
+    similarity: Optional[float] = None,
+    model_name: Optional[str] = None
+) -> Response:
     """
-    基于用户选择生成个人陈述
+    将预先序列化的调研选项拼接为ResearchOptionsResponse响应体
 
-    - 验证用户选择的有效性
-    - 调用Gemini生成5段式个人陈述
-    - 返回格式化后的个人陈述
+    跳过response_model的校验和序列化，输出与ResearchOptionsResponse一致。
+    similarity不为None表示近似命中；model_name为实际生成调研结果的模型。
+    """
+    body = (
+        '{"session_id":' + json.dumps(session_id)
+        + ',"research_options":' + options_json
+        + ',"message":' + json.dumps(message, ensure_ascii=False)
+        + ',"approximate":' + ('true' if similarity is not None else 'false')
+        + ',"similarity":' + json.dumps(similarity)
+        + ',"model_name":' + json.dumps(model_name) + '}'
+    )
+    return Response(content=body.encode('utf-8'), media_type="application/json")
+
+def _sse_event(event: str, data: dict) -> str:
+    """格式化一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _forward_until_done(lookup: asyncio.Future, items: asyncio.Queue) -> AsyncIterator[Any]:
+    """
+    在lookup完成前逐个产出生成任务推送到items中的元素，lookup完成后产出剩余元素
+
+    lookup命中缓存或加入其他请求进行中的生成时，items中没有元素。
     """
+    next_item = None
     try:
-        # 验证选择索引
-        selection_index = request.selection.selection_index
-        if not (0 <= selection_index < 3):
-            raise HTTPException(
-                status_code=400,
-                detail="选择索引必须在0-2范围内"
-            )
+        while not lookup.done():
+            next_item = asyncio.ensure_future(items.get())
+            await asyncio.wait((lookup, next_item), return_when=asyncio.FIRST_COMPLETED)
+            if not next_item.done():
+                next_item.cancel()
+                break
+            yield next_item.result()
+        while not items.empty():
+            yield items.get_nowait()
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+
+async def _stream_enhanced_options(
+    request: PSWriteRequest,
+    gemini: GeminiService,
+    params: GenerationParams,
+    on_option: Callable[[dict], None]
+) -> Tuple[List[ResearchOption], str]:
+    """
+    流式调用Gemini生成调研结果，每个细分领域块解析并评分后立即以选项字典调用on_option
 
-        # 获取选择的选项
-        research_options = request.selection.research_options
-        if selection_index >= len(research_options):
-            raise HTTPException(
-                status_code=400,
-                detail=f"选择索引{selection_index}超出选项范围({len(research_options)}个选项)"
-            )
+    Returns:
+        Tuple[调研选项列表, 实际生成结果的模型]
 
-        selected_option = research_options[selection_index]
+    Raises:
+        HTTPException: 选项数量不正确时抛出
+    """
+    prompt = format_enhanced_research_prompt(
+        school=request.school,
+        major=request.major,
+        courses=request.courses,
+        extracurricular=request.extracurricular
+    )
 
-        # 从环境变量获取API密钥
-        api_key = settings.GEMINI_API_KEY
-        if not api_key or len(api_key) < 10:
-            raise HTTPException(
-                status_code=500,
-                detail="服务器未配置Gemini API密钥，请联系管理员设置GEMINI_API_KEY环境变量"
-            )
+    parser = IncrementalResearchParser()
+    result = GenerationResult()
+    research_options: List[ResearchOption] = []
+
+    async def parsed_blocks():
+        """增量解析流式文本，逐个产出完成的领域块"""
+        async for chunk in gemini.stream_enhanced_research(prompt, params, result):
+            for block in parser.feed(chunk):
+                yield block
+        for block in parser.close():
+            yield block
+
+    async for option, domain_text in parsed_blocks():
+        # 只使用前3个领域
+        if len(research_options) >= 3:
+            continue
+        # 评分在执行器中运行，不阻塞其他请求的流式输出
+        option = await cpu_executor.run(
+            enhance_research_option_with_scoring,
+            option,
+            domain_text,
+            request.courses,
+            request.extracurricular,
+            size=len(domain_text)
+        )
+        on_option(option.dict())
+        research_options.append(option)
 
-        # 初始化Gemini服务
-        gemini = GeminiService(api_key=api_key)
+    if len(research_options) != 3:
+        raise HTTPException(
+            status_code=500,
+            detail=f"期望3个调研选项，但解析出{len(research_options)}个"
+        )
 
-        # 构建个人陈述提示词
-        prompt = format_personal_statement_prompt(
-            school=request.school,
-            major=request.major,
-            courses=request.courses,
-            extracurricular=request.extracurricular,
-            selected_domain=selected_option.title
+    return research_options, result.model_name
+
+async def _research_event_stream(
+    request: PSWriteRequest,
+    gemini: GeminiService,
+    params: GenerationParams
+) -> AsyncIterator[str]:
+    """
+    调研选项的SSE事件流
+
+    - option: 每个细分领域块接收完整并解析后立即发送
+    - session: 全部选项完成后发送会话ID和实际生成调研结果的模型
+    - error: 出错时发送错误详情
+
+    与非流式接口共用缓存查找（精确、近似）和并发合并：本请求发起的生成逐个推送选项；
+    命中缓存或加入其他请求进行中的生成时，拿到缓存条目后一次推送全部选项。
+    """
+    streamed: asyncio.Queue = asyncio.Queue()
+    lookup = asyncio.ensure_future(research_cache.get_or_generate_research(
+        school=request.school,
+        major=request.major,
+        courses=request.courses,
+        extracurricular=request.extracurricular,
+        generate=lambda: _stream_enhanced_options(request, gemini, params, streamed.put_nowait),
+        generation_params=params.cache_params()
+    ))
+    sent = 0
+
+    try:
+        # 生成过程中转发已完成的选项，直到缓存查找（或共享的生成任务）结束
+        async with aclosing(_forward_until_done(lookup, streamed)) as options:
+            async for option in options:
+                yield _sse_event("option", {"index": sent, "option": option})
+                sent += 1
+
+        cache_entry, cache_status, similarity = lookup.result()
+        research_data = cache_entry['research_options']
+        for i in range(sent, len(research_data)):
+            yield _sse_event("option", {"index": i, "option": research_data[i]})
+
+        # 创建会话
+        session_id = await selection_service.create_session_from_data(
+            research_data, _session_profile(request), cache_entry['options_bytes']
+        )
+        _start_ps_prefetch(session_id, request, research_data, gemini)
+
+        message = "请从以上3个选项中选择一个作为文书写作方向"
+        if cache_status == "hit":
+            message += " (结果来自缓存)"
+        elif cache_status == "approximate":
+            message += " (结果来自相似背景的缓存)"
+
+        yield _sse_event("session", {
+            "session_id": session_id,
+            "message": message,
+            "approximate": similarity is not None,
+            "similarity": similarity,
+            "model_name": cache_entry.get('model_name')
+        })
+
+    except HTTPException as e:
+        yield _sse_event("error", {"detail": e.detail})
+    except Exception as e:
+        yield _sse_event("error", {"detail": f"生成调研选项时出错: {str(e)}"})
+    finally:
+        # 客户端断开时只取消本请求的等待，共享的生成任务继续完成并写入缓存
+        lookup.cancel()
+
+@router.post("/generate-with-selection/stream")
+async def stream_research_options(
+    request: PSWriteRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
+    """
+    流式生成调研选项（Server-Sent Events）
+
+    - 每个细分领域解析完成后立即推送option事件
+    - 最后推送包含session_id的session事件
+    """
+    params = _generation_params(gemini, OPERATION_RESEARCH, request)
+    return StreamingResponse(
+        _research_event_stream(request, gemini, params),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _get_selected_option(request: PSGenerationRequest) -> ResearchOption:
+    """验证用户选择并返回选中的调研选项"""
+    # 验证选择索引
+    selection_index = request.selection.selection_index
+    if not (0 <= selection_index < 3):
+        raise HTTPException(
+            status_code=400,
+            detail="选择索引必须在0-2范围内"
+        )
+
+    # 获取选择的选项
+    research_options = request.selection.research_options
+    if selection_index >= len(research_options):
+        raise HTTPException(
+            status_code=400,
+            detail=f"选择索引{selection_index}超出选项范围({len(research_options)}个选项)"
         )
 
-        # 生成个人陈述
-        ps_text = await gemini.generate_personal_statement(prompt)
+    return research_options[selection_index]
+
+async def _resolve_session_selection(request: SessionPSGenerationRequest) -> Tuple[PSWriteRequest, ResearchOption]:
+    """从会话中读取用户背景和选中的调研选项"""
+    session = await selection_service.get_session(request.session_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail="会话不存在或已过期"
+        )
+
+    if not await selection_service.validate_selection(request.session_id, request.selection_index):
+        raise HTTPException(
+            status_code=400,
+            detail=f"选择索引{request.selection_index}超出选项范围({len(session['research_options'])}个选项)"
+        )
+
+    if not session.get('profile'):
+        raise HTTPException(
+            status_code=400,
+            detail="会话中没有用户背景信息，请重新生成调研选项"
+        )
+
+    profile = PSWriteRequest(**session['profile'])
+    selected_option = ResearchOption(**session['research_options'][request.selection_index])
+    return profile, selected_option
+
+def _build_personal_statement_prompt(request: UserProfile, selected_option: ResearchOption) -> str:
+    """构建个人陈述提示词"""
+    return format_personal_statement_prompt(
+        school=request.school,
+        major=request.major,
+        courses=request.courses,
+        extracurricular=request.extracurricular,
+        selected_domain=selected_option.title
+    )
+
+def _ps_cache_key(request: UserProfile, selected_option: ResearchOption, params: GenerationParams) -> str:
+    """个人陈述缓存键：规范化的用户背景 + 选择的细分领域 + 生成参数"""
+    return ps_cache.generate_cache_key(
+        school=request.school,
+        major=request.major,
+        courses=request.courses,
+        extracurricular=request.extracurricular,
+        selected_domain=selected_option.title,
+        generation_params=params.cache_params()
+    )
+
+async def _generate_statement(
+    request: UserProfile,
+    selected_option: ResearchOption,
+    gemini: GeminiService,
+    params: GenerationParams
+) -> dict:
+    """调用Gemini生成个人陈述并解析为PersonalStatement字段dict"""
+    # 构建个人陈述提示词
+    prompt = _build_personal_statement_prompt(request, selected_option)
+
+    # 生成个人陈述（主模型超时或过载时由备用模型生成）
+    result = await gemini.generate_personal_statement(prompt, params)
+
+    # 解析段落
+    paragraphs = await cpu_executor.run(parse_personal_statement, result.text, size=len(result.text))
+
+    return PersonalStatement(
+        paragraphs=paragraphs,
+        selected_domain=selected_option.title,
+        generated_at=datetime.now().isoformat(),
+        model_name=result.model_name
+    ).dict()
+
+def _start_ps_prefetch(session_id: str, request: UserProfile, research_data: List[dict], gemini: GeminiService):
+    """为会话的调研选项启动个人陈述预取（预取关闭时不做任何事）"""
+    if not ps_prefetcher.enabled:
+        return
+
+    # 预取使用路由表中个人陈述的默认参数（与不指定生成参数的后续请求缓存键一致）
+    params = _generation_params(gemini, OPERATION_PERSONAL_STATEMENT)
+    candidates = []
+    for item in research_data:
+        option = ResearchOption(**item)
+        candidates.append((
+            option.match_score,
+            _ps_cache_key(request, option, params),
+            lambda option=option: _generate_statement(request, option, gemini, params)
+        ))
+    ps_prefetcher.prefetch(session_id, candidates, params.model_name)
+
+async def _generate_personal_statement_for(
+    profile: UserProfile,
+    selected_option: ResearchOption,
+    gemini: GeminiService,
+    params: GenerationParams
+) -> PersonalStatement:
+    """为选中的调研选项生成（或从缓存读取）个人陈述"""
+    cache_key = _ps_cache_key(profile, selected_option, params)
+
+    # 用户已做出选择，取消同一会话中其余选项的预取
+    ps_prefetcher.on_selection(cache_key)
+
+    # 检查缓存；相同请求的并发调用（包括预取）共享同一次生成
+    statement, _ = await ps_cache.get_or_generate_statement(
+        cache_key,
+        lambda: _generate_statement(profile, selected_option, gemini, params),
+        params.model_name
+    )
+    return PersonalStatement(**statement)
+
+@router.post("/generate-ps", response_model=PersonalStatement)
+async def generate_personal_statement(
+    request: PSGenerationRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
+    """
+    基于用户选择生成个人陈述
 
-        # 解析段落
-        paragraphs = parse_personal_statement(ps_text)
+    - 验证用户选择的有效性
+    - 调用Gemini生成5段式个人陈述
+    - 返回格式化后的个人陈述
+    """
+    try:
+        selected_option = _get_selected_option(request)
+        params = _generation_params(gemini, OPERATION_PERSONAL_STATEMENT, request)
+        return await _generate_personal_statement_for(request, selected_option, gemini, params)
 
-        return PersonalStatement(
-            paragraphs=paragraphs,
-            selected_domain=selected_option.title,
-            generated_at=datetime.now().isoformat()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"生成个人陈述时出错: {str(e)}"
         )
 
+@router.post("/generate-ps/by-session", response_model=PersonalStatement)
+async def generate_personal_statement_by_session(
+    request: SessionPSGenerationRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
+    """
+    基于会话生成个人陈述
+
+    - 只需提交session_id和selection_index
+    - 调研选项和用户背景从服务端会话中读取并验证
+    - 返回格式化后的个人陈述
+    """
+    try:
+        profile, selected_option = await _resolve_session_selection(request)
+        params = _generation_params(gemini, OPERATION_PERSONAL_STATEMENT, request)
+        return await _generate_personal_statement_for(profile, selected_option, gemini, params)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -217,8 +591,118 @@ async def generate_personal_statement(request: PSGenerationRequest):
             detail=f"生成个人陈述时出错: {str(e)}"
         )
 
+async def _stream_statement(
+    request: UserProfile,
+    selected_option: ResearchOption,
+    gemini: GeminiService,
+    params: GenerationParams,
+    on_paragraph: Callable[[str], None]
+) -> dict:
+    """流式调用Gemini生成个人陈述，每个段落在分隔符到达后立即调用on_paragraph，返回PersonalStatement字段dict"""
+    prompt = _build_personal_statement_prompt(request, selected_option)
+
+    parser = IncrementalPersonalStatementParser()
+    result = GenerationResult()
+    async for chunk in gemini.stream_personal_statement(prompt, params, result):
+        for paragraph in parser.feed(chunk):
+            on_paragraph(paragraph)
+
+    # 生成结束：最后一段和补齐的段落
+    for paragraph in parser.close():
+        on_paragraph(paragraph)
+
+    return PersonalStatement(
+        paragraphs=parser.paragraphs,
+        selected_domain=selected_option.title,
+        generated_at=datetime.now().isoformat(),
+        model_name=result.model_name
+    ).dict()
+
+async def _personal_statement_event_stream(
+    request: UserProfile,
+    selected_option: ResearchOption,
+    gemini: GeminiService,
+    params: GenerationParams
+) -> AsyncIterator[str]:
+    """
+    个人陈述的SSE事件流
+
+    - paragraph: 每个段落在分隔符到达后立即发送
+    - done: 生成完成后发送完整的5段式个人陈述（缺失段落已补齐）
+    - error: 出错时发送错误详情
+
+    与非流式接口共用缓存和并发合并：本请求发起的生成逐段推送，其他请求（包括预取）可以加入；
+    命中缓存或加入进行中的生成时，拿到结果后一次推送全部段落。
+    """
+    lookup = None
+    try:
+        cache_key = _ps_cache_key(request, selected_option, params)
+        ps_prefetcher.on_selection(cache_key)
+
+        streamed: asyncio.Queue = asyncio.Queue()
+        lookup = asyncio.ensure_future(ps_cache.get_or_generate_statement(
+            cache_key,
+            lambda: _stream_statement(request, selected_option, gemini, params, streamed.put_nowait),
+            params.model_name
+        ))
+
+        sent = 0
+        async with aclosing(_forward_until_done(lookup, streamed)) as paragraphs:
+            async for paragraph in paragraphs:
+                yield _sse_event("paragraph", {"index": sent, "text": paragraph})
+                sent += 1
+
+        statement, _ = lookup.result()
+        for i in range(sent, len(statement['paragraphs'])):
+            yield _sse_event("paragraph", {"index": i, "text": statement['paragraphs'][i]})
+        yield _sse_event("done", statement)
+
+    except Exception as e:
+        yield _sse_event("error", {"detail": f"生成个人陈述时出错: {str(e)}"})
+    finally:
+        # 客户端断开时只取消本请求的等待，共享的生成任务继续完成并写入缓存
+        if lookup is not None:
+            lookup.cancel()
+
+@router.post("/generate-ps/stream")
+async def stream_personal_statement(
+    request: PSGenerationRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
+    """
+    流式生成个人陈述（Server-Sent Events）
+
+    - 每个段落完成后立即推送paragraph事件
+    - 最后推送包含完整个人陈述的done事件
+    """
+    selected_option = _get_selected_option(request)
+    params = _generation_params(gemini, OPERATION_PERSONAL_STATEMENT, request)
+    return StreamingResponse(
+        _personal_statement_event_stream(request, selected_option, gemini, params),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate-ps/by-session/stream")
+async def stream_personal_statement_by_session(
+    request: SessionPSGenerationRequest,
+    gemini: GeminiService = Depends(get_gemini_service)
+):
+    """
+    基于会话流式生成个人陈述（Server-Sent Events）
+
+    - 请求体同/generate-ps/by-session，事件同/generate-ps/stream
+    """
+    profile, selected_option = await _resolve_session_selection(request)
+    params = _generation_params(gemini, OPERATION_PERSONAL_STATEMENT, request)
+    return StreamingResponse(
+        _personal_statement_event_stream(profile, selected_option, gemini, params),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/test-gemini")
-async def test_gemini_integration():
+async def test_gemini_integration(gemini: GeminiService = Depends(get_gemini_service)):
     """
     测试Gemini集成
 
@@ -226,15 +710,6 @@ async def test_gemini_integration():
     - 测试Gemini连接
     """
     try:
-        # 从环境变量获取API密钥
-        api_key = settings.GEMINI_API_KEY
-        if not api_key or len(api_key) < 10:
-            raise HTTPException(
-                status_code=500,
-                detail="服务器未配置Gemini API密钥，请联系管理员设置GEMINI_API_KEY环境变量"
-            )
-
-        gemini = GeminiService(api_key=api_key)
         is_connected = await gemini.test_connection()
 
         if is_connected:
@@ -263,14 +738,14 @@ async def get_session_info(session_id: str):
     - 验证会话是否存在
     - 返回会话中的调研选项
     """
-    session = selection_service.get_session(session_id)
+    session = await selection_service.get_session(session_id)
     if not session:
         raise HTTPException(
             status_code=404,
             detail="会话不存在或已过期"
         )
 
-    research_options = selection_service.get_research_options(session_id)
+    research_options = await selection_service.get_research_options(session_id)
     return {
         "session_id": session_id,
         "created_at": session['created_at'].isoformat(),
@@ -335,10 +810,23 @@ async def get_cache_stats():
     - 缓存条目数量
     - 缓存命中率（需要记录访问统计）
     - 缓存配置信息
+    - 个人陈述缓存统计
+    - 选择会话统计
+    - 参考文献评分缓存统计
+    - CPU执行器统计
     """
-    stats = research_cache.get_cache_stats()
+    # 统计需要遍历缓存条目并查询共享存储，在执行器中运行
+    return await cpu_executor.run(_collect_cache_stats)
+
+def _collect_cache_stats() -> dict:
+    """汇总各缓存和服务的统计信息"""
     return {
-        "cache_stats": stats,
+        "cache_stats": research_cache.get_cache_stats(),
+        "ps_cache_stats": ps_cache.get_cache_stats(),
+        "ps_prefetch_stats": ps_prefetcher.get_stats(),
+        "session_stats": selection_service.get_stats(),
+        "reference_score_cache": get_reference_score_cache_info(),
+        "executor_stats": cpu_executor.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -351,7 +839,11 @@ async def validate_references_test(references: List[str]):
     - 返回评分和错误信息
     """
     try:
-        valid_refs, score, errors = validate_and_score_references(references)
+        valid_refs, score, errors = await cpu_executor.run(
+            validate_and_score_references,
+            references,
+            size=sum(len(ref) for ref in references)
+        )
 
         return {
             "original_count": len(references),
@@ -370,11 +862,12 @@ async def validate_references_test(references: List[str]):
 @router.get("/clear-cache")
 async def clear_research_cache():
     """
-    清空调研缓存
+    清空调研缓存和个人陈述缓存
 
     - 用于测试和调试
     """
-    research_cache.clear_cache()
+    await research_cache.clear_cache()
+    ps_cache.clear_cache()
     return {
         "message": "缓存已清空",
         "timestamp": datetime.now().isoformat()
@@ -1,6 +1,7 @@
 import os
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 
 class Settings(BaseSettings):
     """应用配置"""
@@ -12,6 +13,115 @@ class Settings(BaseSettings):
     session_ttl_minutes: int = 30
     max_retry_attempts: int = 3
 
+    # 选择会话配置（容量限制用于进程内会话存储，配置cache_db_path时会话保存在SQLite中）
+    session_max_entries: int = 10000
+    session_max_bytes: Optional[int] = 64 * 1024 * 1024  # 64MB，为空时不限制
+    session_sweep_interval_seconds: float = 60.0
+
+    # Gemini HTTP连接池配置（每个worker共享一个长连接客户端）
+    gemini_max_connections: int = 20
+    gemini_max_keepalive_connections: int = 10
+    gemini_keepalive_expiry_seconds: float = 60.0
+    gemini_connect_timeout_seconds: float = 10.0
+    gemini_http2: bool = True  # 仅在安装了h2时生效
+
+    # Gemini模型路由：默认模型，按操作（research/personal_statement）选择的模型（JSON对象），
+    # 请求可以指定的模型（JSON数组；默认模型和路由表中的模型总是允许）及最大输出token数上限（为空时不限制）。
+    # 思考模型的最大输出token数下限（JSON对象，模型 -> 下限；注释掉时使用内置的2.5 pro/flash下限）。
+    # JSON对象类型的配置（路由表、输出下限、备用模型、时间预算）不能留空，不使用时注释掉
+    gemini_default_model: str = "gemini-2.5-pro"
+    gemini_model_routes: Dict[str, str] = Field(default_factory=dict)
+    gemini_allowed_models: Optional[List[str]] = None
+    gemini_max_output_tokens_limit: Optional[int] = None
+    gemini_min_output_tokens: Optional[Dict[str, int]] = None
+
+    # Gemini调用限流：令牌桶限制请求速率（每分钟请求数，为空时不限制），
+    # AIMD自适应并发在收到配额/429错误时减半、成功时逐步恢复
+    gemini_rate_limit_per_minute: Optional[float] = None
+    gemini_rate_limit_burst: int = 10
+    gemini_rate_limit_shared: bool = False  # 通过cache_db_path在多个worker之间共享令牌桶
+    gemini_initial_concurrency: int = 4
+    gemini_min_concurrency: int = 1
+    gemini_max_concurrency: int = 16
+
+    # Gemini调用重试（最大重试次数见max_retry_attempts）：指数退避加完全抖动，
+    # 整体截止时间（秒，为空时不限制；流式调用只限制建立流的过程）；
+    # 连续瞬时错误（5xx、超时）达到阈值后熔断，recovery秒后放行探测请求
+    gemini_retry_base_delay_seconds: float = 0.5
+    gemini_retry_max_delay_seconds: float = 8.0
+    gemini_request_deadline_seconds: Optional[float] = 180.0
+    gemini_circuit_failure_threshold: int = 5
+    gemini_circuit_recovery_seconds: float = 30.0
+
+    # Gemini对冲请求（非流式调用）：超过同类调用耗时的分位数仍未完成时再发一个相同请求，
+    # 额外请求不超过调用数的budget_ratio
+    gemini_hedging_enabled: bool = False
+    gemini_hedge_percentile: float = 0.95
+    gemini_hedge_budget_ratio: float = 0.05
+    gemini_hedge_min_delay_seconds: float = 1.0
+    gemini_hedge_min_samples: int = 20
+
+    # Gemini模型级联：主模型超过操作的时间预算（秒，JSON对象，按research/personal_statement配置；
+    # 流式调用为等待第一个片段的时间）仍未返回，或返回过载错误时，用备用模型（JSON对象：主模型 -> 备用模型）重新生成。
+    # 没有配置备用模型时不做级联；没有配置预算的操作使用默认预算，为空时只在出错时切换
+    gemini_fallback_models: Dict[str, str] = Field(default_factory=dict)
+    gemini_cascade_budgets: Dict[str, float] = Field(default_factory=dict)
+    gemini_cascade_default_budget_seconds: Optional[float] = None
+
+    # 调研结果缓存配置
+    research_cache_ttl_hours: int = 24
+    research_cache_max_entries: int = 1000
+    research_cache_max_bytes: Optional[int] = 64 * 1024 * 1024  # 64MB，为空时不限制
+    # 近似查找的Jaccard相似度阈值，为空时不启用
+    research_cache_similarity_threshold: Optional[float] = None
+
+    # 个人陈述缓存配置
+    ps_cache_ttl_hours: int = 24
+    ps_cache_max_entries: int = 500
+    ps_cache_max_bytes: Optional[int] = 32 * 1024 * 1024  # 32MB，为空时不限制
+    # 个人陈述预取：off（关闭）、top（匹配度最高的选项）、all（全部选项）
+    ps_prefetch_mode: str = "off"
+    ps_prefetch_concurrency: int = 2
+
+    # 评分关键词表（JSON数组），为空时使用parser中的默认关键词表
+    scoring_authoritative_sources: Optional[List[str]] = None
+    scoring_journal_keywords: Optional[List[str]] = None
+    scoring_content_keywords: Optional[List[str]] = None
+    scoring_required_sections: Optional[List[str]] = None
+
+    # CPU密集任务（解析、评分、统计）执行器：线程池大小为0时直接在事件循环中运行；
+    # 进程池大小大于0时，超过阈值（字符数）的调研响应在进程池中解析
+    cpu_executor_threads: int = 4
+    cpu_executor_processes: int = 0
+    cpu_process_threshold_chars: int = 256 * 1024
+
+    # 跨进程共享的SQLite缓存和会话文件路径，为空时只使用进程内存储
+    cache_db_path: Optional[str] = None
+
+    @field_validator(
+        'session_max_bytes',
+        'gemini_allowed_models',
+        'gemini_max_output_tokens_limit',
+        'gemini_rate_limit_per_minute',
+        'gemini_request_deadline_seconds',
+        'gemini_cascade_default_budget_seconds',
+        'research_cache_max_bytes',
+        'research_cache_similarity_threshold',
+        'ps_cache_max_bytes',
+        'scoring_authoritative_sources',
+        'scoring_journal_keywords',
+        'scoring_content_keywords',
+        'scoring_required_sections',
+        'cache_db_path',
+        mode='before'
+    )
+    @classmethod
+    def _blank_as_none(cls, value):
+        """可选配置的环境变量留空（例如RESEARCH_CACHE_SIMILARITY_THRESHOLD=）时视为None，而不是解析空字符串失败"""
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
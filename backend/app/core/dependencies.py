@@ -0,0 +1,112 @@
+from typing import Optional
+from fastapi import HTTPException, Request
+
+from app.core.config import Settings
+from app.services.cascade import ModelCascade
+from app.services.gemini import GeminiService
+from app.services.hedging import RequestHedger
+from app.services.ratelimit import (
+    AdaptiveConcurrencyLimiter,
+    GeminiRateLimiter,
+    SQLiteTokenBucket,
+    TokenBucket
+)
+from app.services.retry import CircuitBreaker, RetryPolicy
+from app.services.routing import ModelRouter
+
+def create_gemini_rate_limiter(settings: Settings) -> GeminiRateLimiter:
+    """根据配置创建Gemini调用限流器"""
+    bucket = None
+    if settings.gemini_rate_limit_per_minute:
+        rate = settings.gemini_rate_limit_per_minute / 60
+        if settings.gemini_rate_limit_shared and settings.cache_db_path:
+            bucket = SQLiteTokenBucket(settings.cache_db_path, "gemini", rate, settings.gemini_rate_limit_burst)
+        else:
+            bucket = TokenBucket(rate, settings.gemini_rate_limit_burst)
+
+    return GeminiRateLimiter(
+        concurrency=AdaptiveConcurrencyLimiter(
+            initial_limit=settings.gemini_initial_concurrency,
+            min_limit=settings.gemini_min_concurrency,
+            max_limit=settings.gemini_max_concurrency
+        ),
+        bucket=bucket
+    )
+
+def create_gemini_retry_policy(settings: Settings) -> RetryPolicy:
+    """根据配置创建Gemini调用重试策略"""
+    return RetryPolicy(
+        max_retries=settings.max_retry_attempts,
+        base_delay=settings.gemini_retry_base_delay_seconds,
+        max_delay=settings.gemini_retry_max_delay_seconds,
+        deadline_seconds=settings.gemini_request_deadline_seconds
+    )
+
+def create_gemini_hedger(settings: Settings) -> Optional[RequestHedger]:
+    """根据配置创建Gemini对冲请求，未启用时返回None"""
+    if not settings.gemini_hedging_enabled:
+        return None
+    return RequestHedger(
+        percentile=settings.gemini_hedge_percentile,
+        budget_ratio=settings.gemini_hedge_budget_ratio,
+        min_delay_seconds=settings.gemini_hedge_min_delay_seconds,
+        min_samples=settings.gemini_hedge_min_samples
+    )
+
+def create_gemini_cascade(settings: Settings) -> Optional[ModelCascade]:
+    """根据配置创建Gemini模型级联，没有配置备用模型时返回None"""
+    if not settings.gemini_fallback_models:
+        return None
+    return ModelCascade(
+        fallback_models=settings.gemini_fallback_models,
+        budgets=settings.gemini_cascade_budgets,
+        default_budget=settings.gemini_cascade_default_budget_seconds
+    )
+
+def create_gemini_service(settings: Settings) -> Optional[GeminiService]:
+    """
+    根据配置创建进程级共享的Gemini服务
+
+    Args:
+        settings: 应用配置
+
+    Returns:
+        GeminiService实例，未配置有效API密钥时返回None
+    """
+    api_key = settings.GEMINI_API_KEY
+    if not api_key or len(api_key) < 10:
+        return None
+
+    return GeminiService(
+        api_key=api_key,
+        max_connections=settings.gemini_max_connections,
+        max_keepalive_connections=settings.gemini_max_keepalive_connections,
+        keepalive_expiry=settings.gemini_keepalive_expiry_seconds,
+        connect_timeout=settings.gemini_connect_timeout_seconds,
+        http2=settings.gemini_http2,
+        rate_limiter=create_gemini_rate_limiter(settings),
+        retry_policy=create_gemini_retry_policy(settings),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=settings.gemini_circuit_failure_threshold,
+            recovery_seconds=settings.gemini_circuit_recovery_seconds
+        ),
+        hedger=create_gemini_hedger(settings),
+        model_router=ModelRouter(
+            default_model=settings.gemini_default_model,
+            routes=settings.gemini_model_routes,
+            allowed_models=settings.gemini_allowed_models,
+            max_output_tokens_limit=settings.gemini_max_output_tokens_limit,
+            min_output_tokens=settings.gemini_min_output_tokens
+        ),
+        cascade=create_gemini_cascade(settings)
+    )
+
+def get_gemini_service(request: Request) -> GeminiService:
+    """获取lifespan中创建的共享Gemini服务（用于Depends注入）"""
+    gemini = getattr(request.app.state, "gemini_service", None)
+    if gemini is None:
+        raise HTTPException(
+            status_code=500,
+            detail="服务器未配置Gemini API密钥，请联系管理员设置GEMINI_API_KEY环境变量"
+        )
+    return gemini
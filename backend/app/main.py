@@ -1,16 +1,38 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.api import ps_write
 from app.api.gemini import router as gemini_router
+from app.core.config import get_settings
+from app.core.dependencies import create_gemini_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：创建并在关闭时释放共享的Gemini服务、缓存、会话存储和CPU执行器，运行会话清理任务；关闭时取消未完成的预取"""
+    settings = get_settings()
+    app.state.gemini_service = create_gemini_service(settings)
+    ps_write.selection_service.start_sweeper(settings.session_sweep_interval_seconds)
+    try:
+        yield
+    finally:
+        await ps_write.selection_service.stop_sweeper()
+        await ps_write.ps_prefetcher.aclose()
+        if app.state.gemini_service is not None:
+            await app.state.gemini_service.aclose()
+        if ps_write.research_cache.store is not None:
+            ps_write.research_cache.store.close()
+        ps_write.selection_service.store.close()
+        ps_write.cpu_executor.shutdown()
 
 # 创建FastAPI应用
 app = FastAPI(
     title="Mutao Assistant API",
     description="PS写作工具后端API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 自定义异常
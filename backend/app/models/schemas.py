@@ -35,18 +35,33 @@ class PSGenerationRequest(BaseModel):
     courses: str = Field(..., description="相关课程描述")
     extracurricular: str = Field(..., description="课外经历描述")
     # api_key 字段已移除，从环境变量GEMINI_API_KEY读取
+    model_name: Optional[str] = Field(None, description="模型名称")
+    temperature: Optional[float] = Field(None, description="温度参数")
+    max_output_tokens: Optional[int] = Field(None, description="最大输出token数")
+
+class SessionPSGenerationRequest(BaseModel):
+    """基于会话的个人陈述生成请求（调研选项和用户背景从会话中读取）"""
+    session_id: str = Field(..., description="生成调研选项时返回的会话ID")
+    selection_index: int = Field(..., ge=0, le=2, description="选择索引 (0, 1, 2)")
+    model_name: Optional[str] = Field(None, description="模型名称")
+    temperature: Optional[float] = Field(None, description="温度参数")
+    max_output_tokens: Optional[int] = Field(None, description="最大输出token数")
 
 class PersonalStatement(BaseModel):
     """个人陈述响应"""
     paragraphs: List[str] = Field(..., description="5个段落")
     selected_domain: str = Field(..., description="选择的细分领域")
     generated_at: str = Field(default_factory=lambda: datetime.now().isoformat(), description="生成时间戳")
+    model_name: Optional[str] = Field(None, description="实际生成个人陈述的模型（主模型超时或过载时为备用模型）")
 
 class ResearchOptionsResponse(BaseModel):
     """调研选项响应"""
     session_id: str = Field(..., description="唯一会话ID")
     research_options: List[ResearchOption] = Field(..., description="调研选项列表")
     message: str = Field(default="请从以上3个选项中选择一个作为文书写作方向", description="提示消息")
+    approximate: bool = Field(default=False, description="结果是否来自相似请求的缓存（近似命中）")
+    similarity: Optional[float] = Field(None, description="近似命中时与缓存请求的Jaccard相似度")
+    model_name: Optional[str] = Field(None, description="实际生成调研结果的模型（主模型超时或过载时为备用模型）")
 
 class ErrorResponse(BaseModel):
     """错误响应"""
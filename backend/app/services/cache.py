@@ -1,34 +1,208 @@
+import asyncio
 import hashlib
 import json
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple, Callable, Awaitable
 from app.models.schemas import ResearchOption
+from app.services.lru import TTLLRUCache
+from app.services.store import KeyValueStore
+from app.services.normalize import normalize_research_inputs, normalize_school, normalize_text
+from app.services.similarity import MinHashLSHIndex, research_features
+
+class SingleFlight:
+    """
+    按键合并并发的异步调用
+
+    同一个键同时只执行一次调用，其余调用方等待同一结果；异常传递给所有等待者。
+    调用在独立任务中执行，单个等待者被取消不会取消共享的调用。
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 每个键当前的等待者数量
+        self._waiters: Dict[str, int] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入键对应的调用
 
-class ResearchCache:
-    """调研结果缓存服务"""
+        Args:
+            key: 合并键
+            func: 没有进行中的调用时执行的协程函数
+
+        Returns:
+            调用结果
+        """
+        task = self.get(key)
+        if task is None:
+            task = self.start(key, func)
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def start(self, key: str, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """在后台启动键对应的调用（已有进行中的调用时直接返回该任务）"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, func))
+            # 所有等待者都被取消时，避免"exception was never retrieved"警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._tasks[key] = task
+        return task
+
+    def get(self, key: str) -> Optional[asyncio.Task]:
+        """获取键对应的进行中任务"""
+        return self._tasks.get(key)
+
+    def cancel(self, key: str) -> bool:
+        """
+        取消没有等待者的后台调用
+
+        Returns:
+            是否已取消；调用不存在或仍有等待者时返回False
+        """
+        task = self._tasks.get(key)
+        if task is None or self._waiters.get(key):
+            return False
+        task.cancel()
+        return True
+
+    async def _run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await func()
+        finally:
+            self._tasks.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+def is_fallback_result(primary_model: Optional[str], model_name: Optional[str]) -> bool:
+    """
+    结果是否由备用模型生成
+
+    缓存键按路由的主模型计算，备用模型的结果不写入缓存：否则主模型恢复后，
+    相同请求在整个TTL内仍会得到备用模型的结果。主模型或实际模型未知时视为主模型的结果。
+    """
+    return primary_model is not None and model_name is not None and model_name != primary_model
+
+def serialize_options(research_data: List[dict]) -> str:
+    """将调研选项序列化为紧凑JSON（与FastAPI JSONResponse的输出格式一致）"""
+    return json.dumps(research_data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
 
-    def __init__(self, ttl_hours: int = 24, max_entries: int = 1000):
+class ResearchCache:
+    """
+    调研结果缓存服务
+
+    条目保存在TTLLRUCache中：LRU淘汰为O(1)，清理过期条目为O(log n)。
+
+    可选的store作为跨进程共享的二级缓存：写入时同时写入store，
+    进程内缓存未命中时从store读取并回填（保留原始创建时间，TTL语义不变）。
+    store的读写（SQLite查询和JSON编解码）在线程中执行，等待锁时不阻塞事件循环。
+
+    可选的近似查找层（MinHash + LSH）按学校+专业分区索引课程和课外经历，
+    精确未命中时返回相似度不低于阈值的进程内缓存条目。
+    """
+
+    def __init__(
+        self,
+        ttl_hours: int = 24,
+        max_entries: int = 1000,
+        max_bytes: Optional[int] = None,
+        store: Optional[KeyValueStore] = None,
+        similarity_threshold: Optional[float] = None
+    ):
         """
         初始化缓存
 
         Args:
             ttl_hours: 缓存存活时间（小时）
             max_entries: 最大缓存条目数
+            max_bytes: 缓存内容的最大字节数（按调研结果JSON的UTF-8长度估算），None表示不限制
+            store: 二级共享缓存存储，None表示只使用进程内缓存
+            similarity_threshold: 近似查找的Jaccard相似度阈值，None表示不启用近似查找
         """
-        self.cache: Dict[str, dict] = {}
         self.ttl = timedelta(hours=ttl_hours)
-        self.max_entries = max_entries
-        self.access_count: Dict[str, int] = {}
-
-    def _generate_cache_key(self, school: str, major: str, courses: str, extracurricular: str) -> str:
+        self.store = store
+        # 近似查找索引（条目被删除、淘汰或过期时同步移除）
+        self.approx_index = MinHashLSHIndex(threshold=similarity_threshold) if similarity_threshold is not None else None
+        self.cache = TTLLRUCache(
+            self.ttl,
+            max_entries,
+            max_bytes,
+            on_remove=self.approx_index.remove if self.approx_index is not None else None
+        )
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        # 原始输入不同、因规范化才命中的次数
+        self.normalized_hits = 0
+        # 近似查找统计
+        self.approx_lookups = 0
+        self.approx_hits = 0
+        self.approx_lookup_seconds = 0.0
+        # 由备用模型生成、没有写入缓存的结果数
+        self.uncached_fallbacks = 0
+        # 正在进行中的生成任务（single-flight），按缓存键合并相同请求
+        self._inflight = SingleFlight()
+
+    def _generate_cache_key(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         生成缓存键
 
+        输入先经过规范化（NFKC、空白折叠、分隔符统一、学校别名、课程排序），
+        使写法不同但语义相同的请求得到相同的缓存键。
+
+        Args:
+            school: 目标学校
+            major: 申请专业
+            courses: 相关课程描述
+            extracurricular: 课外经历描述
+            generation_params: 影响生成结果的参数（模型名称、温度等）
+
+        Returns:
+            缓存键字符串
+        """
+        return self._hash_inputs(
+            *normalize_research_inputs(school, major, courses, extracurricular),
+            generation_params=generation_params
+        )
+
+    @staticmethod
+    def _hash_inputs(
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        对输入计算哈希
+
         Args:
             school: 目标学校
             major: 申请专业
             courses: 相关课程描述
             extracurricular: 课外经历描述
+            generation_params: 影响生成结果的参数，为空时与不区分生成参数的缓存键相同
 
         Returns:
             缓存键字符串
@@ -40,12 +214,21 @@ class ResearchCache:
             'courses': courses,
             'extracurricular': extracurricular
         }
+        if generation_params:
+            input_data['generation_params'] = generation_params
         input_str = json.dumps(input_data, sort_keys=True, ensure_ascii=False)
 
         # 使用SHA256生成哈希
         return hashlib.sha256(input_str.encode('utf-8')).hexdigest()[:32]
 
-    def get_cached_research(self, school: str, major: str, courses: str, extracurricular: str) -> Optional[List[ResearchOption]]:
+    async def get_cached_research(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[ResearchOption]]:
         """
         获取缓存的调研结果
 
@@ -54,31 +237,132 @@ class ResearchCache:
             major: 申请专业
             courses: 相关课程描述
             extracurricular: 课外经历描述
+            generation_params: 影响生成结果的参数
 
         Returns:
             缓存的ResearchOption列表，如果未找到或过期则返回None
         """
-        cache_key = self._generate_cache_key(school, major, courses, extracurricular)
-
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
+        cache_entry = await self.get_cached_entry(school, major, courses, extracurricular, generation_params)
+        if cache_entry is None:
+            return None
+        return [ResearchOption(**item) for item in cache_entry['research_options']]
+
+    async def get_cached_entry(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> Optional[dict]:
+        """
+        获取缓存条目（不构造pydantic对象）
 
-            # 检查是否过期
-            created_at = cache_entry['created_at']
-            if datetime.now() - created_at < self.ttl:
-                # 更新访问计数
-                self.access_count[cache_key] = self.access_count.get(cache_key, 0) + 1
+        条目中的research_options为选项dict列表，options_json为其序列化后的JSON，
+        可直接拼接到响应体中，options_bytes为options_json的UTF-8字节数。调用方不应修改返回的条目。
 
-                # 返回缓存的调研结果
-                research_data = cache_entry['research_options']
-                return [ResearchOption(**item) for item in research_data]
-            else:
-                # 缓存过期，删除
-                self._remove_from_cache(cache_key)
+        Args:
+            school: 目标学校
+            major: 申请专业
+            courses: 相关课程描述
+            extracurricular: 课外经历描述
+            generation_params: 影响生成结果的参数
 
+        Returns:
+            缓存条目，如果未找到或过期则返回None
+        """
+        cache_key = self._generate_cache_key(school, major, courses, extracurricular, generation_params)
+
+        # 未过期时更新LRU顺序，过期时删除
+        cache_entry = self.cache.get(cache_key)
+        if cache_entry is not None:
+            self._record_hit(cache_entry, school, major, courses, extracurricular)
+            return cache_entry
+
+        # 进程内缓存未命中，读取共享存储
+        cache_entry = await self._load_from_store(cache_key)
+        if cache_entry is not None:
+            self.store_hits += 1
+            self._record_hit(cache_entry, school, major, courses, extracurricular)
+            return cache_entry
+
+        self.misses += 1
         return None
 
-    def cache_research(self, school: str, major: str, courses: str, extracurricular: str, research_options: List[ResearchOption]) -> str:
+    def _record_hit(self, cache_entry: dict, school: str, major: str, courses: str, extracurricular: str):
+        """记录一次命中；原始输入与条目不同说明命中来自输入规范化"""
+        cache_entry['access_count'] += 1
+        self.hits += 1
+        if (school, major, courses, extracurricular) != (
+            cache_entry['school'], cache_entry['major'], cache_entry['courses'], cache_entry['extracurricular']
+        ):
+            self.normalized_hits += 1
+
+    async def _load_from_store(self, cache_key: str) -> Optional[dict]:
+        """从共享存储读取条目（在线程中执行）并回填进程内缓存"""
+        if self.store is None:
+            return None
+
+        try:
+            stored = await asyncio.to_thread(self._read_store, cache_key)
+        except Exception as e:
+            # 共享存储不可用时退化为只使用进程内缓存
+            sys.stderr.write(f"[DEBUG] 读取共享缓存失败: {type(e).__name__}: {str(e)}\n")
+            return None
+        if stored is None:
+            return None
+
+        value, created_timestamp, options_json = stored
+        created_at = datetime.fromtimestamp(created_timestamp)
+        if datetime.now() - created_at >= self.ttl:
+            return None
+
+        # 等待读取期间其他请求可能已经写入了同一个键，以进程内的条目为准
+        cache_entry = self.cache.get(cache_key)
+        if cache_entry is not None:
+            return cache_entry
+
+        self.cache.cleanup_expired()
+        return self._insert_entry(
+            cache_key,
+            value['school'],
+            value['major'],
+            value['courses'],
+            value['extracurricular'],
+            value['research_options'],
+            options_json,
+            created_at,
+            value.get('generation_params'),
+            value.get('model_name')
+        )
+
+    def _read_store(self, cache_key: str) -> Optional[Tuple[dict, float, str]]:
+        """读取共享存储并序列化选项（在线程中运行），返回(value, created_at, options_json)"""
+        stored = self.store.get(cache_key)
+        if stored is None:
+            return None
+        value, created_timestamp = stored
+        return value, created_timestamp, serialize_options(value['research_options'])
+
+    def _write_store(self, cache_key: str, value: dict, created_at: datetime):
+        """写入共享存储（在线程中运行）"""
+        self.store.set(
+            cache_key,
+            value,
+            created_at=created_at.timestamp(),
+            expires_at=(created_at + self.ttl).timestamp()
+        )
+
+    async def cache_research(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        research_options: List[ResearchOption],
+        generation_params: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> str:
         """
         缓存调研结果
 
@@ -88,87 +372,480 @@ class ResearchCache:
             courses: 相关课程描述
             extracurricular: 课外经历描述
             research_options: 调研结果列表
+            generation_params: 影响生成结果的参数
+            model_name: 实际生成结果的模型（与generation_params中的模型不同说明由备用模型生成，此时不写入缓存）
 
         Returns:
             缓存键
         """
-        cache_key = self._generate_cache_key(school, major, courses, extracurricular)
+        cache_key = self._generate_cache_key(school, major, courses, extracurricular, generation_params)
+        await self._cache_entry(
+            cache_key, school, major, courses, extracurricular, research_options, generation_params, model_name
+        )
+        return cache_key
+
+    async def _cache_entry(
+        self,
+        cache_key: str,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        research_options: List[ResearchOption],
+        generation_params: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> dict:
+        """
+        写入进程内缓存和共享存储，返回进程内的条目（等待写入共享存储期间条目可能已被淘汰）
 
-        # 检查缓存是否已满
-        if len(self.cache) >= self.max_entries:
-            self._evict_least_used()
+        备用模型生成的结果只构建条目返回给本次请求和等待者，不写入缓存。
+        """
+        research_data = [opt.dict() for opt in research_options]
+        created_at = datetime.now()
+        entry_args = (
+            school, major, courses, extracurricular,
+            research_data, serialize_options(research_data), created_at, generation_params, model_name
+        )
+
+        if is_fallback_result((generation_params or {}).get('model_name'), model_name):
+            self.uncached_fallbacks += 1
+            sys.stderr.write(f"[DEBUG] 调研结果由备用模型{model_name}生成，不写入缓存\n")
+            return self._build_entry(*entry_args)
+
+        # 清理过期缓存
+        self.cache.cleanup_expired()
+        cache_entry = self._insert_entry(cache_key, *entry_args)
+
+        # 写入共享存储（在线程中执行）
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(
+                    self._write_store,
+                    cache_key,
+                    {
+                        'school': school,
+                        'major': major,
+                        'courses': courses,
+                        'extracurricular': extracurricular,
+                        'research_options': research_data,
+                        'generation_params': generation_params,
+                        'model_name': model_name
+                    },
+                    created_at
+                )
+            except Exception as e:
+                sys.stderr.write(f"[DEBUG] 写入共享缓存失败: {type(e).__name__}: {str(e)}\n")
+
+        return cache_entry
+
+    def _insert_entry(
+        self,
+        cache_key: str,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        research_data: List[dict],
+        options_json: str,
+        created_at: datetime,
+        generation_params: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> dict:
+        """写入进程内缓存条目并按需淘汰"""
+        cache_entry = self._build_entry(
+            school, major, courses, extracurricular, research_data, options_json, created_at, generation_params, model_name
+        )
+        # 覆盖已有条目时先移除旧条目和索引；超出条目数或字节预算时淘汰最近最少使用的条目（新条目保留）
+        self.cache.put(cache_key, cache_entry)
+        if self.approx_index is not None:
+            self.approx_index.add(
+                cache_key,
+                self._similarity_partition(school, major, generation_params),
+                research_features(courses, extracurricular)
+            )
+
+        return cache_entry
+
+    def _build_entry(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        research_data: List[dict],
+        options_json: str,
+        created_at: datetime,
+        generation_params: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> dict:
+        """构建缓存条目（格式同get_cached_entry）"""
+        options_bytes = len(options_json.encode('utf-8'))
+        size_bytes = options_bytes + self._estimate_size(school, major, courses, extracurricular)
 
-        # 缓存数据
-        self.cache[cache_key] = {
+        return {
             'school': school,
             'major': major,
             'courses': courses,
             'extracurricular': extracurricular,
-            'research_options': [opt.dict() for opt in research_options],
-            'created_at': datetime.now(),
-            'access_count': 0
+            'research_options': research_data,
+            'options_json': options_json,
+            'options_bytes': options_bytes,
+            'generation_params': generation_params,
+            'model_name': model_name,
+            'created_at': created_at,
+            'access_count': 0,
+            'size_bytes': size_bytes
         }
 
-        self.access_count[cache_key] = 0
+    @staticmethod
+    def _estimate_size(school: str, major: str, courses: str, extracurricular: str) -> int:
+        """估算缓存条目中输入文本占用的字节数（选项JSON的字节数单独记录为options_bytes）"""
+        return sum(len(text.encode('utf-8')) for text in (school, major, courses, extracurricular))
+
+    @staticmethod
+    def _similarity_partition(school: str, major: str, generation_params: Optional[Dict[str, Any]] = None) -> str:
+        """近似查找的分区：规范化后的学校和专业（以及生成参数，不同参数的结果互不复用）"""
+        partition = normalize_school(school) + '\x00' + normalize_text(major).casefold()
+        if generation_params:
+            partition += '\x00' + json.dumps(generation_params, sort_keys=True)
+        return partition
+
+    def find_similar_entry(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[dict, float]]:
+        """
+        近似查找：返回同一学校和专业下课程、课外经历最相似的缓存条目
 
-        # 清理过期缓存
-        self._cleanup_expired()
+        Args:
+            school: 目标学校
+            major: 申请专业
+            courses: 相关课程描述
+            extracurricular: 课外经历描述
+            generation_params: 影响生成结果的参数
 
-        return cache_key
+        Returns:
+            Tuple[cache_entry, similarity]，未启用近似查找或没有达到阈值的条目时返回None
+        """
+        if self.approx_index is None:
+            return None
+
+        # 查找耗时包括特征提取和MinHash签名计算
+        start = time.perf_counter()
+        result = self.approx_index.query(
+            self._similarity_partition(school, major, generation_params),
+            research_features(courses, extracurricular)
+        )
+        self.approx_lookups += 1
+
+        found = None
+        if result is not None:
+            cache_key, similarity = result
+            cache_entry = self.cache.get(cache_key)
+            if cache_entry is not None:
+                cache_entry['access_count'] += 1
+                self.approx_hits += 1
+                found = (cache_entry, similarity)
+
+        self.approx_lookup_seconds += time.perf_counter() - start
+        return found
+
+    async def get_or_generate_research(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generate: Callable[[], Awaitable[Tuple[List[ResearchOption], Optional[str]]]],
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[dict, str, Optional[float]]:
+        """
+        获取缓存条目，未命中时生成调研结果并缓存
+
+        精确未命中时先尝试近似查找（如已启用）。
+        相同缓存键的并发请求只触发一次generate调用，其余请求等待同一结果；
+        生成失败时异常传递给所有等待者。单个等待者被取消不会取消共享的生成任务。
+
+        Args:
+            school: 目标学校
+            major: 申请专业
+            courses: 相关课程描述
+            extracurricular: 课外经历描述
+            generate: 缓存未命中时调用的生成函数，返回(调研结果列表, 实际生成结果的模型)
+            generation_params: 影响生成结果的参数（参与缓存键和近似查找分区）
+
+        Returns:
+            Tuple[cache_entry, cache_status, similarity]
+            - cache_entry: 格式同get_cached_entry
+            - cache_status: "hit"、"approximate"或"miss"
+            - similarity: 近似命中时的Jaccard相似度，否则为None
+        """
+        cache_entry = await self.get_cached_entry(school, major, courses, extracurricular, generation_params)
+        if cache_entry is not None:
+            return cache_entry, "hit", None
+
+        similar = self.find_similar_entry(school, major, courses, extracurricular, generation_params)
+        if similar is not None:
+            return similar[0], "approximate", similar[1]
+
+        cache_key = self._generate_cache_key(school, major, courses, extracurricular, generation_params)
+        cache_entry = await self._inflight.run(
+            cache_key,
+            lambda: self._run_generation(cache_key, school, major, courses, extracurricular, generate, generation_params)
+        )
+        return cache_entry, "miss", None
+
+    async def _run_generation(
+        self,
+        cache_key: str,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        generate: Callable[[], Awaitable[Tuple[List[ResearchOption], Optional[str]]]],
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> dict:
+        """执行共享的生成任务并缓存结果（记录实际生成结果的模型；备用模型的结果不缓存）"""
+        research_options, model_name = await generate()
+        return await self._cache_entry(
+            cache_key, school, major, courses, extracurricular, research_options, generation_params, model_name
+        )
 
-    def _remove_from_cache(self, cache_key: str):
-        """从缓存中移除条目"""
-        if cache_key in self.cache:
-            del self.cache[cache_key]
-        if cache_key in self.access_count:
-            del self.access_count[cache_key]
-
-    def _evict_least_used(self):
-        """驱逐最少使用的缓存条目"""
-        if not self.access_count:
-            # 如果没有访问记录，移除第一个条目
-            if self.cache:
-                first_key = next(iter(self.cache))
-                self._remove_from_cache(first_key)
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息（可能在执行器线程中调用）"""
+        lookups = self.hits + self.misses
+        return {
+            'total_entries': len(self.cache),
+            'expired_entries': self.cache.count_expired(),
+            'max_entries': self.cache.max_entries,
+            'ttl_hours': self.ttl.total_seconds() / 3600,
+            'total_size_bytes': self.cache.total_bytes,
+            'max_bytes': self.cache.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.cache.evictions,
+            'store_hits': self.store_hits,
+            'normalized_hits': self.normalized_hits,
+            'approximate': self._get_approx_stats(),
+            'store': self._get_store_stats(),
+            'uncached_fallbacks': self.uncached_fallbacks,
+            'inflight_generations': len(self._inflight),
+            'coalesced_requests': self._inflight.coalesced
+        }
+
+    def _get_approx_stats(self) -> Optional[Dict[str, Any]]:
+        """获取近似查找统计信息"""
+        if self.approx_index is None:
+            return None
+        return {
+            'threshold': self.approx_index.threshold,
+            'indexed_entries': len(self.approx_index),
+            'lookups': self.approx_lookups,
+            'hits': self.approx_hits,
+            'avg_lookup_ms': round(self.approx_lookup_seconds / self.approx_lookups * 1000, 3) if self.approx_lookups else 0.0
+        }
+
+    def _get_store_stats(self) -> Optional[Dict[str, Any]]:
+        """获取共享存储统计信息"""
+        if self.store is None:
+            return None
+        try:
+            return self.store.get_stats()
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def clear_cache(self):
+        """清空所有缓存（包括共享存储，在线程中执行）"""
+        self.cache.clear()
+        if self.approx_index is not None:
+            self.approx_index.clear()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.clear)
+
+class PersonalStatementCache:
+    """
+    个人陈述结果缓存服务
+
+    缓存键由规范化后的用户背景、选择的细分领域和生成参数组成；
+    与ResearchCache相同，条目保存在TTLLRUCache中，并发请求由single-flight合并。
+    """
+
+    def __init__(self, ttl_hours: int = 24, max_entries: int = 500, max_bytes: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            ttl_hours: 缓存存活时间（小时）
+            max_entries: 最大缓存条目数
+            max_bytes: 缓存内容的最大字节数，None表示不限制
+        """
+        self.ttl = timedelta(hours=ttl_hours)
+        self.cache = TTLLRUCache(self.ttl, max_entries, max_bytes)
+        self._inflight = SingleFlight()
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        # 由备用模型生成、没有写入缓存的个人陈述数
+        self.uncached_fallbacks = 0
+
+    def generate_cache_key(
+        self,
+        school: str,
+        major: str,
+        courses: str,
+        extracurricular: str,
+        selected_domain: str,
+        generation_params: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            school: 目标学校
+            major: 申请专业
+            courses: 相关课程描述
+            extracurricular: 课外经历描述
+            selected_domain: 选择的细分领域
+            generation_params: 影响生成结果的参数（模型名称、温度、最大输出token数）
+
+        Returns:
+            缓存键字符串
+        """
+        school, major, courses, extracurricular = normalize_research_inputs(school, major, courses, extracurricular)
+        input_data = {
+            'school': school,
+            'major': major,
+            'courses': courses,
+            'extracurricular': extracurricular,
+            'selected_domain': normalize_text(selected_domain),
+            'generation_params': generation_params or {}
+        }
+        input_str = json.dumps(input_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(input_str.encode('utf-8')).hexdigest()[:32]
+
+    def get_cached_statement(self, cache_key: str) -> Optional[dict]:
+        """
+        获取缓存的个人陈述
+
+        Args:
+            cache_key: generate_cache_key生成的缓存键
+
+        Returns:
+            个人陈述dict（PersonalStatement字段），未找到或过期时返回None
+        """
+        cache_entry = self.cache.get(cache_key)
+        if cache_entry is not None:
+            self.hits += 1
+            return cache_entry['statement']
+
+        self.misses += 1
+        return None
+
+    def cache_statement(self, cache_key: str, statement: dict, primary_model: Optional[str] = None):
+        """
+        缓存个人陈述
+
+        Args:
+            cache_key: generate_cache_key生成的缓存键
+            statement: 个人陈述dict（PersonalStatement字段）
+            primary_model: 缓存键对应的主模型；statement的model_name与其不同（由备用模型生成）时不写入缓存
+        """
+        if is_fallback_result(primary_model, statement.get('model_name')):
+            self.uncached_fallbacks += 1
+            sys.stderr.write(f"[DEBUG] 个人陈述由备用模型{statement.get('model_name')}生成，不写入缓存\n")
             return
 
-        # 找到访问次数最少的条目
-        min_access_key = min(self.access_count.items(), key=lambda x: x[1])[0]
-        self._remove_from_cache(min_access_key)
+        self.cache.cleanup_expired()
+        self.cache.put(cache_key, {
+            'statement': statement,
+            'created_at': datetime.now(),
+            'size_bytes': len(json.dumps(statement, ensure_ascii=False).encode('utf-8'))
+        })
+
+    async def get_or_generate_statement(
+        self,
+        cache_key: str,
+        generate: Callable[[], Awaitable[dict]],
+        primary_model: Optional[str] = None
+    ) -> Tuple[dict, bool]:
+        """
+        获取缓存的个人陈述，未命中时生成并缓存
 
-    def _cleanup_expired(self):
-        """清理过期缓存"""
-        current_time = datetime.now()
-        expired_keys = []
+        相同缓存键的并发请求只触发一次generate调用。
 
-        for key, entry in self.cache.items():
-            if current_time - entry['created_at'] >= self.ttl:
-                expired_keys.append(key)
+        Args:
+            cache_key: generate_cache_key生成的缓存键
+            generate: 缓存未命中时调用的生成函数，返回个人陈述dict
+            primary_model: 缓存键对应的主模型（备用模型生成的结果不缓存）
 
-        for key in expired_keys:
-            self._remove_from_cache(key)
+        Returns:
+            Tuple[statement, cache_hit]
+        """
+        statement = self.get_cached_statement(cache_key)
+        if statement is not None:
+            return statement, True
+
+        statement = await self._inflight.run(
+            cache_key, lambda: self._run_generation(cache_key, generate, primary_model)
+        )
+        return statement, False
+
+    def get_inflight(self, cache_key: str) -> Optional[asyncio.Task]:
+        """获取缓存键对应的进行中生成任务"""
+        return self._inflight.get(cache_key)
+
+    def start_generation(
+        self,
+        cache_key: str,
+        generate: Callable[[], Awaitable[dict]],
+        primary_model: Optional[str] = None
+    ) -> asyncio.Task:
+        """
+        在后台启动生成任务（用于预取），结果写入缓存（备用模型生成的结果除外）
+
+        之后相同缓存键的get_or_generate_statement调用会加入该任务。
+        """
+        return self._inflight.start(cache_key, lambda: self._run_generation(cache_key, generate, primary_model))
+
+    def cancel_generation(self, cache_key: str) -> bool:
+        """取消没有请求在等待的后台生成任务"""
+        return self._inflight.cancel(cache_key)
+
+    async def _run_generation(
+        self,
+        cache_key: str,
+        generate: Callable[[], Awaitable[dict]],
+        primary_model: Optional[str] = None
+    ) -> dict:
+        """执行共享的生成任务并缓存结果"""
+        statement = await generate()
+        self.cache_statement(cache_key, statement, primary_model)
+        return statement
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        current_time = datetime.now()
-        expired_count = 0
-        total_size = 0
-
-        for entry in self.cache.values():
-            if current_time - entry['created_at'] >= self.ttl:
-                expired_count += 1
-            total_size += len(json.dumps(entry))
-
+        lookups = self.hits + self.misses
         return {
             'total_entries': len(self.cache),
-            'expired_entries': expired_count,
-            'max_entries': self.max_entries,
+            'max_entries': self.cache.max_entries,
             'ttl_hours': self.ttl.total_seconds() / 3600,
-            'total_size_bytes': total_size,
-            'access_counts': len(self.access_count)
+            'total_size_bytes': self.cache.total_bytes,
+            'max_bytes': self.cache.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.cache.evictions,
+            'uncached_fallbacks': self.uncached_fallbacks,
+            'inflight_generations': len(self._inflight),
+            'coalesced_requests': self._inflight.coalesced
         }
 
     def clear_cache(self):
         """清空所有缓存"""
         self.cache.clear()
-        self.access_count.clear()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.services.retry import ERROR_CIRCUIT_OPEN, ERROR_THROTTLED, ERROR_TIMEOUT, ERROR_TRANSIENT
+from app.services.routing import GenerationParams
+
+T = TypeVar('T')
+
+# 切换到备用模型的原因
+FALLBACK_BUDGET = 'budget'  # 主模型超过时间预算仍未返回
+FALLBACK_ERROR = 'error'    # 主模型返回过载类错误
+
+# 主模型返回这些错误时改用备用模型：配额/429、5xx过载、超过截止时间、熔断器打开。
+# 密钥无效和请求本身有误换模型也不会成功，直接抛出
+FALLBACK_ERRORS = (ERROR_THROTTLED, ERROR_TRANSIENT, ERROR_TIMEOUT, ERROR_CIRCUIT_OPEN)
+
+class GenerationResult:
+    """一次生成的结果：文本和实际生成它的模型（流式调用时text为空，模型在建立流后填入）"""
+
+    __slots__ = ('text', 'model_name', 'fallback_reason')
+
+    def __init__(self, text: str = "", model_name: Optional[str] = None, fallback_reason: Optional[str] = None):
+        self.text = text
+        self.model_name = model_name
+        self.fallback_reason = fallback_reason
+
+    @property
+    def fallback(self) -> bool:
+        """是否由备用模型生成"""
+        return self.fallback_reason is not None
+
+    def __repr__(self) -> str:
+        return (
+            f"GenerationResult(model_name={self.model_name!r}, fallback_reason={self.fallback_reason!r}, "
+            f"text_length={len(self.text)})"
+        )
+
+class ModelCascade:
+    """
+    模型级联
+
+    主模型超过操作的时间预算仍未返回，或返回过载类错误时，用同样的提示词和生成参数
+    调用更快的备用模型。超过预算时主模型的请求不取消，两者取先成功的结果
+    （主模型随后完成时仍使用主模型的结果），另一个请求被取消。
+    宁可15秒内给出稍差的结果，也不让用户等90秒或直接得到500。
+    """
+
+    def __init__(
+        self,
+        fallback_models: Optional[Dict[str, str]] = None,
+        budgets: Optional[Dict[str, float]] = None,
+        default_budget: Optional[float] = None
+    ):
+        """
+        Args:
+            fallback_models: 主模型 -> 备用模型，没有备用模型的调用不做级联
+            budgets: 操作 -> 时间预算（秒）；流式调用的预算是等待第一个片段的时间
+            default_budget: 没有单独配置预算的操作的时间预算，None表示只在出错时切换
+        """
+        self.fallback_models = dict(fallback_models or {})
+        self.budgets = dict(budgets or {})
+        self.default_budget = default_budget
+
+        # 统计计数（按操作）
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def fallback_for(self, model_name: str) -> Optional[str]:
+        """模型对应的备用模型，没有时返回None"""
+        fallback = self.fallback_models.get(model_name)
+        return fallback if fallback != model_name else None
+
+    def budget_for(self, operation: str) -> Optional[float]:
+        """操作的时间预算（秒），None表示不限制"""
+        return self.budgets.get(operation, self.default_budget)
+
+    @staticmethod
+    def should_fallback(error: BaseException) -> bool:
+        """主模型的错误是否应改用备用模型"""
+        return getattr(error, 'kind', None) in FALLBACK_ERRORS
+
+    def _record(self, operation: str, outcome: str):
+        counters = self._counters.setdefault(operation, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    async def run(
+        self,
+        call: Callable[[GenerationParams], Awaitable[T]],
+        operation: str,
+        params: GenerationParams,
+        discard: Optional[Callable[[T], Awaitable[Any]]] = None
+    ) -> Tuple[T, str, Optional[str]]:
+        """
+        按级联策略执行一次调用
+
+        Args:
+            call: 按生成参数发出请求的协程函数（主模型和备用模型都调用它）
+            operation: 操作类型（决定时间预算）
+            params: 主模型的生成参数
+            discard: 被丢弃的成功结果的清理函数（例如关闭已建立的流）
+
+        Returns:
+            Tuple[result, model_name, fallback_reason]
+            - result: 先成功完成的请求结果
+            - model_name: 生成结果的模型
+            - fallback_reason: 由备用模型生成时为切换原因（budget/error），否则为None
+
+        Raises:
+            主模型的错误不需要切换时直接抛出；两个模型都失败时抛出主模型的异常
+        """
+        fallback_model = self.fallback_for(params.model_name)
+        if fallback_model is None:
+            return await call(params), params.model_name, None
+
+        self._record(operation, 'calls')
+        budget = self.budget_for(operation)
+        primary = asyncio.ensure_future(call(params))
+        fallback: Optional[asyncio.Future] = None
+        winner: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=budget)
+            if done:
+                error = primary.exception()
+                if error is None:
+                    self._record(operation, 'primary')
+                    winner = primary
+                    return primary.result(), params.model_name, None
+                if not self.should_fallback(error):
+                    self._record(operation, 'failed')
+                    raise error
+                reason = FALLBACK_ERROR
+                sys.stderr.write(f"[DEBUG] {operation}调用{params.model_name}失败，改用{fallback_model}: {str(error)}\n")
+            else:
+                reason = FALLBACK_BUDGET
+                sys.stderr.write(f"[DEBUG] {operation}调用{params.model_name}超过{budget}秒未完成，同时调用{fallback_model}\n")
+
+            fallback_params = GenerationParams(fallback_model, params.temperature, params.max_output_tokens)
+            fallback = asyncio.ensure_future(call(fallback_params))
+
+            pending = {fallback} if primary.done() else {primary, fallback}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 同时完成时优先使用主模型的结果
+                if primary in done and primary.exception() is None:
+                    self._record(operation, 'primary_late')
+                    winner = primary
+                    return primary.result(), params.model_name, None
+                if fallback in done and fallback.exception() is None:
+                    self._record(operation, f'fallback_{reason}')
+                    winner = fallback
+                    return fallback.result(), fallback_model, reason
+
+            # 两个模型都失败
+            self._record(operation, 'failed')
+            raise primary.exception()
+        finally:
+            for task in (primary, fallback):
+                if task is None or task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif discard is not None and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取级联配置和各操作的结果统计（主模型按时完成、主模型在切换后完成、各原因的切换次数、失败）"""
+        operations = {}
+        for operation, counters in self._counters.items():
+            calls = counters.get('calls', 0)
+            fallbacks = counters.get(f'fallback_{FALLBACK_BUDGET}', 0) + counters.get(f'fallback_{FALLBACK_ERROR}', 0)
+            operations[operation] = dict(
+                counters,
+                fallback_rate=round(fallbacks / calls, 4) if calls else 0.0
+            )
+        return {
+            'fallback_models': dict(self.fallback_models),
+            'budgets_seconds': dict(self.budgets),
+            'default_budget_seconds': self.default_budget,
+            'operations': operations
+        }
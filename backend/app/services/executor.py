@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+class CPUExecutor:
+    def __init__(
+        self,
+        max_threads: int = 4,
+        max_processes: int = 0,
+        process_threshold_chars: int = 256 * 1024,
+        initializer: Optional[Callable[[], Any]] = None
+    ):
+        """
+        初始化CPU密集任务执行器
+
+        解析、评分和统计都是同步的纯Python计算，直接在async处理函数中运行会阻塞事件循环，
+        同一worker上的其他请求（包括流式输出）都要等它完成。执行器把这些计算移出事件循环：
+
+        - 默认在线程池中运行。计算仍然持有GIL，但解释器每隔切换间隔（默认5ms）让出GIL，
+          事件循环的延迟从整个计算的耗时降到切换间隔量级；
+        - 启用进程池时，输入超过process_threshold_chars的任务在进程池中运行，完全不占用本进程的GIL。
+          函数、参数和返回值需要可以pickle，子进程通过spawn启动（避免在有线程的进程中fork），
+          并在启动时调用initializer（例如应用评分关键词表配置）；
+        - 线程池大小为0时直接在事件循环中运行（与不使用执行器相同）。
+
+        Args:
+            max_threads: 线程池大小，0表示不使用线程池
+            max_processes: 进程池大小，0表示不使用进程池
+            process_threshold_chars: 使用进程池的最小输入长度（字符数）
+            initializer: 进程池子进程启动时调用的函数（需要可以pickle）
+        """
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.process_threshold_chars = process_threshold_chars
+        self.initializer = initializer
+
+        self._threads: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="cpu-executor") if max_threads > 0 else None
+        )
+        self._processes: Optional[ProcessPoolExecutor] = None  # 首次使用时创建
+
+        # 统计计数
+        self.inline_tasks = 0
+        self.thread_tasks = 0
+        self.process_tasks = 0
+        self.busy_seconds = 0.0
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """获取进程池（首次使用时创建）"""
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.max_processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer
+            )
+        return self._processes
+
+    def _choose(self, size: int) -> Optional[Executor]:
+        """按输入大小选择执行位置，None表示在事件循环中直接运行"""
+        if self.max_processes > 0 and size >= self.process_threshold_chars:
+            self.process_tasks += 1
+            return self._process_pool()
+        if self._threads is not None:
+            self.thread_tasks += 1
+            return self._threads
+        self.inline_tasks += 1
+        return None
+
+    async def run(self, func: Callable[..., T], *args: Any, size: int = 0) -> T:
+        """
+        在执行器中运行同步函数并等待结果（异常原样抛出）
+
+        Args:
+            func: 同步函数
+            *args: 位置参数
+            size: 输入大小（字符数），用于选择线程池或进程池
+
+        Returns:
+            函数返回值
+        """
+        executor = self._choose(size)
+        start = time.perf_counter()
+        try:
+            if executor is None:
+                return func(*args)
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    def shutdown(self):
+        """关闭线程池和进程池（在应用lifespan结束时调用）"""
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            try:
+                self._processes.shutdown(wait=True, cancel_futures=True)
+            except Exception as e:
+                sys.stderr.write(f"[DEBUG] 关闭进程池失败: {type(e).__name__}: {str(e)}\n")
+            self._processes = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器统计信息"""
+        total = self.inline_tasks + self.thread_tasks + self.process_tasks
+        return {
+            'max_threads': self.max_threads,
+            'max_processes': self.max_processes,
+            'process_threshold_chars': self.process_threshold_chars,
+            'inline_tasks': self.inline_tasks,
+            'thread_tasks': self.thread_tasks,
+            'process_tasks': self.process_tasks,
+            'avg_task_ms': round(self.busy_seconds / total * 1000, 3) if total else 0.0
+        }
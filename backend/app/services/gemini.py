@@ -1,82 +1,445 @@
 import google.genai as genai
-import asyncio
+from google.genai import types
+import httpx
 import sys
-from typing import Optional
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.services.cascade import GenerationResult, ModelCascade
+from app.services.hedging import RequestHedger
+from app.services.ratelimit import GeminiRateLimiter
+from app.services.routing import (
+    OPERATION_PERSONAL_STATEMENT,
+    OPERATION_RESEARCH,
+    GenerationParams,
+    ModelRouter
+)
+from app.services.retry import (
+    ERROR_AUTH,
+    ERROR_CIRCUIT_OPEN,
+    ERROR_INVALID,
+    ERROR_THROTTLED,
+    ERROR_TIMEOUT,
+    ERROR_TRANSIENT,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryError,
+    RetryPolicy
+)
+
+try:
+    import h2  # noqa: F401  # httpx的HTTP/2支持依赖h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class GeminiCallError(Exception):
+    """Gemini调用失败，kind为错误分类（见app.services.retry，熔断器打开时为circuit_open）"""
+
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
 
 class GeminiService:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 10.0,
+        http2: bool = True,
+        rate_limiter: Optional[GeminiRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional[RequestHedger] = None,
+        model_router: Optional[ModelRouter] = None,
+        cascade: Optional[ModelCascade] = None
+    ):
         """
         初始化Gemini服务
 
+        服务实例应在进程内长期复用（由FastAPI lifespan创建），
+        底层的httpx连接池在多次请求之间保持keep-alive连接。
+        所有调用都经过rate_limiter：超过并发上限或速率限制的请求排队等待，
+        收到配额/429错误时降低并发上限后重试，而不是直接返回错误。
+        失败的调用先分类再决定是否重试（retry_policy），同一模型连续的瞬时错误会打开该模型的熔断器，
+        之后调用该模型的请求直接失败，直到半开状态的探测请求成功。
+        启用hedger时，非流式调用超过同类调用的耗时分位数仍未完成会发出对冲请求（受预算限制）。
+        每次调用的模型、温度和最大输出token数由model_router按操作类型和请求参数确定。
+        配置cascade时，主模型超过操作的时间预算或返回过载错误会改用备用模型，结果标明实际生成的模型。
+
         Args:
             api_key: Gemini API密钥
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 最大保持空闲的keep-alive连接数
+            keepalive_expiry: 空闲连接的保持时间（秒）
+            connect_timeout: 建立连接的超时时间（秒）
+            http2: 是否启用HTTP/2（需要安装h2）
+            rate_limiter: Gemini调用限流器，None时使用默认的自适应并发限制（不限制速率）
+            retry_policy: 重试策略，None时使用默认的指数退避（不限制截止时间）
+            circuit_breaker: 默认模型的熔断器（其他模型使用相同配置的独立熔断器），None表示不使用熔断
+            hedger: 对冲请求，None表示不对冲
+            model_router: 模型路由，None时所有操作都使用gemini-2.5-pro
+            cascade: 模型级联，None表示不切换备用模型
         """
         self.api_key = api_key
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.rate_limiter = rate_limiter or GeminiRateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.hedger = hedger
+        self.model_router = model_router or ModelRouter()
+        self.cascade = cascade
+
+        # 共享的异步HTTP连接池
+        self.http_client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(None, connect=connect_timeout)
+        )
 
         # 配置Gemini
-        sys.stderr.write(f"[DEBUG] 配置genai，api_key长度: {len(api_key)}\n")
-        self.client = genai.Client(api_key=api_key)
+        sys.stderr.write(f"[DEBUG] 配置genai，api_key长度: {len(api_key)}, HTTP/2: {self.http2}\n")
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(httpx_async_client=self.http_client)
+        )
         sys.stderr.write("[DEBUG] genai.Client创建完成\n")
 
-        # 使用指定的模型
-        self.model_name = 'gemini-2.5-pro'  # 强制使用2.5-pro模型，需要API权限
-        sys.stderr.write(f"[DEBUG] GeminiService初始化，模型名称: {self.model_name}\n")
+        # 默认模型（路由表中没有的操作和连接测试使用）
+        self.model_name = self.model_router.default_model
+        sys.stderr.write(f"[DEBUG] GeminiService初始化，默认模型: {self.model_name}，路由: {self.model_router.routes}\n")
+
+        # 每个模型一个熔断器：主模型过载时熔断不影响备用模型
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        if circuit_breaker is not None:
+            self._breakers[self.model_name] = circuit_breaker
+
+    def resolve_params(
+        self,
+        operation: str,
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> GenerationParams:
+        """
+        按路由表和请求参数确定生成参数
+
+        Raises:
+            ValueError: 模型不在允许列表中，或参数超出范围
+        """
+        return self.model_router.resolve(operation, model_name, temperature, max_output_tokens)
+
+    def _breaker(self, model_name: str) -> Optional[CircuitBreaker]:
+        """模型对应的熔断器（按默认模型熔断器的配置创建），未启用熔断时返回None"""
+        if self.circuit_breaker is None:
+            return None
+        breaker = self._breakers.get(model_name)
+        if breaker is None:
+            breaker = self._breakers[model_name] = CircuitBreaker(
+                failure_threshold=self.circuit_breaker.failure_threshold,
+                recovery_seconds=self.circuit_breaker.recovery_seconds,
+                half_open_max_calls=self.circuit_breaker.half_open_max_calls
+            )
+        return breaker
+
+    async def _generate_once(self, prompt: str, params: GenerationParams) -> str:
+        """在限流名额内调用一次generate_content"""
+        async with self.rate_limiter.slot():
+            response = await self.client.aio.models.generate_content(
+                model=params.model_name, contents=prompt, config=params.to_config()
+            )
+        self.rate_limiter.on_success()
+        if not response.text:
+            raise self._empty_response_error(response, params)
+        return response.text
+
+    @staticmethod
+    def _empty_response_error(response: Any, params: GenerationParams) -> GeminiCallError:
+        """
+        响应没有文本时按结束原因分类的错误
+
+        输出达到max_output_tokens上限（思考用完了额度）或内容被拦截时重试也不会成功，分类为invalid；
+        其他原因的空响应按可重试处理。
+        """
+        candidates = getattr(response, 'candidates', None) or []
+        finish_reason = getattr(candidates[0], 'finish_reason', None) if candidates else None
+        feedback = getattr(response, 'prompt_feedback', None)
+        block_reason = getattr(feedback, 'block_reason', None) if feedback is not None else None
 
-        # 重试配置
-        self.max_retries = 3
-        self.retry_delay = 1  # 秒
+        if finish_reason == types.FinishReason.MAX_TOKENS:
+            limit = params.max_output_tokens if params.max_output_tokens is not None else "模型默认值"
+            return GeminiCallError(
+                f"{params.model_name}的输出达到max_output_tokens上限（{limit}），"
+                f"没有返回文本（思考token计入上限），请增大max_output_tokens",
+                ERROR_INVALID
+            )
+        if block_reason is not None:
+            return GeminiCallError(f"{params.model_name}拒绝了提示词（原因: {block_reason}）", ERROR_INVALID)
+        if finish_reason is not None and finish_reason != types.FinishReason.STOP:
+            return GeminiCallError(f"{params.model_name}没有返回文本（结束原因: {finish_reason}）", ERROR_INVALID)
+        return GeminiCallError(f"{params.model_name}返回了空响应", ERROR_TRANSIENT)
 
-    async def generate_content_with_retry(self, prompt: str, max_retries: Optional[int] = None) -> str:
+    async def generate_content_with_retry(
+        self,
+        prompt: str,
+        max_retries: Optional[int] = None,
+        operation: str = "default",
+        params: Optional[GenerationParams] = None
+    ) -> str:
         """
         生成内容，带有重试机制
 
         Args:
             prompt: 提示词
-            max_retries: 最大重试次数，默认使用类配置
+            max_retries: 最大重试次数，默认使用重试策略配置
+            operation: 调用的操作类型（如research、personal_statement），用于模型路由，对冲按操作分别统计耗时
+            params: 生成参数，None时按路由表使用操作对应的模型
 
         Returns:
             生成的文本内容
 
         Raises:
-            Exception: 所有重试都失败后抛出异常
+            Exception: 不可重试的错误、所有重试都失败或熔断器打开时抛出异常
         """
-        max_retries = max_retries or self.max_retries
-        sys.stderr.write(f"[DEBUG] generate_content_with_retry调用，模型: {self.model_name}, 尝试次数: {max_retries}\n")
-
-        for attempt in range(max_retries + 1):
-            try:
-                sys.stderr.write(f"[DEBUG] 尝试 {attempt+1}/{max_retries+1}: 调用generate_content_async\n")
-                # 使用异步生成内容
-                response = await self.client.aio.models.generate_content(model=self.model_name, contents=prompt)
-                sys.stderr.write(f"[DEBUG] 生成成功，响应长度: {len(response.text)}\n")
-                return response.text
-            except Exception as e:
-                sys.stderr.write(f"[DEBUG] 尝试 {attempt+1} 失败: {type(e).__name__}: {str(e)}\n")
-                if attempt == max_retries:
-                    raise Exception(f"Gemini API调用失败，重试{max_retries}次后仍失败: {str(e)}")
-
-                # 等待后重试
-                await asyncio.sleep(self.retry_delay * (attempt + 1))
-
-                # 如果是认证错误，直接抛出，不需要重试
-                if "API_KEY_INVALID" in str(e) or "PERMISSION_DENIED" in str(e):
-                    raise Exception(f"Gemini API密钥无效: {str(e)}")
-                elif "quota" in str(e).lower() or "rate limit" in str(e).lower():
-                    raise Exception(f"Gemini API配额或速率限制: {str(e)}")
-
-    async def generate_enhanced_research(self, prompt: str) -> str:
+        params = params or self.model_router.resolve(operation)
+        sys.stderr.write(f"[DEBUG] generate_content_with_retry调用，操作: {operation}，参数: {params}\n")
+
+        async def attempt() -> str:
+            if self.hedger is None:
+                return await self._generate_once(prompt, params)
+            return await self.hedger.run(
+                partial(self._generate_once, prompt, params),
+                key=f"{operation}/{params.model_name}",
+                can_hedge=self.rate_limiter.has_capacity,
+                on_discarded_error=self.rate_limiter.on_error
+            )
+
+        try:
+            text = await self.retry_policy.run(
+                attempt,
+                max_retries=max_retries,
+                breaker=self._breaker(params.model_name),
+                on_error=self.rate_limiter.on_error
+            )
+        except (RetryError, CircuitOpenError) as e:
+            raise self._retry_failure(e)
+        sys.stderr.write(f"[DEBUG] 生成成功，响应长度: {len(text)}\n")
+        return text
+
+    async def _open_stream(self, prompt: str, params: GenerationParams) -> AsyncIterator[Any]:
+        """获取限流名额并建立流（成功后名额由调用方释放）"""
+        await self.rate_limiter.acquire()
+        try:
+            return await self.client.aio.models.generate_content_stream(
+                model=params.model_name, contents=prompt, config=params.to_config()
+            )
+        except BaseException:
+            # 建立失败或等待建立时被取消
+            self.rate_limiter.release()
+            raise
+
+    async def generate_content_stream(
+        self,
+        prompt: str,
+        operation: str = "default",
+        params: Optional[GenerationParams] = None
+    ) -> AsyncIterator[str]:
+        """
+        流式生成内容，逐块返回文本
+
+        只在建立流之前重试（截止时间也只限制建立流的过程）；一旦开始接收数据，错误直接抛出，
+        避免向调用方重复输出已发送的内容。流式输出期间一直占用一个限流名额。
+
+        Args:
+            prompt: 提示词
+            operation: 调用的操作类型，用于模型路由
+            params: 生成参数，None时按路由表使用操作对应的模型
+
+        Yields:
+            生成的文本片段
+        """
+        params = params or self.model_router.resolve(operation)
+        sys.stderr.write(f"[DEBUG] generate_content_stream调用，操作: {operation}，参数: {params}\n")
+
+        try:
+            stream = await self.retry_policy.run(
+                partial(self._open_stream, prompt, params),
+                breaker=self._breaker(params.model_name),
+                on_error=self.rate_limiter.on_error,
+                label="Gemini流式调用"
+            )
+        except (RetryError, CircuitOpenError) as e:
+            raise self._retry_failure(e)
+
+        try:
+            self.rate_limiter.on_success()
+            emitted = False
+            last = None
+            async for chunk in stream:
+                last = chunk
+                if chunk.text:
+                    emitted = True
+                    yield chunk.text
+            # 整个流没有文本（例如思考用完了输出额度）
+            if not emitted:
+                raise self._empty_response_error(last, params)
+        finally:
+            self.rate_limiter.release()
+
+    def _retry_failure(self, error: Exception) -> GeminiCallError:
+        """把重试策略的异常转换为带有原因说明和错误分类的错误"""
+        if isinstance(error, CircuitOpenError):
+            return GeminiCallError(str(error), ERROR_CIRCUIT_OPEN)
+        last = str(error.last_error)
+        if error.kind == ERROR_AUTH:
+            message = f"Gemini API密钥无效: {last}"
+        elif error.kind == ERROR_INVALID:
+            message = f"Gemini API请求无效: {last}"
+        elif error.kind == ERROR_TIMEOUT:
+            message = f"Gemini API调用超时（截止时间{self.retry_policy.deadline_seconds}秒）: {last or type(error.last_error).__name__}"
+        elif error.kind == ERROR_THROTTLED:
+            message = f"Gemini API配额或速率限制: {last}"
+        else:
+            message = f"Gemini API调用失败，重试{error.attempts - 1}次后仍失败: {last}"
+        return GeminiCallError(message, error.kind)
+
+    async def generate_with_fallback(
+        self,
+        prompt: str,
+        operation: str = "default",
+        params: Optional[GenerationParams] = None
+    ) -> GenerationResult:
+        """
+        生成内容，主模型超过时间预算或过载时改用备用模型
+
+        Args:
+            prompt: 提示词
+            operation: 调用的操作类型，决定模型路由和时间预算
+            params: 生成参数，None时按路由表使用操作对应的模型
+
+        Returns:
+            生成结果（文本和实际生成它的模型）
+        """
+        params = params or self.model_router.resolve(operation)
+        if self.cascade is None:
+            text = await self.generate_content_with_retry(prompt, operation=operation, params=params)
+            return GenerationResult(text, params.model_name)
+
+        text, model_name, reason = await self.cascade.run(
+            lambda p: self.generate_content_with_retry(prompt, operation=operation, params=p),
+            operation,
+            params
+        )
+        return GenerationResult(text, model_name, reason)
+
+    async def _open_stream_with_first_chunk(
+        self,
+        prompt: str,
+        operation: str,
+        params: GenerationParams
+    ) -> Tuple[str, AsyncIterator[str]]:
+        """建立流并等待第一个文本片段（空流时为空字符串）"""
+        chunks = self.generate_content_stream(prompt, operation=operation, params=params)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except BaseException:
+            await chunks.aclose()
+            raise
+        return first, chunks
+
+    async def stream_with_fallback(
+        self,
+        prompt: str,
+        operation: str = "default",
+        params: Optional[GenerationParams] = None,
+        result: Optional[GenerationResult] = None
+    ) -> AsyncIterator[str]:
+        """
+        流式生成内容，主模型超过时间预算仍未输出第一个片段或建立流时过载，改用备用模型
+
+        只在输出第一个片段之前切换模型，不会向调用方混合输出两个模型的内容。
+
+        Args:
+            prompt: 提示词
+            operation: 调用的操作类型，决定模型路由和时间预算
+            params: 生成参数，None时按路由表使用操作对应的模型
+            result: 建立流后填入实际生成的模型和切换原因
+
+        Yields:
+            生成的文本片段
+        """
+        params = params or self.model_router.resolve(operation)
+        if self.cascade is None:
+            if result is not None:
+                result.model_name = params.model_name
+            async for text in self.generate_content_stream(prompt, operation=operation, params=params):
+                yield text
+            return
+
+        (first, chunks), model_name, reason = await self.cascade.run(
+            partial(self._open_stream_with_first_chunk, prompt, operation),
+            operation,
+            params,
+            discard=lambda opened: opened[1].aclose()
+        )
+        if result is not None:
+            result.model_name = model_name
+            result.fallback_reason = reason
+        try:
+            if first:
+                yield first
+            async for text in chunks:
+                yield text
+        finally:
+            await chunks.aclose()
+
+    async def generate_enhanced_research(self, prompt: str, params: Optional[GenerationParams] = None) -> GenerationResult:
         """生成增强版调研结果"""
         try:
-            sys.stderr.write(f"[DEBUG] generate_enhanced_research调用，使用模型: {self.model_name}\n")
-            return await self.generate_content_with_retry(prompt)
+            return await self.generate_with_fallback(prompt, operation=OPERATION_RESEARCH, params=params)
         except Exception as e:
             sys.stderr.write(f"[DEBUG] generate_enhanced_research失败: {str(e)}\n")
             raise Exception(f"调研生成失败: {str(e)}")
 
-    async def generate_personal_statement(self, prompt: str) -> str:
+    async def stream_enhanced_research(
+        self,
+        prompt: str,
+        params: Optional[GenerationParams] = None,
+        result: Optional[GenerationResult] = None
+    ) -> AsyncIterator[str]:
+        """流式生成增强版调研结果（result中填入实际生成的模型）"""
+        try:
+            async for text in self.stream_with_fallback(prompt, operation=OPERATION_RESEARCH, params=params, result=result):
+                yield text
+        except Exception as e:
+            sys.stderr.write(f"[DEBUG] stream_enhanced_research失败: {str(e)}\n")
+            raise Exception(f"调研生成失败: {str(e)}")
+
+    async def generate_personal_statement(self, prompt: str, params: Optional[GenerationParams] = None) -> GenerationResult:
         """生成个人陈述"""
         try:
-            return await self.generate_content_with_retry(prompt)
+            return await self.generate_with_fallback(prompt, operation=OPERATION_PERSONAL_STATEMENT, params=params)
+        except Exception as e:
+            raise Exception(f"个人陈述生成失败: {str(e)}")
+
+    async def stream_personal_statement(
+        self,
+        prompt: str,
+        params: Optional[GenerationParams] = None,
+        result: Optional[GenerationResult] = None
+    ) -> AsyncIterator[str]:
+        """流式生成个人陈述（result中填入实际生成的模型）"""
+        try:
+            async for text in self.stream_with_fallback(prompt, operation=OPERATION_PERSONAL_STATEMENT, params=params, result=result):
+                yield text
         except Exception as e:
             raise Exception(f"个人陈述生成失败: {str(e)}")
 
@@ -89,3 +452,22 @@ class GeminiService:
         except:
             return False
 
+    def get_stats(self) -> Dict[str, Any]:
+        """获取Gemini调用统计信息（限流、排队等待时间、当前并发、重试、各模型的熔断、对冲和模型级联）"""
+        return {
+            'model_name': self.model_name,
+            'model_routing': self.model_router.get_stats(),
+            'http2': self.http2,
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'retry': self.retry_policy.get_stats(),
+            'circuit_breakers': {model: breaker.get_stats() for model, breaker in self._breakers.items()},
+            'hedging': self.hedger.get_stats() if self.hedger is not None else None,
+            'cascade': self.cascade.get_stats() if self.cascade is not None else None
+        }
+
+    async def aclose(self):
+        """关闭客户端并释放连接池"""
+        self.client.close()
+        await self.http_client.aclose()
+        self.rate_limiter.close()
+        sys.stderr.write("[DEBUG] GeminiService连接池已关闭\n")
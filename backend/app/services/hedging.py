@@ -0,0 +1,205 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+class LatencyTracker:
+    """最近window次成功调用的耗时（滑动窗口），用于在线估计延迟分位数"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: 保留的最近样本数
+            min_samples: 估计分位数所需的最少样本数
+        """
+        self.min_samples = max(1, min_samples)
+        self._samples: Deque[float] = deque(maxlen=max(self.min_samples, window))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        """记录一次调用耗时（秒）"""
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        估计耗时的q分位数
+
+        Returns:
+            耗时（秒），样本不足时返回None
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))]
+
+class RequestHedger:
+    """
+    对冲请求
+
+    调用超过同类调用耗时的percentile分位数仍未完成时，再发出一个相同的请求，
+    取先完成的结果并取消另一个。对冲会增加Gemini调用量，因此受预算限制：
+    每次调用积累budget_ratio个对冲额度（最多budget_burst个），每次对冲消耗1个，
+    长期来看额外请求不超过调用数的budget_ratio。
+
+    不同操作（调研、个人陈述）的耗时分布差别很大，按key分别统计耗时。
+    对冲获胜时主请求被取消，它的真实耗时未知，记录取消时已经过的时间作为下界：
+    只记录完成的调用会丢掉最慢的那部分样本，估计的分位数越来越低，对冲越来越频繁。
+    被取消的对冲请求不记录（它开始得晚，已经过的时间会低估耗时）。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget_ratio: float = 0.05,
+        budget_burst: float = 3.0,
+        min_delay_seconds: float = 1.0,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        """
+        Args:
+            percentile: 触发对冲的耗时分位数
+            budget_ratio: 对冲请求占调用数的最大比例
+            budget_burst: 最多积累的对冲额度
+            min_delay_seconds: 触发对冲前的最短等待时间（秒）
+            window: 每个key保留的耗时样本数
+            min_samples: 开始对冲前每个key所需的最少样本数
+        """
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.budget_burst = max(1.0, budget_burst)
+        self.min_delay_seconds = min_delay_seconds
+        self.window = window
+        self.min_samples = min_samples
+
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._budget = 0.0
+
+        # 统计计数
+        self.calls = 0
+        self.fired = 0
+        self.wins = 0
+        self.skipped_budget = 0
+        self.skipped_capacity = 0
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = self._trackers[key] = LatencyTracker(self.window, self.min_samples)
+        return tracker
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """key对应的对冲等待时间（秒），样本不足时返回None（不对冲）"""
+        estimate = self._tracker(key).percentile(self.percentile)
+        return None if estimate is None else max(self.min_delay_seconds, estimate)
+
+    async def _timed(self, call: Callable[[], Awaitable[T]], tracker: LatencyTracker) -> T:
+        start = time.monotonic()
+        result = await call()
+        tracker.record(time.monotonic() - start)
+        return result
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        key: str = "default",
+        can_hedge: Optional[Callable[[], bool]] = None,
+        on_discarded_error: Optional[Callable[[BaseException], Any]] = None
+    ) -> T:
+        """
+        执行一次调用，超过对冲等待时间仍未完成时发出对冲请求
+
+        Args:
+            call: 发出一次请求的协程函数（主请求和对冲请求都调用它）
+            key: 耗时统计的分类
+            can_hedge: 对冲前检查是否有空闲容量（例如限流器有空闲并发名额）
+            on_discarded_error: 未作为最终结果抛出的失败请求的回调（例如通知限流器）
+
+        Returns:
+            先成功完成的请求结果
+
+        Raises:
+            两个请求都失败时抛出主请求的异常
+        """
+        self.calls += 1
+        self._budget = min(self.budget_burst, self._budget + self.budget_ratio)
+        tracker = self._tracker(key)
+        delay = self.hedge_delay(key)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(call, tracker))
+        hedge: Optional[asyncio.Future] = None
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if self._budget < 1:
+                self.skipped_budget += 1
+                return await primary
+            if can_hedge is not None and not can_hedge():
+                self.skipped_capacity += 1
+                return await primary
+
+            self._budget -= 1
+            self.fired += 1
+            sys.stderr.write(f"[DEBUG] {key}调用超过{delay:.1f}秒未完成，发出对冲请求\n")
+            hedge = asyncio.ensure_future(self._timed(call, tracker))
+
+            pending = {primary, hedge}
+            failed = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                failed.extend(task for task in done if task.exception() is not None)
+                if succeeded:
+                    winner = primary if primary in succeeded else hedge
+                    if winner is hedge:
+                        self.wins += 1
+                    discarded = failed
+                    break
+            else:
+                # 两个请求都失败：抛出主请求的异常
+                winner = None
+                discarded = [task for task in failed if task is not primary]
+
+            if on_discarded_error is not None:
+                for task in discarded:
+                    on_discarded_error(task.exception())
+            if winner is None:
+                raise primary.exception()
+            return winner.result()
+        finally:
+            if hedge is not None and not primary.done():
+                # 主请求的耗时至少是已经过的时间
+                tracker.record(time.monotonic() - started)
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对冲统计信息（触发率、对冲获胜率和各操作的当前对冲等待时间）"""
+        return {
+            'percentile': self.percentile,
+            'budget_ratio': self.budget_ratio,
+            'budget_available': round(self._budget, 3),
+            'calls': self.calls,
+            'fired': self.fired,
+            'wins': self.wins,
+            'fire_rate': round(self.fired / self.calls, 4) if self.calls else 0.0,
+            'win_rate': round(self.wins / self.fired, 4) if self.fired else 0.0,
+            'skipped_budget': self.skipped_budget,
+            'skipped_capacity': self.skipped_capacity,
+            'hedge_delay_seconds': {
+                key: (round(delay, 3) if delay is not None else None)
+                for key, delay in ((key, self.hedge_delay(key)) for key in self._trackers)
+            },
+            'samples': {key: len(tracker) for key, tracker in self._trackers.items()}
+        }
@@ -0,0 +1,106 @@
+"""
+多关键词匹配
+
+评分时需要在同一段文本中反复查找一组固定关键词（权威来源、期刊关键词、领域关键词、结构章节）。
+KeywordMatcher在构建时一次性整理和预编译关键词表，之后的每次查找不再做任何准备工作：
+
+- 关键词不少于AUTOMATON_MIN_KEYWORDS个且安装了pyahocorasick时构建Aho-Corasick自动机，
+  一次扫描即可得到所有出现的关键词；
+- 否则"是否出现任一关键词"使用预编译的正则多选结构（C实现，找到即返回），
+  计数使用预先整理好的关键词元组逐个做子串查找。
+
+自动机每个匹配都要产出一个Python对象，关键词较少时不如逐个子串查找（C实现的in）。
+在内置调研语料上实测（见benchmarks/bench_scoring）：领域文本计数14个关键词时子串查找3.2us、
+自动机4.0us，16个关键词时分别为4.0us和3.7us；参考文献查找5个期刊关键词时正则0.33us、
+自动机0.42us，22个权威来源时分别为0.62us和0.46us。因此分界点取16个关键词：
+默认关键词表中权威来源（22个）使用自动机，其余使用子串查找和正则。
+"""
+import re
+from typing import Iterable, Set, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 使用自动机的最少关键词数量
+AUTOMATON_MIN_KEYWORDS = 16
+
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[str], ignore_case: bool = False):
+        """
+        预编译一组关键词
+
+        关键词按首次出现的顺序去重，空字符串被忽略。
+
+        Args:
+            keywords: 关键词列表
+            ignore_case: 是否忽略大小写（等价于keyword.lower() in text.lower()）
+        """
+        normalized = (keyword.lower() if ignore_case else keyword for keyword in keywords)
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keyword for keyword in normalized if keyword))
+        self.ignore_case = ignore_case
+
+        self._automaton = None
+        self._pattern = None
+        if not self.keywords:
+            return
+
+        if AHOCORASICK_AVAILABLE and len(self.keywords) >= AUTOMATON_MIN_KEYWORDS:
+            automaton = ahocorasick.Automaton()
+            for index, keyword in enumerate(self.keywords):
+                automaton.add_word(keyword, index)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            # 长关键词在前，避免被其前缀提前匹配（只影响匹配到哪个关键词，不影响是否匹配）
+            self._pattern = re.compile(
+                '|'.join(re.escape(keyword) for keyword in sorted(self.keywords, key=len, reverse=True))
+            )
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _prepare(self, text: str) -> str:
+        """忽略大小写时转换为小写"""
+        return text.lower() if self.ignore_case else text
+
+    def contains_any(self, text: str) -> bool:
+        """text中是否出现任一关键词（找到第一个即返回）"""
+        if not self.keywords:
+            return False
+        text = self._prepare(text)
+        if self._automaton is not None:
+            for _ in self._automaton.iter(text):
+                return True
+            return False
+        return self._pattern.search(text) is not None
+
+    def count(self, text: str) -> int:
+        """text中出现的不同关键词数量（等价于sum(keyword in text for keyword in keywords)）"""
+        if self._automaton is not None:
+            return len(self.find(text))
+        text = self._prepare(text)
+        count = 0
+        for keyword in self.keywords:
+            if keyword in text:
+                count += 1
+        return count
+
+    def find(self, text: str) -> Set[str]:
+        """text中出现的关键词集合（关键词已按ignore_case转换）"""
+        if not self.keywords:
+            return set()
+        text = self._prepare(text)
+
+        if self._automaton is not None:
+            keywords = self.keywords
+            found = set()
+            for _, index in self._automaton.iter(text):
+                found.add(keywords[index])
+                if len(found) == len(keywords):
+                    break
+            return found
+
+        return {keyword for keyword in self.keywords if keyword in text}
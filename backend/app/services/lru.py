@@ -0,0 +1,140 @@
+"""
+带TTL和字节预算的LRU条目表
+
+ResearchCache、PersonalStatementCache和SelectionService共用的进程内存储结构：
+
+- 条目按最近访问顺序保存在OrderedDict中（LRU），淘汰为O(1)；
+- 过期时间保存在最小堆中，清理过期条目为O(log n)；
+- 超出条目数或字节预算时淘汰最近最少使用的条目（保留最新写入的条目）。
+
+条目为dict，必须包含created_at（datetime）和size_bytes（int），其余字段由调用方决定。
+条目可以带expires_at（datetime）指定自己的过期时间，否则在created_at之后ttl过期。
+"""
+import heapq
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+class TTLLRUCache:
+    def __init__(
+        self,
+        ttl: Optional[timedelta],
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        on_remove: Optional[Callable[[str], Any]] = None
+    ):
+        """
+        初始化条目表
+
+        Args:
+            ttl: 条目存活时间，None表示每个条目都带expires_at
+            max_entries: 最大条目数
+            max_bytes: 条目size_bytes之和的上限，None表示不限制
+            on_remove: 条目被删除、淘汰或过期清理时以键调用（例如同步移除辅助索引）
+        """
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._on_remove = on_remove
+        # 过期堆：(expires_at, key)
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+
+        # 统计计数
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def expires_at(self, entry: dict) -> datetime:
+        """条目的过期时间"""
+        expires_at = entry.get('expires_at')
+        return expires_at if expires_at is not None else entry['created_at'] + self.ttl
+
+    def is_live(self, entry: dict) -> bool:
+        """条目是否未过期"""
+        return datetime.now() < self.expires_at(entry)
+
+    def get(self, key: str) -> Optional[dict]:
+        """获取未过期的条目并更新LRU顺序；条目已过期时删除并返回None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.is_live(entry):
+            self.entries.move_to_end(key)
+            return entry
+        self.remove(key)
+        self.expired += 1
+        return None
+
+    def put(self, key: str, entry: dict) -> dict:
+        """写入条目（覆盖已有条目）并按条目数和字节预算淘汰，返回写入的条目"""
+        # 覆盖已有条目时先移除旧条目，保证字节计数准确
+        self.remove(key)
+
+        self.entries[key] = entry
+        self.total_bytes += entry['size_bytes']
+        heapq.heappush(self._expiry_heap, (self.expires_at(entry), key))
+
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted['size_bytes']
+            self.evictions += 1
+            if self._on_remove is not None:
+                self._on_remove(evicted_key)
+
+        return entry
+
+    def remove(self, key: str) -> Optional[dict]:
+        """删除条目，返回被删除的条目"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry['size_bytes']
+            if self._on_remove is not None:
+                self._on_remove(key)
+        return entry
+
+    def cleanup_expired(self) -> int:
+        """清理过期条目（从过期堆顶弹出），返回清理数量"""
+        now = datetime.now()
+        heap = self._expiry_heap
+        removed = 0
+
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            # 条目可能已被淘汰或重新写入，只删除与堆中记录一致的条目
+            if entry is not None and self.expires_at(entry) == expires_at:
+                self.remove(key)
+                removed += 1
+
+        # 淘汰和覆盖会在堆中留下失效记录，超过两倍条目数时重建
+        if len(heap) > 2 * len(self.entries) + 64:
+            self._expiry_heap = [(self.expires_at(entry), key) for key, entry in self.entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+        self.expired += removed
+        return removed
+
+    def count_expired(self) -> int:
+        """已过期但尚未清理的条目数（可能在执行器线程中调用）"""
+        now = datetime.now()
+        # 先复制条目列表（list()在持有GIL时一次完成），避免遍历时字典被修改
+        return sum(1 for entry in list(self.entries.values()) if self.expires_at(entry) <= now)
+
+    def clear(self):
+        """清空所有条目（不调用on_remove）"""
+        self.entries.clear()
+        self._expiry_heap.clear()
+        self.total_bytes = 0
@@ -0,0 +1,116 @@
+"""
+用户输入规范化
+在生成缓存键之前统一写法差异，使语义相同的请求命中同一缓存条目
+"""
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+# 学校别名表：规范化（NFKC + 小写 + 空白折叠）后的写法 -> 统一名称
+SCHOOL_ALIASES: Dict[str, str] = {
+    # 中国大陆
+    '清华': '清华大学',
+    'tsinghua': '清华大学',
+    'tsinghua university': '清华大学',
+    'thu': '清华大学',
+    '北大': '北京大学',
+    'pku': '北京大学',
+    'peking university': '北京大学',
+    '复旦': '复旦大学',
+    'fudan': '复旦大学',
+    'fudan university': '复旦大学',
+    '上交': '上海交通大学',
+    '上海交大': '上海交通大学',
+    'sjtu': '上海交通大学',
+    'shanghai jiao tong university': '上海交通大学',
+    '浙大': '浙江大学',
+    'zju': '浙江大学',
+    'zhejiang university': '浙江大学',
+    # 中国香港
+    '港大': '香港大学',
+    'hku': '香港大学',
+    'the university of hong kong': '香港大学',
+    'university of hong kong': '香港大学',
+    '港中文': '香港中文大学',
+    'cuhk': '香港中文大学',
+    'the chinese university of hong kong': '香港中文大学',
+    'chinese university of hong kong': '香港中文大学',
+    '港科大': '香港科技大学',
+    'hkust': '香港科技大学',
+    'hong kong university of science and technology': '香港科技大学',
+    'the hong kong university of science and technology': '香港科技大学',
+    # 新加坡
+    '新国立': '新加坡国立大学',
+    'nus': '新加坡国立大学',
+    'national university of singapore': '新加坡国立大学',
+    '南洋理工': '南洋理工大学',
+    'ntu': '南洋理工大学',
+    'nanyang technological university': '南洋理工大学',
+    # 英国
+    'ucl': '伦敦大学学院',
+    'university college london': '伦敦大学学院',
+    'lse': '伦敦政治经济学院',
+    'london school of economics': '伦敦政治经济学院',
+    'london school of economics and political science': '伦敦政治经济学院',
+    'imperial': '帝国理工学院',
+    'imperial college london': '帝国理工学院',
+    '帝国理工': '帝国理工学院',
+    'oxford': '牛津大学',
+    'university of oxford': '牛津大学',
+    'cambridge': '剑桥大学',
+    'university of cambridge': '剑桥大学',
+    # 美国
+    'mit': '麻省理工学院',
+    'massachusetts institute of technology': '麻省理工学院',
+    '麻省理工': '麻省理工学院',
+    'cmu': '卡内基梅隆大学',
+    'carnegie mellon university': '卡内基梅隆大学',
+    '卡梅': '卡内基梅隆大学',
+    'columbia': '哥伦比亚大学',
+    'columbia university': '哥伦比亚大学',
+    '哥大': '哥伦比亚大学',
+    'upenn': '宾夕法尼亚大学',
+    'university of pennsylvania': '宾夕法尼亚大学',
+    '宾大': '宾夕法尼亚大学',
+}
+
+# 列表分隔符：NFKC已将全角逗号、分号转换为半角
+_LIST_SEPARATORS = re.compile(r'[,;、\n]+')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Unicode NFKC规范化并折叠空白"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE.sub(' ', text).strip()
+
+def normalize_school(school: str) -> str:
+    """规范化学校名称：忽略大小写并应用别名表"""
+    name = normalize_text(school).casefold()
+    return SCHOOL_ALIASES.get(name, name)
+
+def normalize_list(text: str) -> List[str]:
+    """将用各种分隔符（、 , ; 换行）分隔的列表规范化为去重、排序后的列表"""
+    text = unicodedata.normalize('NFKC', text or '')
+    items = {normalize_text(item).casefold() for item in _LIST_SEPARATORS.split(text)}
+    items.discard('')
+    return sorted(items)
+
+def normalize_research_inputs(school: str, major: str, courses: str, extracurricular: str) -> Tuple[str, str, str, str]:
+    """
+    规范化调研请求的输入
+
+    Args:
+        school: 目标学校
+        major: 申请专业
+        courses: 相关课程描述
+        extracurricular: 课外经历描述
+
+    Returns:
+        规范化后的(school, major, courses, extracurricular)
+    """
+    return (
+        normalize_school(school),
+        normalize_text(major).casefold(),
+        ','.join(normalize_list(courses)),
+        normalize_text(extracurricular)
+    )
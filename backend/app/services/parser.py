@@ -1,272 +1,466 @@
 import re
-from typing import List, Optional, Tuple, Dict
+from functools import lru_cache
+from typing import Generator, Iterable, List, Optional, Tuple, Dict
 from datetime import datetime
 from app.models.schemas import ResearchOption
-
-def parse_research_options(text: str) -> List[ResearchOption]:
+from app.services.keywords import KeywordMatcher
+from app.services.relevance import profile_similarities
+
+# 预编译的正则表达式
+_DOMAIN_HEADER = r'细分领域(?P<num>\d+):\s*(?P<name>[^\n(]+)'
+_BRACKET_DOMAIN_HEADER = r'【细分领域(?P<num>\d+):\s*(?P<name>[^】]+)】'
+# 匹配度标记：带冒号（"匹配度: 92%"）优先于不带冒号（"匹配度 92%"）
+_MATCH_SCORE = r'匹配度(?P<colon>:)?\s*(?P<score>\d+)%'
+# 标题和匹配度合并为一个词法模式，一次扫描即可得到所有领域块及其匹配度
+_RESEARCH_TOKENS = re.compile(f'(?P<header>{_DOMAIN_HEADER})|{_MATCH_SCORE}')
+_BRACKET_RESEARCH_TOKENS = re.compile(f'(?P<header>{_BRACKET_DOMAIN_HEADER})|{_MATCH_SCORE}')
+_PLAIN_HEADER = re.compile(_DOMAIN_HEADER)
+_BRACKET_HEADER = re.compile(_BRACKET_DOMAIN_HEADER)
+_BULLETS = ('•', '-', '*')
+_REASONING_KEYWORDS = ('趋势分析:', '痛点识别:', '机会点:', '技能匹配:')
+_REFERENCE_PREFIX = re.compile(r'^(\d+\.\s*|[-*]\s*)')
+_WHITESPACE = re.compile(r'\s+')
+
+DEFAULT_MATCH_SCORE = 85
+DEFAULT_SUMMARY = "通过硕士学习专业知识来应对行业挑战"
+DEFAULT_REASONING = [
+    "趋势分析: 行业趋势分析显示该领域有快速增长",
+    "技能匹配: 申请者的经历与领域需求高度匹配"
+]
+
+def _strip_bullet(text: str) -> str:
+    """移除开头的bullet point符号（等价于re.sub(r'^[•\\-*]\\s*', '', text)）"""
+    return text[1:].lstrip() if text.startswith(_BULLETS) else text
+
+def _domain_block_parser() -> Generator[Optional[Tuple[str, List[str], List[str]]], Optional[str], None]:
     """
-    解析调研文本为结构化数据
-
-    Args:
-        text: Gemini返回的调研文本
+    单个细分领域块的逐行解析器（协程）
 
-    Returns:
-        解析后的ResearchOption列表
-
-    Raises:
-        ValueError: 解析失败时抛出
+    一句话总结、详细理由和参考文献在同一次逐行扫描中解析，
+    结果与旧实现逐字段分别解析一致（见benchmarks/bench_parser）。
+    状态全部保存在局部变量中：用send(line)逐行输入，send(None)结束并返回
+    (一句话总结, 详细理由, 参考文献)。
     """
-    # 清理文本：移除多余空白
-    text = text.strip()
+    # 一句话总结的候选，优先级依次降低
+    summary = None
+    summary_pending = False  # "一句话总结:"后没有内容，等待下一行
+    summary_pending_bullet = False
+    keyword_summary = None  # "总结:"行
+    first_line_summary = None  # 第一行非空内容
+
+    # 详细理由/参考文献部分的状态：0 未开始，1 进行中，2 已结束
+    reasoning_state = 0
+    reasoning: List[str] = []
+    current_type = ""
+    # 当前项目的内容片段，结束时用空格连接；第一个片段为空表示当前没有项目内容
+    current_item = [""]
 
-    # 按细分领域分割文本
-    # 使用正则表达式匹配细分领域X: ...格式（不带方括号）
-    pattern = r'细分领域(\d+):\s*([^\n(]+)'
-    matches = list(re.finditer(pattern, text))
+    references_state = 0
+    references: List[str] = []
 
-    if len(matches) < 3:
-        # 尝试带方括号的格式作为后备
-        pattern = r'【细分领域(\d+):\s*([^】]+)】'
-        matches = list(re.finditer(pattern, text))
+    line = yield None
+    while line is not None:
+        stripped = line.strip()
 
-    if len(matches) < 3:
-        raise ValueError(f"无法解析到3个细分领域，只找到{len(matches)}个。文本内容：{text[:500]}...")
+        # 一句话总结
+        if summary is None:
+            if summary_pending:
+                summary_pending = False
+                if stripped:
+                    summary = _strip_bullet(stripped)
+                elif summary_pending_bullet:
+                    summary = ""
+            if summary is None:
+                if '一句话总结:' in stripped:
+                    candidate = stripped.split(':', 1)[1].strip()
+                    if candidate:
+                        summary = _strip_bullet(candidate)
+                    else:
+                        # 没有内容时使用下一行
+                        summary_pending = True
+                        summary_pending_bullet = stripped.startswith('•')
+                if summary is None:
+                    if keyword_summary is None and '总结:' in stripped and '详细理由' not in stripped:
+                        candidate = stripped.split('总结:')[1].strip()
+                        if candidate:
+                            keyword_summary = _strip_bullet(candidate)
+                    if (first_line_summary is None and stripped
+                            and not stripped.startswith('匹配度') and not stripped.startswith('详细理由')):
+                        first_line_summary = _strip_bullet(stripped)[:200]
+
+        # 详细理由
+        if reasoning_state != 2:
+            if '详细理由:' in stripped:
+                reasoning_state = 1
+            elif reasoning_state == 1:
+                if '参考文献:' in stripped or stripped.startswith(('1.', '参考文献')):
+                    # 到了参考文献部分
+                    if current_item[0] and current_type:
+                        reasoning.append(f"{current_type}: {' '.join(current_item)}")
+                    reasoning_state = 2
+                else:
+                    if stripped.startswith(_BULLETS):
+                        bullet_content = stripped[1:].lstrip()
+                        if bullet_content.startswith(_REASONING_KEYWORDS):
+                            # bullet point子标题（趋势分析、痛点识别等）开始新项目
+                            if current_item[0] and current_type:
+                                reasoning.append(f"{current_type}: {' '.join(current_item)}")
+                            current_type, content = bullet_content.split(':', 1)
+                            current_item = [content.strip()]
+                        elif current_item[0] and bullet_content:
+                            # 通用的bullet point，追加到当前项目
+                            current_item.append(bullet_content)
+                    elif stripped and not stripped.startswith('细分领域'):
+                        if current_item[0]:
+                            current_item.append(stripped)
+                        else:
+                            for keyword in _REASONING_KEYWORDS:
+                                if keyword in stripped:
+                                    current_type = keyword[:-1]
+                                    current_item = [stripped.split(':', 1)[1].strip()]
+                                    break
+
+        # 参考文献
+        if references_state != 2:
+            if '参考文献:' in stripped:
+                references_state = 1
+            elif references_state == 1 and stripped:
+                if stripped.startswith('细分领域'):
+                    references_state = 2
+                else:
+                    prefix = _REFERENCE_PREFIX.match(stripped)
+                    if prefix:
+                        ref = stripped[prefix.end():]
+                        if ref:
+                            references.append(ref)
+                    elif not references:
+                        references.append(stripped)
+
+        line = yield None
+
+    if summary is None:
+        if summary_pending and summary_pending_bullet:
+            # 块以"• 一句话总结:"结尾，没有下一行
+            summary = ""
+        elif keyword_summary is not None:
+            summary = keyword_summary
+        elif first_line_summary is not None:
+            summary = first_line_summary
+        else:
+            summary = DEFAULT_SUMMARY
 
-    research_options = []
+    if current_item[0] and current_type:
+        reasoning.append(f"{current_type}: {' '.join(current_item)}")
+    if not reasoning:
+        reasoning = list(DEFAULT_REASONING)
 
-    for i, match in enumerate(matches):
-        try:
-            # 获取领域编号和名称
-            domain_num = int(match.group(1))
-            domain_name = match.group(2).strip()
+    yield summary, reasoning, references
 
-            # 提取这个领域对应的文本块
-            start_pos = match.end()
-            if i < len(matches) - 1:
-                end_pos = matches[i + 1].start()
-            else:
-                end_pos = len(text)
+def _scan_domain_blocks(text: str, tokens: re.Pattern = _RESEARCH_TOKENS) -> List[list]:
+    """
+    一次扫描找出所有领域标题及其后的匹配度标记
 
-            domain_text = text[start_pos:end_pos]
+    Returns:
+        [领域名称, 块起始位置, 块结束位置, 带冒号的匹配度, 不带冒号的匹配度]列表，
+        领域块为text[起始位置:结束位置]（标题之后到下一个标题之前）
+    """
+    blocks: List[list] = []
+    for token in tokens.finditer(text):
+        if token.group('header') is not None:
+            if blocks:
+                blocks[-1][2] = token.start()
+            blocks.append([token.group('name').strip(), token.end(), len(text), None, None])
+        elif blocks:
+            # 每个块只取第一个匹配度标记
+            block = blocks[-1]
+            slot = 3 if token.group('colon') else 4
+            if block[slot] is None:
+                block[slot] = int(token.group('score'))
+    return blocks
+
+def _parse_block(text: str, name: str, start: int, end: int, score: Optional[int]) -> ResearchOption:
+    """逐行解析text[start:end]中的领域块（不复制整个块）"""
+    parser = _domain_block_parser()
+    next(parser)
+    feed = parser.send
+    find = text.find
+    pos = start
+    while True:
+        newline = find('\n', pos, end)
+        if newline == -1:
+            feed(text[pos:end])
+            break
+        feed(text[pos:newline])
+        pos = newline + 1
+
+    return _build_option(name, score, feed(None))
+
+def _build_option(name: str, score: Optional[int], fields: Tuple[str, List[str], List[str]]) -> ResearchOption:
+    """由领域名称、匹配度和逐行解析结果构建ResearchOption"""
+    summary, reasoning, references = fields
+    return ResearchOption(
+        title=name,
+        match_score=DEFAULT_MATCH_SCORE if score is None else score,
+        summary=summary,
+        reasoning=reasoning,
+        references=references
+    )
 
-            # 解析匹配度
-            match_score = parse_match_score(domain_text)
+def _parse_research_text(text: str) -> Tuple[List[ResearchOption], List[Tuple[int, int]]]:
+    """
+    解析调研文本，返回选项和每个领域块在text中的(起始, 结束)位置
 
-            # 解析一句话总结
-            summary = parse_summary(domain_text)
+    标题和匹配度通过一次词法扫描得到，每个领域块再逐行扫描一次。
 
-            # 解析详细理由
-            reasoning = parse_reasoning(domain_text)
+    Raises:
+        ValueError: 解析失败时抛出
+    """
+    # 按细分领域分割文本（不带方括号的格式）
+    blocks = _scan_domain_blocks(text)
 
-            # 解析参考文献
-            references = parse_references(domain_text)
+    if len(blocks) < 3:
+        # 尝试带方括号的格式作为后备
+        blocks = _scan_domain_blocks(text, _BRACKET_RESEARCH_TOKENS)
 
-            # 创建ResearchOption对象
-            option = ResearchOption(
-                title=domain_name,
-                match_score=match_score,
-                summary=summary,
-                reasoning=reasoning,
-                references=references
-            )
+    if len(blocks) < 3:
+        raise ValueError(f"无法解析到3个细分领域，只找到{len(blocks)}个。文本内容：{text[:500]}...")
 
-            research_options.append(option)
+    research_options = []
+    spans = []
 
+    for i, (name, start, end, score, plain_score) in enumerate(blocks):
+        try:
+            option = _parse_block(text, name, start, end, score if score is not None else plain_score)
         except Exception as e:
-            raise ValueError(f"解析第{i+1}个细分领域时出错: {str(e)}。领域文本：{domain_text[:200]}...")
+            raise ValueError(f"解析第{i+1}个细分领域时出错: {str(e)}。领域文本：{text[start:min(end, start + 200)]}...")
+        research_options.append(option)
+        spans.append((start, end))
 
     # 确保有3个选项
     if len(research_options) != 3:
         raise ValueError(f"期望3个选项，但只解析出{len(research_options)}个")
 
-    return research_options
-
-def parse_match_score(text: str) -> int:
-    """解析匹配度"""
-    # 查找"匹配度: XX%"模式，可能在括号内
-    match = re.search(r'匹配度:\s*(\d+)%', text)
-    if match:
-        return int(match.group(1))
-
-    # 查找"(匹配度: XX%)"模式
-    match = re.search(r'\(匹配度:\s*(\d+)%\)', text)
-    if match:
-        return int(match.group(1))
-
-    # 尝试其他模式
-    match = re.search(r'匹配度\s*(\d+)%', text)
-    if match:
-        return int(match.group(1))
-
-    # 默认值
-    return 85
-
-def parse_summary(text: str) -> str:
-    """解析一句话总结"""
-    lines = text.split('\n')
-
-    # 查找包含"一句话总结:"的行
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-
-        # 检查"一句话总结:"模式
-        if '一句话总结:' in stripped:
-            # 获取冒号后的内容
-            if ':' in stripped:
-                summary = stripped.split(':', 1)[1].strip()
-                if summary:
-                    # 移除可能的bullet point符号
-                    summary = re.sub(r'^[•\-*]\s*', '', summary)
-                    return summary
-
-            # 如果没有内容，尝试下一行
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if next_line:
-                    # 移除可能的bullet point符号
-                    next_line = re.sub(r'^[•\-*]\s*', '', next_line)
-                    return next_line
-
-        # 检查bullet point格式的总结
-        if stripped.startswith('•') and '一句话总结:' in stripped:
-            # 格式: "• 一句话总结: 内容"
-            summary_part = stripped.split(':', 1)[1].strip() if ':' in stripped else stripped[1:].strip()
-            return summary_part
-
-    # 查找单独的bullet point总结行
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped.startswith('•'):
-            # 检查前一行是否包含"一句话总结"
-            if i > 0 and '一句话总结:' in lines[i - 1]:
-                # 移除bullet point符号
-                summary = re.sub(r'^[•\-*]\s*', '', stripped)
-                return summary
-
-    # 如果没有找到，尝试其他模式
-    for line in lines:
-        stripped = line.strip()
-        if '总结:' in stripped and '详细理由' not in stripped:
-            summary = stripped.split('总结:')[1].strip()
-            if summary:
-                summary = re.sub(r'^[•\-*]\s*', '', summary)
-                return summary
-
-    # 返回第一行非空内容作为后备
-    for line in lines:
-        stripped = line.strip()
-        if stripped and not stripped.startswith('匹配度') and not stripped.startswith('详细理由'):
-            # 移除可能的bullet point符号
-            stripped = re.sub(r'^[•\-*]\s*', '', stripped)
-            return stripped[:200]  # 截断
+    return research_options, spans
 
-    return "通过硕士学习专业知识来应对行业挑战"
-
-def parse_reasoning(text: str) -> List[str]:
-    """解析详细理由"""
-    reasoning = []
-
-    # 查找"详细理由:"部分
-    lines = text.split('\n')
-    in_reasoning = False
-    current_item = ""
-    current_type = ""
-
-    for line in lines:
-        stripped = line.strip()
-
-        if '详细理由:' in stripped:
-            in_reasoning = True
-            continue
-
-        if in_reasoning:
-            # 检查是否到了参考文献部分
-            if '参考文献:' in stripped or stripped.startswith('1.') or stripped.startswith('参考文献'):
-                # 添加最后一个项目
-                if current_item and current_type:
-                    reasoning.append(f"{current_type}: {current_item}")
-                break
-
-            # 检查是否是bullet point子标题（趋势分析、痛点识别等）
-            bullet_match = re.match(r'^[•\-*]\s*(趋势分析|痛点识别|机会点|技能匹配):\s*(.*)', stripped)
-            if bullet_match:
-                # 保存前一个项目
-                if current_item and current_type:
-                    reasoning.append(f"{current_type}: {current_item}")
-
-                # 开始新项目
-                current_type = bullet_match.group(1)
-                current_item = bullet_match.group(2).strip()
-            elif stripped.startswith('•') or stripped.startswith('-') or stripped.startswith('*'):
-                # 通用的bullet point，追加到当前项目
-                if current_item:
-                    # 移除bullet point符号并添加内容
-                    bullet_content = re.sub(r'^[•\-*]\s*', '', stripped)
-                    if bullet_content:
-                        current_item += " " + bullet_content
-            elif stripped and not stripped.startswith('细分领域'):
-                # 普通文本行，追加到当前项目
-                if current_item:
-                    current_item += " " + stripped
-                elif stripped:  # 如果没有当前项目但有关键词
-                    # 检查是否是没有bullet point的关键词行
-                    for keyword in ['趋势分析:', '痛点识别:', '机会点:', '技能匹配:']:
-                        if keyword in stripped:
-                            if current_item and current_type:
-                                reasoning.append(f"{current_type}: {current_item}")
-                            current_type = keyword.replace(':', '')
-                            current_item = stripped.split(':', 1)[1].strip() if ':' in stripped else stripped
-                            break
-
-    # 添加最后一个项目
-    if current_item and current_type:
-        reasoning.append(f"{current_type}: {current_item}")
-
-    # 如果没有找到详细理由，使用一些默认内容
-    if not reasoning:
-        reasoning = [
-            "趋势分析: 行业趋势分析显示该领域有快速增长",
-            "技能匹配: 申请者的经历与领域需求高度匹配"
-        ]
-
-    return reasoning
-
-def parse_references(text: str) -> List[str]:
-    """解析参考文献"""
-    references = []
+def parse_research_options(text: str) -> List[ResearchOption]:
+    """
+    解析调研文本为结构化数据
 
-    # 查找"参考文献:"部分
-    lines = text.split('\n')
-    in_references = False
+    Args:
+        text: Gemini返回的调研文本
 
-    for line in lines:
-        stripped = line.strip()
+    Returns:
+        解析后的ResearchOption列表
 
-        if '参考文献:' in stripped:
-            in_references = True
-            continue
+    Raises:
+        ValueError: 解析失败时抛出
+    """
+    research_options, _ = _parse_research_text(text.strip())
+    return research_options
 
-        if in_references:
-            # 检查是否到了下一个细分领域或结束
-            if stripped.startswith('细分领域'):
-                break
+# 尚未完整到达的标题或匹配度标记的前缀（只由字面量、数字、冒号和空白组成）
+_PARTIAL_TOKEN = re.compile(r'细(?:分(?:领(?:域(?:\d+(?::\s*)?)?)?)?)?|匹(?:配(?:度(?::?\s*\d*)?)?)?')
+# 文本末尾尚未完整到达的带方括号的标题（名称可以跨行，直到"】"到达才结束）
+_PARTIAL_BRACKET_HEADER = re.compile(r'【(?:细(?:分(?:领(?:域(?:\d+(?::\s*[^】]*)?)?)?)?)?)?\Z')
 
-            # 跳过空行
-            if not stripped:
-                continue
+class IncrementalResearchParser:
+    """
+    调研文本的增量解析器
+
+    用feed(chunk)逐块输入流式接收的文本，每个细分领域块在下一个标题到达时
+    （或close()时）解析完成并立即返回。已处理的文本不会被重新扫描：
+    标题和匹配度标记从上次扫描结束处继续查找，完整的行在到达时即逐行解析，
+    缓冲区只保留未结束的行和可能是未完整标记前缀的末尾片段，
+    当前块已处理的文本以片段形式保存，块结束时拼接一次。
+    结果与parse_research_options_with_domain_texts对完整文本的解析一致。
+
+    标题格式在第一个标题到达时确定：与完整解析的后备规则一致，只有不带方括号的
+    标题模式在该位置不能匹配时（例如"【细分领域1:(名称)】"）才使用带方括号的格式。
+    各标题格式不统一的文本可能与完整解析的结果不同。
+    """
 
-            # 匹配编号引用格式：1. ..., 2. ... 或 - ..., * ...
-            if re.match(r'^(\d+\.\s*|[-*]\s*)', stripped):
-                # 移除编号或项目符号
-                ref = re.sub(r'^(\d+\.\s*|[-*]\s*)', '', stripped)
-                if ref:
-                    references.append(ref)
-            elif stripped and not references:
-                # 如果没有编号格式，但这是第一个引用
-                references.append(stripped)
+    def __init__(self):
+        self._buffer = ""  # 尚未处理完的文本
+        self._block_parts: List[str] = []  # 当前块已移出缓冲区的文本
+        self._tokens: Optional[re.Pattern] = None  # 标题格式对应的词法模式（第一个标题到达前为None）
+        self._token_pos = 0  # 下一次查找标记的位置（之前的文本已扫描完毕）
+        self._line_pos = 0  # 当前块下一行的起始位置
+        self._line_scan = 0  # 已确认不含换行符的位置
+        # 当前块: [领域名称, 块在缓冲区中的起始位置, 带冒号的匹配度, 不带冒号的匹配度, 逐行解析器]
+        self._block: Optional[list] = None
+        self._closed = False
+        self.count = 0  # 已完成的领域块数量
+
+    def feed(self, chunk: str) -> List[Tuple[ResearchOption, str]]:
+        """
+        输入一段文本
+
+        Returns:
+            本次完成的(ResearchOption, 领域文本)列表
+
+        Raises:
+            ValueError: 领域块解析失败时抛出
+        """
+        if self._closed:
+            raise ValueError("解析器已关闭")
+        self._buffer += chunk
+        completed = self._scan(len(self._buffer), final=False)
+        self._compact()
+        return completed
+
+    def close(self) -> List[Tuple[ResearchOption, str]]:
+        """
+        文本接收完毕，完成最后一个领域块
+
+        Returns:
+            最后完成的(ResearchOption, 领域文本)列表
+        """
+        if self._closed:
+            return []
+        self._closed = True
+
+        # 与完整解析一致：忽略末尾空白
+        end = len(self._buffer)
+        while end > 0 and self._buffer[end - 1].isspace():
+            end -= 1
+        self._line_pos = min(self._line_pos, end)
+        self._line_scan = min(self._line_scan, end)
+        self._token_pos = min(self._token_pos, end)
+
+        completed = self._scan(end, final=True)
+        if self._block is not None:
+            completed.append(self._finish_block(end, final=True))
+        self._buffer = ""
+        return completed
+
+    def _scan(self, end: int, final: bool) -> List[Tuple[ResearchOption, str]]:
+        """从上次位置继续查找标记，并逐行解析当前块中已完整的行"""
+        if self._tokens is None:
+            self._tokens = self._detect_format(end, final)
+            if self._tokens is None:
+                return []
+
+        buffer = self._buffer
+        completed = []
+        pos = self._token_pos
+        pending = None  # 未完整的标记的起始位置
+
+        limit = end
+        if self._tokens is _BRACKET_RESEARCH_TOKENS and not final:
+            # 带方括号的标题在"】"到达前不会被匹配，只扫描未完整的标题之前的文本
+            partial = _PARTIAL_BRACKET_HEADER.search(buffer, pos, end)
+            if partial is not None:
+                limit = pending = partial.start()
+
+        for token in self._tokens.finditer(buffer, pos, limit):
+            if token.group('header') is not None:
+                # 标题名称在遇到换行或括号时结束，此前可能还会继续增长
+                if not final and token.end() == end:
+                    pending = token.start()
+                    break
+                if self._block is not None:
+                    completed.append(self._finish_block(token.start()))
+                parser = _domain_block_parser()
+                next(parser)
+                self._block = [token.group('name').strip(), token.end(), None, None, parser]
+                self._block_parts = []
+                self._line_pos = self._line_scan = token.end()
+            elif self._block is not None:
+                # 每个块只取第一个匹配度标记
+                slot = 2 if token.group('colon') else 3
+                if self._block[slot] is None:
+                    self._block[slot] = int(token.group('score'))
+            pos = token.end()
+
+        if pending is None and not final:
+            # 末尾可能是尚未完整到达的标记前缀，下次从这里继续查找
+            prefixes = '细匹' if self._tokens is _RESEARCH_TOKENS else '匹'
+            pending = self._partial_start(pos, end, prefixes)
+        self._token_pos = end if pending is None else pending
+
+        # 标记之前的完整行不会再被新的标题截断，可以逐行解析
+        if self._block is not None:
+            self._feed_lines(self._token_pos)
+        return completed
+
+    def _detect_format(self, end: int, final: bool) -> Optional[re.Pattern]:
+        """
+        按第一个标题确定标题格式
+
+        Returns:
+            标题格式对应的词法模式；还没有可以确定格式的标题时返回None
+        """
+        buffer = self._buffer
+        pos = self._token_pos
+        plain = _PLAIN_HEADER.search(buffer, pos, end)
+        bracket = _BRACKET_HEADER.search(buffer, pos, end)
+        # 不带方括号的模式也能匹配方括号内的标题时，完整解析使用不带方括号的格式
+        if bracket is not None and (plain is None or plain.start() > bracket.start() + 1):
+            return _BRACKET_RESEARCH_TOKENS
+        if plain is not None or final:
+            return _RESEARCH_TOKENS
+
+        # 末尾可能是尚未完整到达的标题，下次从这里继续查找
+        partial = _PARTIAL_BRACKET_HEADER.search(buffer, pos, end)
+        self._token_pos = min(partial.start() if partial is not None else end, self._partial_start(pos, end, '细'))
+        return None
+
+    def _partial_start(self, pos: int, end: int, prefixes: str) -> int:
+        """末尾是以prefixes中的字符开头、尚未完整到达的标记前缀时返回其起始位置，否则返回end"""
+        buffer = self._buffer
+        start = max(buffer.rfind(prefix, pos, end) for prefix in prefixes)
+        if start != -1 and _PARTIAL_TOKEN.fullmatch(buffer, start, end):
+            return start
+        return end
+
+    def _feed_lines(self, limit: int):
+        """逐行解析当前块中limit之前已完整的行"""
+        buffer = self._buffer
+        feed = self._block[4].send
+        pos = self._line_pos
+        newline = buffer.find('\n', max(pos, self._line_scan), limit)
+        while newline != -1:
+            feed(buffer[pos:newline])
+            pos = newline + 1
+            newline = buffer.find('\n', pos, limit)
+        self._line_pos = pos
+        self._line_scan = max(pos, limit)
+
+    def _finish_block(self, end: int, final: bool = False) -> Tuple[ResearchOption, str]:
+        """当前块在end处结束：解析剩余的行并构建选项（final表示最后一个块，去掉末尾空白）"""
+        self._feed_lines(end)
+        name, start, score, plain_score, parser = self._block
+        self._block = None
+        self.count += 1
+
+        parser.send(self._buffer[self._line_pos:end])
+        # 每个块只拼接一次
+        self._block_parts.append(self._buffer[start:end])
+        block_text = ''.join(self._block_parts)
+        self._block_parts = []
+        if final:
+            block_text = block_text.rstrip()
+        try:
+            option = _build_option(name, score if score is not None else plain_score, parser.send(None))
+        except Exception as e:
+            raise ValueError(f"解析第{self.count}个细分领域时出错: {str(e)}。领域文本：{block_text[:200]}...")
+        return option, block_text
 
-    # 如果没有找到参考文献，返回空列表
-    return references
+    def _compact(self):
+        """将已处理完的文本移出缓冲区（属于当前块的部分保存为片段）"""
+        if self._block is None:
+            cut = self._token_pos
+        else:
+            cut = min(self._line_pos, self._token_pos)
+            start = self._block[1]
+            if cut > start:
+                self._block_parts.append(self._buffer[start:cut])
+            self._block[1] = max(start - cut, 0)
+        if cut > 0:
+            self._buffer = self._buffer[cut:]
+            self._token_pos -= cut
+            self._line_pos -= cut
+            self._line_scan -= cut
 
 def parse_personal_statement(text: str) -> List[str]:
     """
@@ -282,7 +476,7 @@ def parse_personal_statement(text: str) -> List[str]:
     paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
 
     # 清理每个段落：移除多余空白
-    paragraphs = [re.sub(r'\s+', ' ', p) for p in paragraphs]
+    paragraphs = [_WHITESPACE.sub(' ', p) for p in paragraphs]
 
     # 确保正好5个段落
     if len(paragraphs) > 5:
@@ -295,6 +489,204 @@ def parse_personal_statement(text: str) -> List[str]:
 
     return paragraphs[:5]  # 确保只有5个段落
 
+class IncrementalPersonalStatementParser:
+    """
+    个人陈述的增量解析器
+
+    用feed(chunk)逐块输入流式接收的文本，每个段落在其后的两个换行符到达时
+    立即返回；close()返回最后一段和补齐的段落。只保留当前未结束的段落，
+    分隔符从上次查找结束处继续查找。结果与parse_personal_statement一致。
+    """
+
+    def __init__(self, max_paragraphs: int = 5):
+        self.max_paragraphs = max_paragraphs
+        self.paragraphs: List[str] = []
+        self._buffer = ""  # 当前未结束的段落
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        输入一段文本
+
+        Returns:
+            本次完成的段落列表
+        """
+        if self._closed:
+            raise ValueError("解析器已关闭")
+
+        # 分隔符可能跨越上一块的末尾
+        search_from = max(len(self._buffer) - 1, 0)
+        self._buffer += chunk
+
+        completed = []
+        separator = self._buffer.find('\n\n', search_from)
+        while separator != -1:
+            paragraph = self._add(self._buffer[:separator])
+            if paragraph is not None:
+                completed.append(paragraph)
+            self._buffer = self._buffer[separator + 2:]
+            separator = self._buffer.find('\n\n')
+        return completed
+
+    def close(self) -> List[str]:
+        """
+        文本接收完毕
+
+        Returns:
+            最后一段以及补齐到max_paragraphs个的占位段落
+        """
+        if self._closed:
+            return []
+        self._closed = True
+
+        completed = []
+        paragraph = self._add(self._buffer)
+        if paragraph is not None:
+            completed.append(paragraph)
+        self._buffer = ""
+
+        # 补充缺失的段落
+        for i in range(len(self.paragraphs), self.max_paragraphs):
+            paragraph = f"第{i+1}段内容待补充"
+            self.paragraphs.append(paragraph)
+            completed.append(paragraph)
+        return completed
+
+    def _add(self, segment: str) -> Optional[str]:
+        """清理并记录一个段落，空段落或超出数量时返回None"""
+        segment = segment.strip()
+        if not segment or len(self.paragraphs) >= self.max_paragraphs:
+            return None
+        paragraph = _WHITESPACE.sub(' ', segment)
+        self.paragraphs.append(paragraph)
+        return paragraph
+
+# 评分使用的默认关键词表（可通过configure_scoring_lexicons替换）
+AUTHORITATIVE_SOURCES = (
+    'Nature', 'Science', 'Cell', 'Lancet', 'NEJM', 'JAMA',
+    'IEEE', 'ACM', 'Springer', 'Elsevier', 'Wiley',
+    'Gartner', 'IDC', 'McKinsey', 'BCG', 'Deloitte',
+    'WHO', 'UNESCO', 'World Bank', 'IMF', 'UN', 'WTO'
+)
+JOURNAL_KEYWORDS = ('Journal', 'Proceedings', 'Conference', 'Symposium', 'Transactions')
+CONTENT_KEYWORDS = (
+    '前沿', '趋势', '技术', '创新', '发展', '应用',
+    '人工智能', '机器学习', '大数据', '云计算', '物联网',
+    '可持续发展', '数字化转型', '智能化'
+)
+REQUIRED_SECTIONS = ('趋势分析', '痛点识别', '机会点', '技能匹配', '参考文献')
+
+# 用户背景相关度加分：最多加RELEVANCE_MAX_BONUS分，余弦相似度达到RELEVANCE_FULL_SIMILARITY时加满
+RELEVANCE_MAX_BONUS = 10
+RELEVANCE_FULL_SIMILARITY = 0.25
+
+MAX_SCORE_PER_REFERENCE = 20  # 每篇参考文献最大20分
+
+# 参考文献评分缓存的最大条目数（同一参考文献在不同会话中反复出现）
+REFERENCE_SCORE_CACHE_SIZE = 4096
+
+_REF_AUTHOR = re.compile(r'[A-Z][a-z]+,\s*[A-Z]\.')
+_REF_PAREN_YEAR = re.compile(r'\((\d{4})\)')
+_REF_YEAR = re.compile(r'\b(19|20)(\d{2})\b')
+
+@lru_cache(maxsize=REFERENCE_SCORE_CACHE_SIZE)
+def _score_reference(ref: str, current_year: int) -> Tuple[int, Tuple[str, ...]]:
+    """
+    计算单篇参考文献的评分和错误（ref已去除首尾空白且非空）
+
+    结果只取决于参考文献文本、当前年份和关键词表，因此可以缓存；
+    更换关键词表时由configure_scoring_lexicons清空缓存。
+
+    Returns:
+        Tuple[score, errors]
+    """
+    ref_score = 0
+    ref_errors = []
+    lowered = ref.lower()
+
+    # 检查基本格式：至少包含作者、年份、标题
+    has_author = _REF_AUTHOR.search(ref) or 'et al.' in ref
+    year_match = _REF_PAREN_YEAR.search(ref) or _REF_YEAR.search(ref)
+    has_title = '"' in ref or '“' in ref or '”' in ref or ('[' in ref and ']' in ref)
+
+    # 检查期刊/来源
+    has_journal = _journal_matcher.contains_any(ref)
+
+    # 检查权威来源（关键词已转换为小写，直接查找小写的参考文献）
+    is_authoritative = _authoritative_matcher.contains_any(lowered)
+
+    # 检查DOI或链接
+    has_doi = 'doi:' in lowered or 'doi.org' in lowered or '10.' in ref[:20]
+    has_url = 'http://' in lowered or 'https://' in lowered
+
+    # 评分
+    if has_author:
+        ref_score += 3
+    else:
+        ref_errors.append("缺少作者信息")
+
+    if year_match:
+        ref_score += 3
+        # 检查年份是否合理（1900-当前年份）
+        year = int(year_match.group(1) if year_match.group(1) else year_match.group(2))
+        if 1900 <= year <= current_year:
+            ref_score += 2  # 合理年份额外加分
+            if year >= 2020:
+                ref_score += 5  # 2020年后的参考文献额外加分
+        else:
+            ref_errors.append(f"年份{year}不合理")
+    else:
+        ref_errors.append("缺少年份")
+
+    if has_title:
+        ref_score += 3
+    else:
+        ref_errors.append("缺少标题标记")
+
+    if has_journal:
+        ref_score += 2
+    if is_authoritative:
+        ref_score += 5
+    if has_doi or has_url:
+        ref_score += 4
+
+    # 确保分数不超过最大值
+    return min(ref_score, MAX_SCORE_PER_REFERENCE), tuple(ref_errors)
+
+def configure_scoring_lexicons(
+    authoritative_sources: Optional[Iterable[str]] = None,
+    journal_keywords: Optional[Iterable[str]] = None,
+    content_keywords: Optional[Iterable[str]] = None,
+    required_sections: Optional[Iterable[str]] = None
+):
+    """
+    配置评分使用的关键词表（None表示使用默认关键词表）
+
+    关键词表在这里一次性预编译为KeywordMatcher，之后的评分不再有额外开销；
+    参考文献评分缓存随之清空。
+
+    Args:
+        authoritative_sources: 权威来源（忽略大小写）
+        journal_keywords: 期刊/会议关键词
+        content_keywords: 领域文本关键词（每个出现的关键词加1分，最多10分）
+        required_sections: 领域文本应包含的章节（每个加2分）
+    """
+    global _authoritative_matcher, _journal_matcher, _content_matcher, _section_matcher
+    # 忽略大小写：关键词在这里转换为小写，评分时查找已转换为小写的参考文献（不再逐次转换）
+    _authoritative_matcher = KeywordMatcher(
+        source.lower() for source in (AUTHORITATIVE_SOURCES if authoritative_sources is None else authoritative_sources)
+    )
+    _journal_matcher = KeywordMatcher(JOURNAL_KEYWORDS if journal_keywords is None else journal_keywords)
+    _content_matcher = KeywordMatcher(CONTENT_KEYWORDS if content_keywords is None else content_keywords)
+    _section_matcher = KeywordMatcher(REQUIRED_SECTIONS if required_sections is None else required_sections)
+    _score_reference.cache_clear()
+
+configure_scoring_lexicons()
+
+def get_reference_score_cache_info() -> Dict[str, int]:
+    """获取参考文献评分缓存的统计信息"""
+    return _score_reference.cache_info()._asdict()
+
 def validate_and_score_references(references: List[str]) -> Tuple[List[str], int, List[str]]:
     """
     验证参考文献并计算质量评分
@@ -314,15 +706,7 @@ def validate_and_score_references(references: List[str]) -> Tuple[List[str], int
     valid_references = []
     validation_errors = []
     total_score = 0
-    max_score_per_ref = 20  # 每篇参考文献最大20分
-
-    # 权威来源关键词
-    authoritative_sources = [
-        'Nature', 'Science', 'Cell', 'Lancet', 'NEJM', 'JAMA',
-        'IEEE', 'ACM', 'Springer', 'Elsevier', 'Wiley',
-        'Gartner', 'IDC', 'McKinsey', 'BCG', 'Deloitte',
-        'WHO', 'UNESCO', 'World Bank', 'IMF', 'UN', 'WTO'
-    ]
+    current_year = datetime.now().year
 
     for i, ref in enumerate(references, 1):
         ref = ref.strip()
@@ -330,60 +714,7 @@ def validate_and_score_references(references: List[str]) -> Tuple[List[str], int
             validation_errors.append(f"参考文献 {i}: 为空")
             continue
 
-        ref_score = 0
-        ref_errors = []
-
-        # 检查基本格式：至少包含作者、年份、标题
-        has_author = re.search(r'[A-Z][a-z]+,\s*[A-Z]\.', ref) or 'et al.' in ref
-        has_year = re.search(r'\(\d{4}\)', ref) or re.search(r'\b(19|20)\d{2}\b', ref)
-        has_title = '"' in ref or '“' in ref or '”' in ref or ('[' in ref and ']' in ref)
-
-        # 检查期刊/来源
-        has_journal = any(keyword in ref for keyword in ['Journal', 'Proceedings', 'Conference', 'Symposium', 'Transactions'])
-
-        # 检查权威来源
-        is_authoritative = any(source.lower() in ref.lower() for source in authoritative_sources)
-
-        # 检查DOI或链接
-        has_doi = 'doi:' in ref.lower() or 'doi.org' in ref.lower() or '10.' in ref[:20]
-        has_url = 'http://' in ref.lower() or 'https://' in ref.lower()
-
-        # 评分
-        if has_author:
-            ref_score += 3
-        else:
-            ref_errors.append("缺少作者信息")
-
-        if has_year:
-            ref_score += 3
-            # 检查年份是否合理（1900-当前年份）
-            year_match = re.search(r'\((\d{4})\)', ref) or re.search(r'\b(19|20)(\d{2})\b', ref)
-            if year_match:
-                year = int(year_match.group(1) if year_match.group(1) else year_match.group(2))
-                current_year = datetime.now().year
-                if 1900 <= year <= current_year:
-                    ref_score += 2  # 合理年份额外加分
-                    if year >= 2020:
-                        ref_score += 5  # 2020年后的参考文献额外加分
-                else:
-                    ref_errors.append(f"年份{year}不合理")
-        else:
-            ref_errors.append("缺少年份")
-
-        if has_title:
-            ref_score += 3
-        else:
-            ref_errors.append("缺少标题标记")
-
-        if has_journal:
-            ref_score += 2
-        if is_authoritative:
-            ref_score += 5
-        if has_doi or has_url:
-            ref_score += 4
-
-        # 确保分数不超过最大值
-        ref_score = min(ref_score, max_score_per_ref)
+        ref_score, ref_errors = _score_reference(ref, current_year)
 
         if not ref_errors:
             valid_references.append(ref)
@@ -395,12 +726,53 @@ def validate_and_score_references(references: List[str]) -> Tuple[List[str], int
     if valid_references:
         avg_score = total_score / len(valid_references)
         # 将平均分（0-20）转换为百分制（0-100）
-        final_score = int((avg_score / max_score_per_ref) * 100)
+        final_score = int((avg_score / MAX_SCORE_PER_REFERENCE) * 100)
     else:
         final_score = 0
 
     return valid_references, final_score, validation_errors
 
+def _profile_text(user_courses: str, user_extracurricular: str) -> str:
+    """参与相关度计算的用户背景文本"""
+    return f"{user_courses or ''}\n{user_extracurricular or ''}".strip()
+
+def _profile_similarities(domain_texts: List[str], profile_text: str) -> List[float]:
+    """用户背景与每个领域文本的相似度（一次矩阵运算）"""
+    return profile_similarities(domain_texts, profile_text).tolist()
+
+def _content_score(domain_text: str, similarity: float) -> int:
+    """根据领域文本和用户背景相似度计算匹配度评分"""
+    base_score = 70  # 基础分
+
+    # 关键词匹配加分，最多加10分
+    keyword_bonus = min(_content_matcher.count(domain_text), 10)
+
+    # 文本长度和质量加分
+    text_length = len(domain_text)
+    if text_length > 500:
+        length_bonus = 10
+    elif text_length > 300:
+        length_bonus = 5
+    elif text_length > 100:
+        length_bonus = 2
+    else:
+        length_bonus = 0
+
+    # 结构完整性加分
+    structure_bonus = 2 * _section_matcher.count(domain_text)
+
+    # 用户背景相关度加分，相似度达到RELEVANCE_FULL_SIMILARITY时加满
+    if similarity > 0:
+        relevance_bonus = round(RELEVANCE_MAX_BONUS * min(1.0, similarity / RELEVANCE_FULL_SIMILARITY))
+    else:
+        relevance_bonus = 0
+
+    # 计算最终分数
+    final_score = base_score + keyword_bonus + length_bonus + structure_bonus + relevance_bonus
+
+    # 确保在70-100范围内
+    return max(70, min(100, final_score))
+
 def calculate_match_score_based_on_content(
     domain_text: str,
     user_courses: str = "",
@@ -417,46 +789,49 @@ def calculate_match_score_based_on_content(
     Returns:
         匹配度评分 (0-100)
     """
-    base_score = 70  # 基础分
+    return calculate_match_scores_based_on_content([domain_text], user_courses, user_extracurricular)[0]
 
-    # 关键词匹配加分
-    keywords_to_check = [
-        '前沿', '趋势', '技术', '创新', '发展', '应用',
-        '人工智能', '机器学习', '大数据', '云计算', '物联网',
-        '可持续发展', '数字化转型', '智能化'
-    ]
+def calculate_match_scores_based_on_content(
+    domain_texts: Iterable[str],
+    user_courses: str = "",
+    user_extracurricular: str = ""
+) -> List[int]:
+    """
+    批量计算多个领域文本的匹配度评分，返回值与逐个调用相同
 
-    keyword_score = 0
-    for keyword in keywords_to_check:
-        if keyword in domain_text:
-            keyword_score += 1
+    所有领域文本与用户背景的相关度由一次矩阵运算得到（见relevance.profile_similarities）。
+    """
+    profile_text = _profile_text(user_courses, user_extracurricular)
+    if not profile_text:
+        # 没有用户背景时相关度全部为0，不需要相似度计算
+        return [_content_score(domain_text, 0.0) for domain_text in domain_texts]
+
+    domain_texts = list(domain_texts)
+    similarities = _profile_similarities(domain_texts, profile_text)
+    return [
+        _content_score(domain_text, similarity)
+        for domain_text, similarity in zip(domain_texts, similarities)
+    ]
 
-    # 最多加10分
-    keyword_bonus = min(keyword_score, 10)
+def _apply_scoring(option: ResearchOption, content_score: int) -> ResearchOption:
+    """验证参考文献并按内容评分修正匹配度"""
+    # 验证和评分参考文献
+    valid_refs, ref_score, ref_errors = validate_and_score_references(option.references)
 
-    # 文本长度和质量加分
-    text_length = len(domain_text)
-    if text_length > 500:
-        length_bonus = 10
-    elif text_length > 300:
-        length_bonus = 5
-    elif text_length > 100:
-        length_bonus = 2
-    else:
-        length_bonus = 0
+    # 如果解析的匹配度与计算的分值相差太大，使用计算的分值
+    if abs(option.match_score - content_score) > 15:
+        # 使用计算的分值，但保持相对顺序
+        option.match_score = content_score
 
-    # 结构完整性加分
-    structure_bonus = 0
-    required_sections = ['趋势分析', '痛点识别', '机会点', '技能匹配', '参考文献']
-    for section in required_sections:
-        if section in domain_text:
-            structure_bonus += 2
+    # 更新参考文献列表
+    option.references = valid_refs
 
-    # 计算最终分数
-    final_score = base_score + keyword_bonus + length_bonus + structure_bonus
+    # 在详细理由中添加参考文献质量信息
+    if ref_errors and len(ref_errors) > 0:
+        quality_note = f"参考文献验证: 发现{len(ref_errors)}个问题，质量评分{ref_score}/100"
+        option.reasoning.append(quality_note)
 
-    # 确保在70-100范围内
-    return max(70, min(100, final_score))
+    return option
 
 def enhance_research_option_with_scoring(
     option: ResearchOption,
@@ -476,30 +851,38 @@ def enhance_research_option_with_scoring(
     Returns:
         增强后的ResearchOption对象
     """
-    # 验证和评分参考文献
-    valid_refs, ref_score, ref_errors = validate_and_score_references(option.references)
-
-    # 基于内容计算匹配度
+    # 基于内容和用户背景计算匹配度
     content_score = calculate_match_score_based_on_content(
         original_text,
         user_courses,
         user_extracurricular
     )
+    return _apply_scoring(option, content_score)
 
-    # 如果解析的匹配度与计算的分值相差太大，使用计算的分值
-    if abs(option.match_score - content_score) > 15:
-        # 使用计算的分值，但保持相对顺序
-        option.match_score = content_score
-
-    # 更新参考文献列表
-    option.references = valid_refs
+def enhance_research_options_with_scoring(
+    options: List[ResearchOption],
+    original_texts: List[str],
+    user_courses: str = "",
+    user_extracurricular: str = ""
+) -> List[ResearchOption]:
+    """
+    批量增强一次调研结果中的所有ResearchOption（内容评分一次批量计算），
+    结果与逐个调用enhance_research_option_with_scoring相同
 
-    # 在详细理由中添加参考文献质量信息
-    if ref_errors and len(ref_errors) > 0:
-        quality_note = f"参考文献验证: 发现{len(ref_errors)}个问题，质量评分{ref_score}/100"
-        option.reasoning.append(quality_note)
+    Args:
+        options: 原始的ResearchOption列表
+        original_texts: 对应的原始领域文本
+        user_courses: 用户课程描述（可选）
+        user_extracurricular: 用户课外经历描述（可选）
 
-    return option
+    Returns:
+        增强后的ResearchOption列表
+    """
+    content_scores = calculate_match_scores_based_on_content(original_texts, user_courses, user_extracurricular)
+    return [
+        _apply_scoring(option, content_score)
+        for option, content_score in zip(options, content_scores)
+    ]
 
 def parse_research_options_with_domain_texts(text: str) -> Tuple[List[ResearchOption], List[str]]:
     """
@@ -516,69 +899,29 @@ def parse_research_options_with_domain_texts(text: str) -> Tuple[List[ResearchOp
     Raises:
         ValueError: 解析失败时抛出
     """
-    # 清理文本：移除多余空白
+    # 没有首尾空白时strip()直接返回原字符串
     text = text.strip()
+    research_options, spans = _parse_research_text(text)
+    return research_options, [text[start:end] for start, end in spans]
 
-    # 按细分领域分割文本
-    # 使用正则表达式匹配细分领域X: ...格式（不带方括号）
-    pattern = r'细分领域(\d+):\s*([^\n(]+)'
-    matches = list(re.finditer(pattern, text))
-
-    if len(matches) < 3:
-        # 尝试带方括号的格式作为后备
-        pattern = r'【细分领域(\d+):\s*([^】]+)】'
-        matches = list(re.finditer(pattern, text))
-
-    if len(matches) < 3:
-        raise ValueError(f"无法解析到3个细分领域，只找到{len(matches)}个。文本内容：{text[:500]}...")
-
-    research_options = []
-    domain_texts = []
-
-    for i, match in enumerate(matches):
-        try:
-            # 获取领域编号和名称
-            domain_num = int(match.group(1))
-            domain_name = match.group(2).strip()
-
-            # 提取这个领域对应的文本块
-            start_pos = match.end()
-            if i < len(matches) - 1:
-                end_pos = matches[i + 1].start()
-            else:
-                end_pos = len(text)
-
-            domain_text = text[start_pos:end_pos]
-            domain_texts.append(domain_text)
-
-            # 解析匹配度
-            match_score = parse_match_score(domain_text)
-
-            # 解析一句话总结
-            summary = parse_summary(domain_text)
-
-            # 解析详细理由
-            reasoning = parse_reasoning(domain_text)
-
-            # 解析参考文献
-            references = parse_references(domain_text)
-
-            # 创建ResearchOption对象
-            option = ResearchOption(
-                title=domain_name,
-                match_score=match_score,
-                summary=summary,
-                reasoning=reasoning,
-                references=references
-            )
-
-            research_options.append(option)
+def parse_and_enhance_research_options(
+    text: str,
+    user_courses: str = "",
+    user_extracurricular: str = ""
+) -> List[ResearchOption]:
+    """
+    解析调研文本并使用评分算法增强（完整的CPU计算部分，可以整体放到线程池或进程池中运行）
 
-        except Exception as e:
-            raise ValueError(f"解析第{i+1}个细分领域时出错: {str(e)}。领域文本：domain_text[:200]...")
+    Args:
+        text: Gemini返回的调研文本
+        user_courses: 用户课程描述（可选）
+        user_extracurricular: 用户课外经历描述（可选）
 
-    # 确保有3个选项
-    if len(research_options) != 3:
-        raise ValueError(f"期望3个选项，但只解析出{len(research_options)}个")
+    Returns:
+        增强后的ResearchOption列表
 
-    return research_options, domain_texts
\ No newline at end of file
+    Raises:
+        ValueError: 解析失败时抛出
+    """
+    research_options, domain_texts = parse_research_options_with_domain_texts(text)
+    return enhance_research_options_with_scoring(research_options, domain_texts, user_courses, user_extracurricular)
@@ -0,0 +1,181 @@
+import asyncio
+import sys
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Any
+
+from app.services.cache import PersonalStatementCache
+
+# 预取候选：(匹配度, 个人陈述缓存键, 生成函数)
+PrefetchCandidate = Tuple[int, str, Callable[[], Awaitable[dict]]]
+
+class PersonalStatementPrefetcher:
+    """
+    个人陈述预取服务
+
+    调研选项返回后，在后台为匹配度最高的选项（mode="top"）或全部选项（mode="all"）
+    提前生成个人陈述，结果通过PersonalStatementCache的single-flight共享：
+    用户选择后的generate-ps请求直接命中缓存或加入进行中的任务。
+    用户做出选择或会话过期时，取消其余没有请求在等待的预取任务。
+
+    预取是推测性的，排队等待max_concurrency个名额；用户选择了某个选项后，
+    该选项的预取任务不再排队（不占用名额直接生成），预取只会让选择后的请求更快。
+    """
+
+    MODES = ("off", "top", "all")
+
+    def __init__(
+        self,
+        ps_cache: PersonalStatementCache,
+        mode: str = "off",
+        max_concurrency: int = 2,
+        session_ttl_seconds: float = 1800
+    ):
+        """
+        初始化预取服务
+
+        Args:
+            ps_cache: 个人陈述缓存
+            mode: 预取模式，off（关闭）、top（仅匹配度最高的选项）或all（全部选项）
+            max_concurrency: 同时进行的预取生成数量上限
+            session_ttl_seconds: 会话存活时间，过期后取消该会话未完成的预取
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"无效的预取模式: {mode}，可选值: {', '.join(self.MODES)}")
+
+        self.ps_cache = ps_cache
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.session_ttl_seconds = session_ttl_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # 会话ID -> 预取的缓存键；缓存键 -> 会话ID
+        self._session_keys: Dict[str, Set[str]] = {}
+        self._key_sessions: Dict[str, str] = {}
+        # 会话ID -> 会话过期时取消预取的定时器
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # 仍在排队等待名额的预取：缓存键 -> 选择后跳过排队的事件
+        self._queued: Dict[str, asyncio.Event] = {}
+
+        # 统计计数
+        self.started = 0
+        self.used = 0
+        self.promoted = 0
+        self.cancelled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def prefetch(self, session_id: str, candidates: List[PrefetchCandidate], primary_model: Optional[str] = None):
+        """
+        为会话启动预取
+
+        Args:
+            session_id: 会话ID
+            candidates: 每个调研选项对应的(匹配度, 缓存键, 生成函数)
+            primary_model: 缓存键对应的主模型（备用模型生成的结果不缓存）
+        """
+        if not self.enabled or not candidates:
+            return
+
+        if self.mode == "top":
+            candidates = [max(candidates, key=lambda candidate: candidate[0])]
+
+        keys = set()
+        for _, cache_key, generate in candidates:
+            # 已缓存或已在生成的结果不需要预取
+            if self.ps_cache.get_inflight(cache_key) is not None or cache_key in self.ps_cache.cache:
+                continue
+            self.ps_cache.start_generation(
+                cache_key,
+                lambda cache_key=cache_key, generate=generate: self._throttled(cache_key, generate),
+                primary_model
+            )
+            self._key_sessions[cache_key] = session_id
+            keys.add(cache_key)
+            self.started += 1
+
+        if keys:
+            self._session_keys[session_id] = keys
+            self._timers[session_id] = asyncio.get_running_loop().call_later(
+                self.session_ttl_seconds, self.cancel_session, session_id
+            )
+            sys.stderr.write(f"[DEBUG] 会话{session_id}启动{len(keys)}个个人陈述预取\n")
+
+    async def _throttled(self, cache_key: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+        """在并发上限内执行生成；排队期间用户选择了该选项时不再等待名额"""
+        selected = self._queued[cache_key] = asyncio.Event()
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        wait_selected = asyncio.ensure_future(selected.wait())
+        try:
+            try:
+                await asyncio.wait({acquire, wait_selected}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                self._queued.pop(cache_key, None)
+                wait_selected.cancel()
+                if not acquire.done():
+                    # 放弃排队（Semaphore会把取消时恰好得到的名额交给下一个等待者）
+                    acquire.cancel()
+            return await generate()
+        finally:
+            if acquire.done() and not acquire.cancelled():
+                self._semaphore.release()
+
+    def on_selection(self, cache_key: str):
+        """
+        用户选择了某个选项：该选项的预取不再排队，取消同一会话中其余的预取
+
+        Args:
+            cache_key: 所选选项的个人陈述缓存键
+        """
+        # 用户正在等待这个结果：仍在排队的预取直接开始生成
+        selected = self._queued.get(cache_key)
+        if selected is not None and not selected.is_set():
+            selected.set()
+            self.promoted += 1
+
+        session_id = self._key_sessions.get(cache_key)
+        if session_id is None:
+            return
+
+        self.used += 1
+        self._release_session(session_id, keep=cache_key)
+
+    def cancel_session(self, session_id: str):
+        """取消会话中所有未完成的预取（会话过期时调用）"""
+        self._release_session(session_id)
+
+    def _release_session(self, session_id: str, keep: Optional[str] = None):
+        """释放会话的预取记录，取消除keep以外没有请求在等待的任务"""
+        timer = self._timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+        for cache_key in self._session_keys.pop(session_id, set()):
+            self._key_sessions.pop(cache_key, None)
+            if cache_key != keep and self.ps_cache.cancel_generation(cache_key):
+                self.cancelled += 1
+
+    async def aclose(self):
+        """取消所有未完成的预取任务并等待其结束（应用关闭时调用）"""
+        tasks = []
+        for session_id in list(self._session_keys):
+            for cache_key in self._session_keys[session_id]:
+                task = self.ps_cache.get_inflight(cache_key)
+                if task is not None:
+                    task.cancel()
+                    tasks.append(task)
+            self._release_session(session_id)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sys.stderr.write(f"[DEBUG] 已取消{len(tasks)}个个人陈述预取\n")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        return {
+            'mode': self.mode,
+            'max_concurrency': self.max_concurrency,
+            'active_sessions': len(self._session_keys),
+            'started': self.started,
+            'used': self.used,
+            'promoted': self.promoted,
+            'cancelled': self.cancelled
+        }
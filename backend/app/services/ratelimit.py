@@ -0,0 +1,397 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """是否为配额耗尽或速率限制错误（HTTP 429 / RESOURCE_EXHAUSTED）"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    message = str(error)
+    lowered = message.lower()
+    return 'RESOURCE_EXHAUSTED' in message or 'quota' in lowered or 'rate limit' in lowered
+
+class TokenBucket:
+    """
+    进程内令牌桶
+
+    令牌按rate_per_second持续补充，最多积累burst个。获取令牌时先预订（令牌数可以为负），
+    再等待到预订的令牌补充完成，因此等待者按到达顺序获得令牌，不需要额外的锁。
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        """
+        Args:
+            rate_per_second: 每秒补充的令牌数
+            burst: 令牌桶容量（允许的突发请求数）
+        """
+        if rate_per_second <= 0:
+            raise ValueError(f"无效的令牌补充速率: {rate_per_second}")
+        self.rate = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _reserve(self) -> float:
+        """预订一个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+        self._updated = now
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def _refund(self):
+        """退还预订但未使用的令牌"""
+        self._tokens += 1
+
+    async def _wait(self, wait: float, refund: Callable[[], None]) -> float:
+        """等待预订的令牌，被取消时退还"""
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                refund()
+                raise
+        return wait
+
+    async def acquire(self) -> float:
+        """
+        获取一个令牌（必要时等待）
+
+        Returns:
+            等待的秒数
+        """
+        return await self._wait(self._reserve(), self._refund)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取令牌桶统计信息"""
+        return {
+            'backend': 'memory',
+            'rate_per_second': self.rate,
+            'burst': self.burst
+        }
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    多个worker进程共享的令牌桶（保存在SQLite文件中）
+
+    预订令牌在BEGIN IMMEDIATE事务中完成，各进程看到一致的令牌数；时间使用墙上时钟。
+    """
+
+    def __init__(self, path: str, name: str, rate_per_second: float, burst: int = 1, busy_timeout_ms: int = 5000):
+        """
+        Args:
+            path: 数据库文件路径（可以与缓存共用同一文件）
+            name: 令牌桶名称（同一文件可以保存多个令牌桶）
+            rate_per_second: 所有进程合计每秒补充的令牌数
+            burst: 令牌桶容量
+            busy_timeout_ms: 等待其他进程释放写锁的超时时间（毫秒）
+        """
+        super().__init__(rate_per_second, burst)
+        self.path = path
+        self.name = name
+        self.busy_timeout_ms = busy_timeout_ms
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前进程的连接（fork后重新连接）"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,  # 手动控制事务
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "name TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _update(self, delta: float) -> float:
+        """补充令牌后加上delta（预订为-1，退还为+1），返回更新后的令牌数"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens = float(self.burst) if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                tokens += delta
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return tokens
+
+    def _reserve(self) -> float:
+        tokens = self._update(-1)
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def _refund(self):
+        try:
+            self._update(1)
+        except Exception as e:
+            sys.stderr.write(f"[DEBUG] 退还共享令牌失败: {type(e).__name__}: {str(e)}\n")
+
+    async def acquire(self) -> float:
+        try:
+            wait = await asyncio.to_thread(self._reserve)
+        except Exception as e:
+            # 共享存储不可用时退回到进程内令牌桶
+            sys.stderr.write(f"[DEBUG] 共享令牌桶不可用: {type(e).__name__}: {str(e)}\n")
+            return await self._wait(TokenBucket._reserve(self), partial(TokenBucket._refund, self))
+        return await self._wait(wait, self._refund)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'name': self.name,
+            'rate_per_second': self.rate,
+            'burst': self.burst
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD自适应并发限制
+
+    每次成功把并发上限加1/limit（大约每完成一轮并发请求加1），
+    出现配额或速率限制错误时乘以decrease_factor。同一波并发请求往往一起收到429，
+    因此cooldown_seconds内只减小一次。超过上限的请求按到达顺序排队等待。
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        decrease_factor: float = 0.5,
+        cooldown_seconds: float = 5.0
+    ):
+        """
+        Args:
+            initial_limit: 初始并发上限
+            min_limit: 最小并发上限
+            max_limit: 最大并发上限
+            decrease_factor: 收到限流错误时的乘性减小系数
+            cooldown_seconds: 两次减小之间的最短间隔（秒）
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = float('-inf')
+
+        # 统计计数
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def waiting(self) -> int:
+        """排队等待的请求数"""
+        return len(self._waiters)
+
+    @property
+    def available(self) -> bool:
+        """是否可以不排队立即获得名额"""
+        return not self._waiters and self.in_flight < int(self.limit)
+
+    def _wake(self):
+        """按顺序唤醒等待者，直到达到并发上限"""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self):
+        """获取一个并发名额（必要时排队等待）"""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已经分配到名额但调用方被取消
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        """释放并发名额"""
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self):
+        """请求成功：加性增加并发上限"""
+        if self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.increases += 1
+            self._wake()
+
+    def on_overload(self):
+        """收到配额或速率限制错误：乘性减小并发上限"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_seconds:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, self.limit * self.decrease_factor)
+        if new_limit < self.limit:
+            self.limit = new_limit
+            self.decreases += 1
+            sys.stderr.write(f"[DEBUG] Gemini限流，并发上限降为{int(self.limit)}\n")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取并发限制统计信息"""
+        return {
+            'limit': int(self.limit),
+            'limit_exact': round(self.limit, 3),
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'increases': self.increases,
+            'decreases': self.decreases
+        }
+
+class GeminiRateLimiter:
+    """所有Gemini调用共用的限流器：先获取并发名额，再获取速率令牌"""
+
+    def __init__(
+        self,
+        concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+        bucket: Optional[TokenBucket] = None
+    ):
+        """
+        Args:
+            concurrency: 自适应并发限制，None时使用默认参数
+            bucket: 速率令牌桶，None表示不限制速率
+        """
+        self.concurrency = concurrency or AdaptiveConcurrencyLimiter()
+        self.bucket = bucket
+
+        # 统计计数
+        self.acquired = 0
+        self.queued = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.successes = 0
+        self.throttled = 0
+
+    async def acquire(self) -> float:
+        """
+        获取调用名额（之后必须调用release）
+
+        Returns:
+            排队等待的秒数
+        """
+        start = time.monotonic()
+        await self.concurrency.acquire()
+        try:
+            if self.bucket is not None:
+                await self.bucket.acquire()
+        except BaseException:
+            self.concurrency.release()
+            raise
+
+        wait = time.monotonic() - start
+        self.acquired += 1
+        if wait > 0.001:
+            self.queued += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return wait
+
+    def has_capacity(self) -> bool:
+        """是否有空闲的并发名额（不需要排队）"""
+        return self.concurrency.available
+
+    def release(self):
+        """释放调用名额"""
+        self.concurrency.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """在名额内执行一次调用"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self):
+        """记录一次成功调用"""
+        self.successes += 1
+        self.concurrency.on_success()
+
+    def on_error(self, error: Exception) -> bool:
+        """
+        记录一次失败调用，限流错误时减小并发上限
+
+        Returns:
+            是否为限流错误
+        """
+        if not is_rate_limit_error(error):
+            return False
+        self.throttled += 1
+        self.concurrency.on_overload()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流统计信息"""
+        return {
+            'concurrency': self.concurrency.get_stats(),
+            'bucket': self.bucket.get_stats() if self.bucket is not None else None,
+            'acquired': self.acquired,
+            'queued': self.queued,
+            'avg_wait_ms': round(self.total_wait_seconds / self.acquired * 1000, 3) if self.acquired else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+            'successes': self.successes,
+            'throttled': self.throttled
+        }
+
+    def close(self):
+        """释放令牌桶占用的资源"""
+        if isinstance(self.bucket, SQLiteTokenBucket):
+            self.bucket.close()
@@ -0,0 +1,103 @@
+"""
+用户背景与细分领域的相关度
+
+把用户的课程和课外经历与每个领域文本表示为词项向量，用余弦相似度衡量相关度。
+中文没有分词，词项取相邻两个汉字组成的二元组；英文词项取完整单词（小写，去掉常见虚词）。
+中文部分的分词、建词表、计数和相似度计算都用NumPy向量化完成：
+
+- 文本按UTF-32编码为码位数组；
+- 相邻码位组合为二元组编码，与英文单词编码合并后由np.unique建立本次批量的词表，
+  np.bincount得到计数矩阵；
+- 所有领域与用户背景的相似度由一次矩阵-向量乘法得到。
+
+权重使用次线性词频log(1 + tf)，并去掉调研输出模板中固定出现的短语（章节标题等）。
+没有使用按批次统计的IDF：领域在流式输出中逐个评分，相似度必须与同批次还有哪些领域无关。
+"""
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# 调研输出模板中固定出现的短语，不参与相关度计算
+TEMPLATE_PHRASES = (
+    '细分领域', '匹配度', '一句话总结', '总结', '详细理由',
+    '趋势分析', '痛点识别', '机会点', '技能匹配', '参考文献',
+    '通过硕士阶段系统学习', '以应对', '的挑战', '申请者'
+)
+
+# 不参与相关度计算的英文虚词和参考文献中的格式词
+ENGLISH_STOPWORDS = frozenset((
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or', 'the', 'to', 'with',
+    'et', 'al', 'doi', 'http', 'https', 'www', 'com', 'org', 'report'
+))
+
+# 码位最多21位，二元组编码为 (前一个码位 << 21) | 后一个码位；英文单词编码从2^42开始，与二元组不重叠
+_CODE_BITS = 21
+_WORD_CODE_BASE = 1 << (2 * _CODE_BITS)
+
+_ENGLISH_WORD = re.compile(r'[A-Za-z]+')
+
+def _encode(text: str) -> np.ndarray:
+    """把文本转换为码位数组"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def _bigrams(codes: np.ndarray) -> np.ndarray:
+    """相邻两个字符都是汉字时，返回其二元组编码"""
+    is_han = ((codes >= 0x4E00) & (codes <= 0x9FFF)) | ((codes >= 0x3400) & (codes <= 0x4DBF))
+    pairs = is_han[:-1] & is_han[1:]
+    bigrams = (codes[:-1].astype(np.uint64) << np.uint64(_CODE_BITS)) | codes[1:].astype(np.uint64)
+    return bigrams[pairs]
+
+def _words(text: str, word_codes: Dict[str, int]) -> np.ndarray:
+    """text中英文单词的编码（同一次批量计算共享word_codes，同一单词编码相同）"""
+    codes = []
+    for word in _ENGLISH_WORD.findall(text):
+        word = word.lower()
+        if word in ENGLISH_STOPWORDS:
+            continue
+        code = word_codes.get(word)
+        if code is None:
+            code = word_codes[word] = _WORD_CODE_BASE + len(word_codes)
+        codes.append(code)
+    return np.array(codes, dtype=np.uint64)
+
+_TEMPLATE_BIGRAMS = np.unique(np.concatenate([_bigrams(_encode(phrase)) for phrase in TEMPLATE_PHRASES]))
+
+def profile_similarities(domain_texts: Sequence[str], profile_text: str) -> np.ndarray:
+    """
+    计算用户背景与每个领域文本的余弦相似度
+
+    Args:
+        domain_texts: 领域文本列表
+        profile_text: 用户背景文本（课程和课外经历）
+
+    Returns:
+        与domain_texts等长的相似度数组，取值0-1；用户背景或领域文本没有可比较的内容时为0
+    """
+    count = len(domain_texts)
+    if count == 0:
+        return np.zeros(0)
+
+    word_codes: Dict[str, int] = {}
+    documents: List[np.ndarray] = [
+        np.concatenate((_bigrams(_encode(text)), _words(text, word_codes)))
+        for text in [*domain_texts, profile_text]
+    ]
+
+    lengths = np.fromiter((len(document) for document in documents), dtype=np.int64, count=count + 1)
+    if lengths[-1] == 0:
+        return np.zeros(count)
+
+    # 本次批量的词表和计数矩阵（行：各领域文本和用户背景，列：词项）
+    vocabulary, columns = np.unique(np.concatenate(documents), return_inverse=True)
+    size = len(vocabulary)
+    rows = np.repeat(np.arange(count + 1), lengths)
+    counts = np.bincount(rows * size + columns, minlength=(count + 1) * size).reshape(count + 1, size)
+
+    weights = np.log1p(counts)
+    weights[:, np.isin(vocabulary, _TEMPLATE_BIGRAMS)] = 0.0
+
+    norms = np.linalg.norm(weights, axis=1)
+    dots = weights[:count] @ weights[count]
+    denominators = norms[:count] * norms[count]
+    return np.divide(dots, denominators, out=np.zeros(count), where=denominators > 0)
@@ -0,0 +1,318 @@
+import asyncio
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from app.services.ratelimit import is_rate_limit_error
+
+T = TypeVar('T')
+
+# 错误分类
+ERROR_AUTH = 'auth'            # 密钥无效/无权限：不重试
+ERROR_INVALID = 'invalid'      # 请求本身有误（400/404等）：不重试
+ERROR_THROTTLED = 'throttled'  # 配额或速率限制：在限流器中排队后重试
+ERROR_TRANSIENT = 'transient'  # 5xx、超时、连接错误：退避后重试，计入熔断器
+ERROR_TIMEOUT = 'timeout'      # 超过整体截止时间
+ERROR_CANCELLED = 'cancelled'  # 调用方取消
+ERROR_CIRCUIT_OPEN = 'circuit_open'  # 熔断器打开，未发出请求
+
+NON_RETRYABLE_ERRORS = (ERROR_AUTH, ERROR_INVALID)
+
+def classify_error(error: BaseException) -> str:
+    """按是否值得重试对Gemini调用错误分类"""
+    # 已分类的错误（例如没有返回文本的响应）
+    kind = getattr(error, 'kind', None)
+    if isinstance(kind, str):
+        return kind
+    message = str(error)
+    code = getattr(error, 'code', None)
+    if 'API_KEY_INVALID' in message or 'PERMISSION_DENIED' in message or code in (401, 403):
+        return ERROR_AUTH
+    if isinstance(error, Exception) and is_rate_limit_error(error):
+        return ERROR_THROTTLED
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return ERROR_TRANSIENT
+    if isinstance(code, int) and 400 <= code < 500 and code not in (408, 409):
+        return ERROR_INVALID
+    # 5xx和无法识别的错误按可重试处理（与原来的行为一致）
+    return ERROR_TRANSIENT
+
+def _parse_duration(value: Any) -> Optional[float]:
+    """解析google.rpc.RetryInfo中的retryDelay（如"37s"、"1.5s"）"""
+    if isinstance(value, str) and value.endswith('s'):
+        try:
+            return float(value[:-1])
+        except ValueError:
+            return None
+    return None
+
+def server_retry_delay(error: BaseException) -> Optional[float]:
+    """读取服务端建议的重试等待时间（429响应中的RetryInfo），没有时返回None"""
+    details = getattr(error, 'details', None)
+    if not isinstance(details, dict):
+        return None
+    body = details.get('error', details)
+    entries = body.get('details') if isinstance(body, dict) else None
+    if not isinstance(entries, list):
+        return None
+    for entry in entries:
+        if isinstance(entry, dict) and 'retryDelay' in entry:
+            return _parse_duration(entry['retryDelay'])
+    return None
+
+class CircuitOpenError(Exception):
+    """熔断器打开：Gemini服务暂时不可用，请求直接失败"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Gemini服务暂时不可用（熔断中），请在{retry_after:.0f}秒后重试")
+
+class RetryError(Exception):
+    """重试结束后仍然失败"""
+
+    def __init__(self, last_error: BaseException, kind: str, attempts: int):
+        """
+        Args:
+            last_error: 最后一次调用的异常
+            kind: 最后一次错误的分类（ERROR_*）
+            attempts: 实际调用次数
+        """
+        self.last_error = last_error
+        self.kind = kind
+        self.attempts = attempts
+        super().__init__(str(last_error))
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    closed: 正常放行，连续failure_threshold次瞬时错误（5xx、超时）后打开；
+    open: 直接拒绝请求（不再占用名额、不再等待重试），recovery_seconds后进入half_open；
+    half_open: 最多放行half_open_max_calls个探测请求，成功则关闭，失败则重新打开。
+
+    配额/429错误由限流器处理，认证和请求错误与服务健康无关，都不计入失败。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0, half_open_max_calls: int = 1):
+        """
+        Args:
+            failure_threshold: 打开熔断器的连续失败次数
+            recovery_seconds: 打开后进入半开状态前的等待时间（秒）
+            half_open_max_calls: 半开状态同时放行的探测请求数
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        # 统计计数
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """
+        调用前检查是否放行
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下探测名额已满
+        """
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.recovery_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(remaining)
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            sys.stderr.write("[DEBUG] Gemini熔断器半开，放行探测请求\n")
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.recovery_seconds)
+            self._probes += 1
+
+    def record(self, kind: Optional[str]):
+        """
+        记录一次调用结果
+
+        Args:
+            kind: None表示成功，否则为错误分类（ERROR_*）
+        """
+        if kind is None:
+            if self.state != self.CLOSED:
+                sys.stderr.write("[DEBUG] Gemini探测请求成功，熔断器关闭\n")
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+
+        if kind not in (ERROR_TRANSIENT, ERROR_TIMEOUT):
+            # 与服务健康无关的错误：释放探测名额，不改变状态
+            if self.state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            return
+
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        if self.state != self.OPEN:
+            self.opened += 1
+            sys.stderr.write(f"[DEBUG] Gemini连续失败{self.failures}次，熔断器打开{self.recovery_seconds}秒\n")
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器统计信息"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'failure_threshold': self.failure_threshold,
+            'recovery_seconds': self.recovery_seconds,
+            'opened': self.opened,
+            'rejected': self.rejected
+        }
+
+class RetryPolicy:
+    """
+    带截止时间的重试策略
+
+    - 先分类再等待：认证和请求错误立即失败，不再浪费一次等待；
+    - 指数退避加完全抖动：第n次重试等待uniform(0, min(max_delay, base_delay * 2**n))秒，
+      并发请求在故障期间不会同步重试；429响应带有RetryInfo时至少等待服务端建议的时间；
+    - 整体截止时间：每次调用都限制在剩余时间内，等待后会超过截止时间时直接失败。
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            max_retries: 最大重试次数（不含第一次调用）
+            base_delay: 退避基数（秒）
+            max_delay: 单次等待上限（秒）
+            deadline_seconds: 整体截止时间（秒），None表示不限制
+        """
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+
+        # 统计计数
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.sleep_seconds = 0.0
+        self.failures: Dict[str, int] = {}
+
+    def backoff(self, retry: int) -> float:
+        """第retry次重试（从0开始）前的等待时间"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    def _fail(self, error: BaseException, kind: str, attempts: int) -> RetryError:
+        self.failures[kind] = self.failures.get(kind, 0) + 1
+        return RetryError(error, kind, attempts)
+
+    async def run(
+        self,
+        attempt: Callable[[], Awaitable[T]],
+        *,
+        max_retries: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        on_error: Optional[Callable[[BaseException], Any]] = None,
+        label: str = "Gemini调用"
+    ) -> T:
+        """
+        按策略调用attempt直到成功
+
+        Args:
+            attempt: 每次调用执行的协程函数
+            max_retries: 本次调用的最大重试次数，None时使用策略配置
+            breaker: 熔断器，每次调用前检查并记录结果
+            on_error: 每次失败时的回调（例如通知限流器）
+            label: 日志中的调用名称
+
+        Returns:
+            attempt的返回值
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            RetryError: 不可重试的错误、重试次数用完或超过截止时间
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
+        self.calls += 1
+
+        for n in range(max_retries + 1):
+            if breaker is not None:
+                try:
+                    breaker.before_call()
+                except CircuitOpenError:
+                    self.failures[ERROR_CIRCUIT_OPEN] = self.failures.get(ERROR_CIRCUIT_OPEN, 0) + 1
+                    raise
+            self.attempts += 1
+            try:
+                if deadline is None:
+                    result = await attempt()
+                else:
+                    result = await asyncio.wait_for(attempt(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.record(ERROR_CANCELLED)
+                raise
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError) and deadline is not None and time.monotonic() >= deadline
+                kind = ERROR_TIMEOUT if timed_out else classify_error(e)
+                sys.stderr.write(f"[DEBUG] {label}尝试 {n+1}/{max_retries+1} 失败({kind}): {type(e).__name__}: {str(e)}\n")
+                if breaker is not None:
+                    breaker.record(kind)
+                if on_error is not None:
+                    on_error(e)
+
+                if kind in NON_RETRYABLE_ERRORS or kind == ERROR_TIMEOUT or n == max_retries:
+                    raise self._fail(e, kind, n + 1) from e
+
+                delay = self.backoff(n)
+                if kind == ERROR_THROTTLED:
+                    delay = max(delay, min(self.max_delay, server_retry_delay(e) or 0.0))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    # 等待后已经没有时间再调用一次
+                    raise self._fail(e, ERROR_TIMEOUT, n + 1) from e
+
+                self.retries += 1
+                self.sleep_seconds += delay
+                await asyncio.sleep(delay)
+                continue
+
+            if breaker is not None:
+                breaker.record(None)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取重试统计信息"""
+        return {
+            'max_retries': self.max_retries,
+            'base_delay': self.base_delay,
+            'max_delay': self.max_delay,
+            'deadline_seconds': self.deadline_seconds,
+            'calls': self.calls,
+            'attempts': self.attempts,
+            'retries': self.retries,
+            'total_sleep_seconds': round(self.sleep_seconds, 3),
+            'failures': dict(self.failures)
+        }
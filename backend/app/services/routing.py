@@ -0,0 +1,140 @@
+from typing import Any, Dict, Iterable, Optional
+
+from google.genai import types
+
+# 操作类型（路由表的键）
+OPERATION_RESEARCH = 'research'
+OPERATION_PERSONAL_STATEMENT = 'personal_statement'
+
+DEFAULT_MODEL = 'gemini-2.5-pro'
+
+# 思考模型的最大输出token数下限：2.5系列的思考token计入max_output_tokens，
+# 上限过小时（例如请求指定2000）思考会用完额度，回答被截断或没有文本
+THINKING_MODEL_MIN_OUTPUT_TOKENS = {
+    'gemini-2.5-pro': 8192,
+    'gemini-2.5-flash': 8192
+}
+
+class GenerationParams:
+    """一次Gemini调用的生成参数（模型、温度、最大输出token数）"""
+
+    __slots__ = ('model_name', 'temperature', 'max_output_tokens')
+
+    def __init__(self, model_name: str, temperature: Optional[float] = None, max_output_tokens: Optional[int] = None):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+
+    def to_config(self) -> Optional[types.GenerateContentConfig]:
+        """转换为GenerateContentConfig，没有设置温度和输出长度时返回None（使用模型默认值）"""
+        if self.temperature is None and self.max_output_tokens is None:
+            return None
+        return types.GenerateContentConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.max_output_tokens
+        )
+
+    def cache_params(self) -> Dict[str, Any]:
+        """参与缓存键计算的参数（影响生成结果的全部参数）"""
+        return {
+            'model_name': self.model_name,
+            'temperature': self.temperature,
+            'max_output_tokens': self.max_output_tokens
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"GenerationParams({self.model_name!r}, temperature={self.temperature}, "
+            f"max_output_tokens={self.max_output_tokens})"
+        )
+
+class ModelRouter:
+    """
+    按操作选择模型并校验请求中的生成参数
+
+    路由表为每种操作（调研、个人陈述）指定默认模型，例如调研使用更快的flash模型、
+    个人陈述使用pro模型；请求可以指定模型，但必须在服务端允许列表中。
+    """
+
+    def __init__(
+        self,
+        default_model: str = DEFAULT_MODEL,
+        routes: Optional[Dict[str, str]] = None,
+        allowed_models: Optional[Iterable[str]] = None,
+        max_output_tokens_limit: Optional[int] = None,
+        min_output_tokens: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            default_model: 路由表中没有的操作使用的模型
+            routes: 操作 -> 模型名称
+            allowed_models: 请求可以指定的模型，None时只允许默认模型和路由表中的模型
+            max_output_tokens_limit: 请求可以指定的最大输出token数上限，None表示不限制
+            min_output_tokens: 模型 -> 最大输出token数下限，None时使用THINKING_MODEL_MIN_OUTPUT_TOKENS
+        """
+        self.default_model = default_model
+        self.routes = dict(routes or {})
+        self.allowed_models = set(allowed_models or ())
+        self.allowed_models.add(default_model)
+        self.allowed_models.update(self.routes.values())
+        self.max_output_tokens_limit = max_output_tokens_limit
+        self.min_output_tokens = dict(THINKING_MODEL_MIN_OUTPUT_TOKENS if min_output_tokens is None else min_output_tokens)
+
+    def model_for(self, operation: str) -> str:
+        """操作对应的默认模型"""
+        return self.routes.get(operation, self.default_model)
+
+    def resolve(
+        self,
+        operation: str,
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> GenerationParams:
+        """
+        确定一次调用的生成参数
+
+        Args:
+            operation: 操作类型
+            model_name: 请求指定的模型，None时按路由表选择
+            temperature: 请求指定的温度
+            max_output_tokens: 请求指定的最大输出token数
+
+        Returns:
+            生成参数（max_output_tokens低于模型的下限时提高到下限）
+
+        Raises:
+            ValueError: 模型不在允许列表中，或参数超出范围
+        """
+        if model_name is not None and model_name not in self.allowed_models:
+            raise ValueError(
+                f"不支持的模型: {model_name}，可用模型: {', '.join(sorted(self.allowed_models))}"
+            )
+        if temperature is not None and not 0 <= temperature <= 2:
+            raise ValueError(f"温度参数必须在0-2之间: {temperature}")
+        if max_output_tokens is not None:
+            if max_output_tokens < 1:
+                raise ValueError(f"最大输出token数必须为正数: {max_output_tokens}")
+            if self.max_output_tokens_limit is not None and max_output_tokens > self.max_output_tokens_limit:
+                raise ValueError(f"最大输出token数不能超过{self.max_output_tokens_limit}: {max_output_tokens}")
+
+        model_name = model_name or self.model_for(operation)
+        floor = self.min_output_tokens.get(model_name)
+        if max_output_tokens is not None and floor is not None and max_output_tokens < floor:
+            max_output_tokens = floor
+
+        return GenerationParams(
+            model_name=model_name,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取路由配置"""
+        return {
+            'default_model': self.default_model,
+            'routes': dict(self.routes),
+            'allowed_models': sorted(self.allowed_models),
+            'max_output_tokens_limit': self.max_output_tokens_limit,
+            'min_output_tokens': dict(self.min_output_tokens)
+        }
@@ -1,41 +1,120 @@
+import asyncio
+import json
+import sys
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Any
 from app.models.schemas import ResearchOption
+from app.services.store import KeyValueStore, MemoryKeyValueStore
 
 class SelectionService:
-    def __init__(self, ttl_minutes: int = 30):
+    def __init__(
+        self,
+        ttl_minutes: int = 30,
+        max_sessions: int = 10000,
+        max_bytes: Optional[int] = None,
+        store: Optional[KeyValueStore] = None
+    ):
         """
         初始化选择服务
 
+        会话保存在KeyValueStore中，默认为进程内的MemoryKeyValueStore（与调研缓存相同的LRU和过期堆）：
+        创建会话为O(log n)，过期会话由后台清理任务（start_sweeper）回收，
+        超过容量或字节预算时淘汰最近最少使用的会话。
+
+        多worker部署时传入跨进程共享的存储（如SQLiteKeyValueStore），任一worker创建的会话
+        在其他worker中都可读取；会话创建后不再修改，每次读取直接查询存储。
+        阻塞的存储（store.blocking）在线程中读写，等待SQLite锁时不阻塞事件循环。
+
         Args:
             ttl_minutes: 会话存活时间（分钟）
+            max_sessions: 默认进程内存储的最大会话数
+            max_bytes: 默认进程内存储的会话数据最大字节数（按调研选项JSON和用户背景的UTF-8长度估算），None表示不限制
+            store: 会话存储，None表示使用进程内存储
         """
-        self.user_sessions: Dict[str, dict] = {}
         self.ttl = timedelta(minutes=ttl_minutes)
+        self.store = store if store is not None else MemoryKeyValueStore(max_sessions, max_bytes)
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+        # 统计计数
+        self.created = 0
 
-    def create_session(self, research_options: List[ResearchOption]) -> str:
+    async def _call_store(self, method: Callable[..., Any], *args) -> Any:
+        """调用存储方法（阻塞的存储在线程中执行）"""
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def create_session(
+        self,
+        research_options: List[ResearchOption],
+        profile: Optional[Dict[str, str]] = None
+    ) -> str:
         """创建用户会话"""
+        return await self.create_session_from_data([opt.dict() for opt in research_options], profile)
+
+    async def create_session_from_data(
+        self,
+        research_data: List[dict],
+        profile: Optional[Dict[str, str]] = None,
+        options_bytes: Optional[int] = None
+    ) -> str:
+        """
+        使用已序列化的调研选项创建会话（不经过pydantic转换）
+
+        Args:
+            research_data: 调研选项dict列表，会话只读引用，调用方不应再修改
+            profile: 用户背景信息（school/major/courses/extracurricular），
+                     保存后可以只凭会话ID和选择索引生成个人陈述
+            options_bytes: 调研选项JSON的UTF-8字节数（缓存条目中的options_bytes），
+                           None时序列化research_data计算
+
+        Returns:
+            会话ID
+        """
         session_id = str(uuid.uuid4())
-        self.user_sessions[session_id] = {
-            'research_options': [opt.dict() for opt in research_options],
-            'created_at': datetime.now()
-        }
-        self._cleanup_expired()
+        created_at = time.time()
+        if options_bytes is None:
+            options_bytes = self._options_bytes(research_data)
+        size_bytes = options_bytes
+        if profile:
+            size_bytes += sum(len(text.encode('utf-8')) for text in profile.values() if text)
+
+        await self._call_store(
+            self.store.set,
+            session_id,
+            {'research_options': research_data, 'profile': profile},
+            created_at,
+            created_at + self.ttl.total_seconds(),
+            size_bytes
+        )
+        self.created += 1
         return session_id
 
-    def get_session(self, session_id: str) -> Optional[dict]:
-        """获取会话数据"""
-        if session_id in self.user_sessions:
-            session = self.user_sessions[session_id]
-            if datetime.now() - session['created_at'] < self.ttl:
-                return session
-            else:
-                # 会话过期，删除
-                del self.user_sessions[session_id]
-        return None
-
-    def validate_selection(self, session_id: str, selection_index: int) -> bool:
+    @staticmethod
+    def _options_bytes(research_data: List[dict]) -> int:
+        """调研选项JSON的UTF-8字节数"""
+        return len(json.dumps(research_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        """获取会话数据（research_options、profile和created_at），不存在或已过期时返回None"""
+        try:
+            stored = await self._call_store(self.store.get, session_id)
+        except Exception as e:
+            sys.stderr.write(f"[DEBUG] 读取会话失败: {type(e).__name__}: {str(e)}\n")
+            return None
+        if stored is None:
+            return None
+
+        value, created_timestamp = stored
+        return {
+            'research_options': value['research_options'],
+            'profile': value.get('profile'),
+            'created_at': datetime.fromtimestamp(created_timestamp)
+        }
+
+    async def validate_selection(self, session_id: str, selection_index: int) -> bool:
         """
         验证用户选择
 
@@ -46,31 +125,64 @@ class SelectionService:
         Returns:
             是否有效
         """
-        session = self.get_session(session_id)
+        session = await self.get_session(session_id)
         if not session:
             return False
 
         research_options = session['research_options']
         return 0 <= selection_index < len(research_options)
 
-    def get_research_options(self, session_id: str) -> Optional[List[ResearchOption]]:
+    async def get_research_options(self, session_id: str) -> Optional[List[ResearchOption]]:
         """获取会话中的调研选项"""
-        session = self.get_session(session_id)
+        session = await self.get_session(session_id)
         if not session:
             return None
 
         return [ResearchOption(**opt) for opt in session['research_options']]
 
-    def _cleanup_expired(self):
-        """清理过期会话"""
-        current_time = datetime.now()
-        expired_keys = [
-            key for key, session in self.user_sessions.items()
-            if current_time - session['created_at'] >= self.ttl
-        ]
-        for key in expired_keys:
-            del self.user_sessions[key]
+    async def _sweep_loop(self, interval_seconds: float):
+        """后台定期清理过期会话"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self._call_store(self.store.purge_expired)
+                if removed:
+                    sys.stderr.write(f"[DEBUG] 清理过期会话{removed}个\n")
+            except Exception as e:
+                sys.stderr.write(f"[DEBUG] 清理过期会话失败: {type(e).__name__}: {str(e)}\n")
+
+    def start_sweeper(self, interval_seconds: float = 60) -> asyncio.Task:
+        """启动后台清理任务（在应用lifespan中调用）"""
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.create_task(self._sweep_loop(interval_seconds))
+        return self._sweeper_task
+
+    async def stop_sweeper(self):
+        """停止后台清理任务"""
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取会话统计信息"""
+        return {
+            'ttl_minutes': self.ttl.total_seconds() / 60,
+            'created': self.created,
+            'store': self._get_store_stats(),
+            'sweeper_running': self._sweeper_task is not None and not self._sweeper_task.done()
+        }
+
+    def _get_store_stats(self) -> Dict[str, Any]:
+        """获取会话存储统计信息"""
+        try:
+            return self.store.get_stats()
+        except Exception as e:
+            return {'error': str(e)}
 
     def cleanup_all(self):
         """清理所有会话（用于测试）"""
-        self.user_sessions.clear()
\ No newline at end of file
+        self.store.clear()
@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.lru import TTLLRUCache
+
+class KeyValueStore(ABC):
+    """
+    带TTL的键值存储接口
+
+    值为可JSON序列化的dict，时间均为Unix时间戳（秒）。
+    blocking为True的实现（如SQLite）方法可能阻塞，异步代码中应在线程中执行；
+    进程内实现可以在事件循环中直接调用。
+    """
+
+    # 方法是否可能阻塞（等待锁或磁盘IO）
+    blocking = True
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[dict, float]]:
+        """获取未过期的值，返回(value, created_at)，不存在或已过期时返回None"""
+        ...
+
+    @abstractmethod
+    def set(
+        self,
+        key: str,
+        value: dict,
+        created_at: float,
+        expires_at: float,
+        size_bytes: Optional[int] = None
+    ):
+        """写入值（覆盖已有值）；size_bytes为值的估算字节数，供有字节预算的实现淘汰使用"""
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        """删除值"""
+        ...
+
+    @abstractmethod
+    def clear(self):
+        """清空所有值"""
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """删除已过期的值，返回删除数量"""
+        ...
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        ...
+
+    def close(self):
+        """释放资源"""
+        pass
+
+class MemoryKeyValueStore(KeyValueStore):
+    """
+    进程内键值存储（单进程部署时的默认后端）
+
+    基于TTLLRUCache：值按引用保存（不序列化，写入后调用方不应再修改），
+    超过条目数或字节预算时淘汰最近最少使用的值，过期值由purge_expired从过期堆清理。
+    只在事件循环线程中访问，方法不阻塞。
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None):
+        """
+        初始化存储
+
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 值的size_bytes之和的上限，None表示不限制
+        """
+        self.entries = TTLLRUCache(None, max_entries, max_bytes)
+
+    def get(self, key: str) -> Optional[Tuple[dict, float]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry['value'], entry['timestamp']
+
+    def set(
+        self,
+        key: str,
+        value: dict,
+        created_at: float,
+        expires_at: float,
+        size_bytes: Optional[int] = None
+    ):
+        if size_bytes is None:
+            size_bytes = len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        self.entries.put(key, {
+            'value': value,
+            'timestamp': created_at,
+            'created_at': datetime.fromtimestamp(created_at),
+            'expires_at': datetime.fromtimestamp(expires_at),
+            'size_bytes': size_bytes
+        })
+
+    def delete(self, key: str):
+        self.entries.remove(key)
+
+    def clear(self):
+        self.entries.clear()
+
+    def purge_expired(self) -> int:
+        return self.entries.cleanup_expired()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'memory',
+            'total_entries': len(self.entries),
+            'max_entries': self.entries.max_entries,
+            'total_size_bytes': self.entries.total_bytes,
+            'max_bytes': self.entries.max_bytes,
+            'expired': self.entries.expired,
+            'evicted': self.entries.evictions
+        }
+
+class SQLiteKeyValueStore(KeyValueStore):
+    """
+    基于SQLite（WAL模式）的键值存储
+
+    多个uvicorn worker进程可以同时读写同一个数据库文件：
+    WAL模式下读不阻塞写，写冲突由busy_timeout等待解决。
+    每个进程（fork之后）使用自己的连接。
+    """
+
+    # 每写入多少次顺带清理一次过期数据
+    PURGE_INTERVAL = 256
+
+    def __init__(self, path: str, table: str, busy_timeout_ms: int = 5000):
+        """
+        初始化存储
+
+        Args:
+            path: 数据库文件路径，所在目录不存在时自动创建
+            table: 表名（同一数据库文件可以保存多个命名空间）
+            busy_timeout_ms: 等待其他进程释放写锁的超时时间（毫秒）
+        """
+        if not table.isidentifier():
+            raise ValueError(f"无效的表名: {table}")
+
+        self.path = path
+        self.table = table
+        self.busy_timeout_ms = busy_timeout_ms
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前进程的连接（fork后重新连接）"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,  # 自动提交
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table} (expires_at)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[dict, float]]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(
+        self,
+        key: str,
+        value: dict,
+        created_at: float,
+        expires_at: float,
+        size_bytes: Optional[int] = None
+    ):
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, data, created_at, expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection().execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total, live = self._connection().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0) FROM {self.table}",
+                (time.time(),)
+            ).fetchone()
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'table': self.table,
+            'total_entries': total,
+            'live_entries': live
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
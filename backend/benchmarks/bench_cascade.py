@@ -0,0 +1,126 @@
+"""
+模型级联对慢请求和过载的影响
+
+模拟的主模型（pro）耗时服从对数正态分布（中位数PRIMARY_MEDIAN_SECONDS），SLOW_RATIO的调用慢SLOW_FACTOR倍，
+并有OVERLOAD_RATIO的调用返回503；备用模型（flash）更快（中位数FALLBACK_MEDIAN_SECONDS）。
+请求在DURATION秒内均匀到达，分别：
+
+- off:     只使用主模型（过载时按重试策略重试）
+- cascade: ModelCascade（超过时间预算BUDGET_SECONDS或过载时改用备用模型）
+
+报告请求耗时的p50/p95/p99/max、失败数、备用模型生成的比例和后端调用次数。
+时间按1:100缩小（主模型中位数对应10秒，预算0.15秒对应15秒，慢请求约对应90秒）。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_cascade [请求数] [时间预算秒数]
+"""
+import asyncio
+import math
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from google.genai import errors
+
+from app.services.cascade import ModelCascade
+from app.services.gemini import GeminiService
+from app.services.ratelimit import AdaptiveConcurrencyLimiter, GeminiRateLimiter
+from app.services.retry import RetryPolicy
+from app.services.routing import OPERATION_RESEARCH
+
+PRIMARY_MODEL = "gemini-2.5-pro"
+FALLBACK_MODEL = "gemini-2.5-flash"
+DURATION = 3.0
+PRIMARY_MEDIAN_SECONDS = 0.1
+FALLBACK_MEDIAN_SECONDS = 0.04
+SIGMA = 0.25
+SLOW_RATIO = 0.1
+SLOW_FACTOR = 9.0
+OVERLOAD_RATIO = 0.05
+BUDGET_SECONDS = 0.15
+
+class FakeModels:
+    """主模型慢且偶尔过载，备用模型快"""
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.calls = {PRIMARY_MODEL: 0, FALLBACK_MODEL: 0}
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        self.calls[model] += 1
+        if model == FALLBACK_MODEL:
+            await asyncio.sleep(self.random.lognormvariate(math.log(FALLBACK_MEDIAN_SECONDS), SIGMA))
+            return SimpleNamespace(text="ok")
+
+        latency = self.random.lognormvariate(math.log(PRIMARY_MEDIAN_SECONDS), SIGMA)
+        if self.random.random() < SLOW_RATIO:
+            latency *= SLOW_FACTOR
+        if self.random.random() < OVERLOAD_RATIO:
+            await asyncio.sleep(latency / 4)
+            raise errors.ServerError(503, {'error': {
+                'code': 503, 'message': 'The model is overloaded.', 'status': 'UNAVAILABLE'
+            }})
+        await asyncio.sleep(latency)
+        return SimpleNamespace(text="ok")
+
+def _service(models: FakeModels, cascade: Optional[ModelCascade]) -> GeminiService:
+    service = GeminiService(
+        api_key="x" * 32,
+        rate_limiter=GeminiRateLimiter(AdaptiveConcurrencyLimiter(initial_limit=128, max_limit=128)),
+        retry_policy=RetryPolicy(max_retries=1, base_delay=0.05, max_delay=0.2),
+        cascade=cascade
+    )
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models), close=lambda: None)
+    return service
+
+async def _arrivals(service: GeminiService, requests: int) -> List[tuple]:
+    """请求在DURATION秒内均匀到达，返回(耗时, 生成的模型)，失败时模型为None"""
+    async def one(i: int):
+        await asyncio.sleep(DURATION * i / requests)
+        start = time.perf_counter()
+        try:
+            result = await service.generate_with_fallback(f"prompt {i}", operation=OPERATION_RESEARCH)
+            return time.perf_counter() - start, result.model_name
+        except Exception:
+            return time.perf_counter() - start, None
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+async def run(name: str, requests: int, cascade: Optional[ModelCascade]):
+    models = FakeModels(seed=11)
+    service = _service(models, cascade)
+    results = await _arrivals(service, requests)
+    latencies = sorted(r[0] * 1000 for r in results)
+    failed = sum(1 for r in results if r[1] is None)
+    fallbacks = sum(1 for r in results if r[1] == FALLBACK_MODEL)
+    print(
+        f"{name:<8} p50={statistics.median(latencies):6.1f}ms  p95={_percentile(latencies, 0.95):6.1f}ms  "
+        f"p99={_percentile(latencies, 0.99):6.1f}ms  max={latencies[-1]:6.1f}ms  failed={failed}  "
+        f"fallback={fallbacks / requests:.1%}  backend calls={models.calls}"
+    )
+    if cascade is not None:
+        print(f"         {cascade.get_stats()['operations']}")
+    await service.aclose()
+
+async def main(requests: int, budget: float):
+    print(
+        f"requests={requests}  primary median={PRIMARY_MEDIAN_SECONDS * 1000:.0f}ms  "
+        f"slow={SLOW_RATIO:.0%} x{SLOW_FACTOR}  overload={OVERLOAD_RATIO:.0%}  "
+        f"fallback median={FALLBACK_MEDIAN_SECONDS * 1000:.0f}ms  budget={budget * 1000:.0f}ms"
+    )
+    await run("off", requests, None)
+    await run("cascade", requests, ModelCascade(
+        fallback_models={PRIMARY_MODEL: FALLBACK_MODEL},
+        budgets={OPERATION_RESEARCH: budget}
+    ))
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else BUDGET_SECONDS
+    asyncio.run(main(requests, budget))
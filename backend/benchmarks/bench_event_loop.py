@@ -0,0 +1,91 @@
+"""
+CPU密集任务对事件循环延迟的影响
+
+模拟一个worker同时处理多个大调研响应：后台协程每1ms醒来一次，记录实际醒来比预期晚了多少
+（即事件循环被阻塞、其他请求无法得到处理的时间）；同时并发执行多个解析→评分任务，分别：
+
+- inline:  直接在事件循环中运行（改动前的做法）
+- thread:  CPUExecutor线程池
+- process: CPUExecutor进程池（进程池在测量前预热，子进程启动开销不计入）
+
+报告事件循环延迟的p50/p99/最大值，以及完成全部任务的总耗时。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_event_loop [响应大小KB] [并发数]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+from app.services.executor import CPUExecutor
+from app.services.parser import parse_and_enhance_research_options
+from benchmarks.bench_parser import _large_response
+
+COURSES = "机器学习, 数据分析, 医疗信息学"
+EXTRACURRICULAR = "医院信息科数据分析实习"
+TICK_SECONDS = 0.001
+
+async def _monitor(lags: List[float], stop: asyncio.Event):
+    """每TICK_SECONDS醒来一次，记录醒来的延迟"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+async def _run_load(executor: CPUExecutor, text: str, concurrency: int):
+    async def one():
+        options = await executor.run(
+            parse_and_enhance_research_options, text, COURSES, EXTRACURRICULAR, size=len(text)
+        )
+        assert len(options) == 3
+
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+
+async def measure(name: str, executor: CPUExecutor, text: str, concurrency: int):
+    lags: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(lags, stop))
+    await asyncio.sleep(0.05)  # 先采集空闲时的基线
+
+    start = time.perf_counter()
+    await _run_load(executor, text, concurrency)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{name:<8} loop lag p50={statistics.median(lags_ms):7.2f}ms  p99={p99:7.2f}ms  "
+        f"max={lags_ms[-1]:7.2f}ms  total={elapsed * 1000:8.1f}ms"
+    )
+
+async def main(size_kb: int, concurrency: int):
+    text = _large_response(size_kb * 1024)
+    print(f"response={len(text.encode('utf-8')) / 1024:.0f}KB  concurrency={concurrency}")
+
+    inline = CPUExecutor(max_threads=0)
+    threads = CPUExecutor(max_threads=4)
+    processes = CPUExecutor(max_threads=4, max_processes=4, process_threshold_chars=0)
+
+    # 预热进程池：启动全部子进程并完成导入
+    await asyncio.gather(*(
+        processes.run(parse_and_enhance_research_options, _large_response(4 * 1024), size=1)
+        for _ in range(processes.max_processes * 2)
+    ))
+
+    try:
+        await measure("inline", inline, text, concurrency)
+        await measure("thread", threads, text, concurrency)
+        await measure("process", processes, text, concurrency)
+    finally:
+        for executor in (inline, threads, processes):
+            executor.shutdown()
+
+if __name__ == "__main__":
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    asyncio.run(main(size_kb, concurrency))
@@ -0,0 +1,103 @@
+"""
+对冲请求对尾延迟的影响
+
+模拟的Gemini后端耗时服从对数正态分布（中位数MEDIAN_SECONDS），另有SLOW_RATIO的调用慢SLOW_FACTOR倍
+（长尾）。请求在DURATION秒内均匀到达，分别：
+
+- off:    不对冲
+- hedged: RequestHedger（按耗时分位数触发对冲，预算限制额外请求比例）
+
+报告请求耗时的p50/p95/p99、后端调用次数（额外开销）以及对冲触发和获胜次数。
+时间按比例缩小（中位数50ms）。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_hedging [请求数] [分位数] [预算比例]
+"""
+import asyncio
+import math
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from app.services.gemini import GeminiService
+from app.services.hedging import RequestHedger
+from app.services.ratelimit import AdaptiveConcurrencyLimiter, GeminiRateLimiter
+
+DURATION = 4.0
+MEDIAN_SECONDS = 0.05
+SIGMA = 0.2
+SLOW_RATIO = 0.04
+SLOW_FACTOR = 4.0
+
+class FakeModels:
+    """耗时带长尾的后端"""
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        self.calls += 1
+        latency = self.random.lognormvariate(math.log(MEDIAN_SECONDS), SIGMA)
+        if self.random.random() < SLOW_RATIO:
+            latency *= SLOW_FACTOR
+        await asyncio.sleep(latency)
+        return SimpleNamespace(text="ok")
+
+def _service(models: FakeModels, hedger: Optional[RequestHedger]) -> GeminiService:
+    service = GeminiService(
+        api_key="x" * 32,
+        rate_limiter=GeminiRateLimiter(AdaptiveConcurrencyLimiter(initial_limit=32, max_limit=32)),
+        hedger=hedger
+    )
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models), close=lambda: None)
+    return service
+
+async def _arrivals(service: GeminiService, requests: int) -> List[float]:
+    async def one(i: int):
+        await asyncio.sleep(DURATION * i / requests)
+        start = time.perf_counter()
+        await service.generate_content_with_retry(f"prompt {i}", operation="research")
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+async def run(name: str, requests: int, hedger: Optional[RequestHedger]):
+    models = FakeModels(seed=7)
+    service = _service(models, hedger)
+    latencies = sorted(r * 1000 for r in await _arrivals(service, requests))
+    print(
+        f"{name:<7} p50={statistics.median(latencies):6.1f}ms  p95={_percentile(latencies, 0.95):6.1f}ms  "
+        f"p99={_percentile(latencies, 0.99):6.1f}ms  max={latencies[-1]:6.1f}ms  "
+        f"backend calls={models.calls} (+{(models.calls - requests) / requests:.1%})"
+    )
+    if hedger is not None:
+        stats = hedger.get_stats()
+        print(
+            f"        fired={stats['fired']}  wins={stats['wins']}  fire_rate={stats['fire_rate']}  "
+            f"win_rate={stats['win_rate']}  skipped_budget={stats['skipped_budget']}  "
+            f"hedge_delay={stats['hedge_delay_seconds']}"
+        )
+    await service.aclose()
+
+async def main(requests: int, percentile: float, budget_ratio: float):
+    print(
+        f"requests={requests}  median={MEDIAN_SECONDS * 1000:.0f}ms  "
+        f"slow={SLOW_RATIO:.0%} x{SLOW_FACTOR:.0f}  percentile={percentile}  budget={budget_ratio:.0%}"
+    )
+    await run("off", requests, None)
+    await run("hedged", requests, RequestHedger(
+        percentile=percentile, budget_ratio=budget_ratio, min_delay_seconds=0.0, min_samples=20
+    ))
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    percentile = float(sys.argv[2]) if len(sys.argv) > 2 else 0.95
+    budget_ratio = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    asyncio.run(main(requests, percentile, budget_ratio))
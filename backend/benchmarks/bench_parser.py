@@ -0,0 +1,414 @@
+"""
+调研文本解析器的一致性检查与基准测试
+
+先在语料上比较parse_research_options与逐字段解析的旧实现（每个领域块分别调用
+legacy_parse_match_score、legacy_parse_summary、legacy_parse_reasoning、legacy_parse_references），
+以及IncrementalResearchParser按不同分块大小输入时的结果，必须完全一致；
+然后比较各实现在不同大小响应上的耗时。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_parser [语料目录]
+
+语料目录中的每个.txt文件为一次录制的Gemini调研响应；未指定时使用内置样例及其变体。
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from app.models.schemas import ResearchOption
+from app.services.parser import (
+    parse_research_options,
+    parse_research_options_with_domain_texts,
+    IncrementalResearchParser
+)
+
+SAMPLE = """细分领域1: 智能医疗数据分析：通过硕士阶段系统学习机器学习，以应对医疗数据孤岛的挑战。(匹配度: 92%)
+
+一句话总结: 通过硕士学习掌握医疗大数据分析技术
+详细理由:
+趋势分析: 人工智能在医疗领域的应用快速发展，深度学习推动创新
+痛点识别: 医疗数据标准不统一，存在数据孤岛
+机会点: 联邦学习等技术带来新的发展机会
+技能匹配: 申请者的数据分析实习经历高度相关
+
+参考文献:
+1. Topol, E. et al. (2021). "High-performance medicine", Nature Medicine, doi:10.1038/s41591
+2. Smith, J. (2022). "Federated Learning in Healthcare", IEEE Transactions on Medical Imaging, https://doi.org/10.1109/x
+
+细分领域2: 金融科技风控：通过硕士阶段系统学习大数据技术，以应对金融欺诈的挑战。
+
+匹配度: 88%
+• 一句话总结:
+• 利用大数据技术提升风控能力
+详细理由:
+• 趋势分析: 数字化转型推动金融科技发展
+  - 监管科技同步发展
+• 痛点识别: 欺诈手段不断升级
+• 机会点: 图神经网络应用于反欺诈
+• 技能匹配: 申请者有相关金融实习
+
+参考文献:
+- Wang, L. (2023). "Graph Neural Networks for Fraud Detection", ACM Computing Surveys, doi:10.1145/x
+- McKinsey (2022). "The future of risk", McKinsey Report
+
+细分领域3: 可持续供应链：通过硕士阶段系统学习运筹优化，以应对碳排放的挑战。
+
+匹配度 80%
+总结: 优化供应链以实现可持续发展
+详细理由:
+趋势分析: 可持续发展成为全球趋势
+痛点识别: 供应链碳排放难以追踪
+机会点: 物联网与区块链技术提升透明度
+技能匹配: 申请者参与过物流项目
+参考文献
+1. Lee, K. (2020). "Sustainable Supply Chains", Journal of Operations Management
+2. World Bank (2021). "Climate and Trade", World Bank Report, https://worldbank.org/x
+"""
+
+def legacy_parse_match_score(text: str) -> int:
+    """旧实现：解析匹配度"""
+    # 查找"匹配度: XX%"模式，可能在括号内
+    match = re.search(r'匹配度:\s*(\d+)%', text)
+    if match:
+        return int(match.group(1))
+
+    # 查找"(匹配度: XX%)"模式
+    match = re.search(r'\(匹配度:\s*(\d+)%\)', text)
+    if match:
+        return int(match.group(1))
+
+    # 尝试其他模式
+    match = re.search(r'匹配度\s*(\d+)%', text)
+    if match:
+        return int(match.group(1))
+
+    # 默认值
+    return 85
+
+def legacy_parse_summary(text: str) -> str:
+    """旧实现：解析一句话总结"""
+    lines = text.split('\n')
+
+    # 查找包含"一句话总结:"的行
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+
+        # 检查"一句话总结:"模式
+        if '一句话总结:' in stripped:
+            # 获取冒号后的内容
+            if ':' in stripped:
+                summary = stripped.split(':', 1)[1].strip()
+                if summary:
+                    # 移除可能的bullet point符号
+                    summary = re.sub(r'^[•\-*]\s*', '', summary)
+                    return summary
+
+            # 如果没有内容，尝试下一行
+            if i + 1 < len(lines):
+                next_line = lines[i + 1].strip()
+                if next_line:
+                    # 移除可能的bullet point符号
+                    next_line = re.sub(r'^[•\-*]\s*', '', next_line)
+                    return next_line
+
+        # 检查bullet point格式的总结
+        if stripped.startswith('•') and '一句话总结:' in stripped:
+            # 格式: "• 一句话总结: 内容"
+            summary_part = stripped.split(':', 1)[1].strip() if ':' in stripped else stripped[1:].strip()
+            return summary_part
+
+    # 查找单独的bullet point总结行
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith('•'):
+            # 检查前一行是否包含"一句话总结"
+            if i > 0 and '一句话总结:' in lines[i - 1]:
+                # 移除bullet point符号
+                summary = re.sub(r'^[•\-*]\s*', '', stripped)
+                return summary
+
+    # 如果没有找到，尝试其他模式
+    for line in lines:
+        stripped = line.strip()
+        if '总结:' in stripped and '详细理由' not in stripped:
+            summary = stripped.split('总结:')[1].strip()
+            if summary:
+                summary = re.sub(r'^[•\-*]\s*', '', summary)
+                return summary
+
+    # 返回第一行非空内容作为后备
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith('匹配度') and not stripped.startswith('详细理由'):
+            # 移除可能的bullet point符号
+            stripped = re.sub(r'^[•\-*]\s*', '', stripped)
+            return stripped[:200]  # 截断
+
+    return "通过硕士学习专业知识来应对行业挑战"
+
+def legacy_parse_reasoning(text: str) -> List[str]:
+    """旧实现：解析详细理由"""
+    reasoning = []
+
+    # 查找"详细理由:"部分
+    lines = text.split('\n')
+    in_reasoning = False
+    current_item = ""
+    current_type = ""
+
+    for line in lines:
+        stripped = line.strip()
+
+        if '详细理由:' in stripped:
+            in_reasoning = True
+            continue
+
+        if in_reasoning:
+            # 检查是否到了参考文献部分
+            if '参考文献:' in stripped or stripped.startswith('1.') or stripped.startswith('参考文献'):
+                # 添加最后一个项目
+                if current_item and current_type:
+                    reasoning.append(f"{current_type}: {current_item}")
+                break
+
+            # 检查是否是bullet point子标题（趋势分析、痛点识别等）
+            bullet_match = re.match(r'^[•\-*]\s*(趋势分析|痛点识别|机会点|技能匹配):\s*(.*)', stripped)
+            if bullet_match:
+                # 保存前一个项目
+                if current_item and current_type:
+                    reasoning.append(f"{current_type}: {current_item}")
+
+                # 开始新项目
+                current_type = bullet_match.group(1)
+                current_item = bullet_match.group(2).strip()
+            elif stripped.startswith('•') or stripped.startswith('-') or stripped.startswith('*'):
+                # 通用的bullet point，追加到当前项目
+                if current_item:
+                    # 移除bullet point符号并添加内容
+                    bullet_content = re.sub(r'^[•\-*]\s*', '', stripped)
+                    if bullet_content:
+                        current_item += " " + bullet_content
+            elif stripped and not stripped.startswith('细分领域'):
+                # 普通文本行，追加到当前项目
+                if current_item:
+                    current_item += " " + stripped
+                elif stripped:  # 如果没有当前项目但有关键词
+                    # 检查是否是没有bullet point的关键词行
+                    for keyword in ['趋势分析:', '痛点识别:', '机会点:', '技能匹配:']:
+                        if keyword in stripped:
+                            if current_item and current_type:
+                                reasoning.append(f"{current_type}: {current_item}")
+                            current_type = keyword.replace(':', '')
+                            current_item = stripped.split(':', 1)[1].strip() if ':' in stripped else stripped
+                            break
+
+    # 添加最后一个项目
+    if current_item and current_type:
+        reasoning.append(f"{current_type}: {current_item}")
+
+    # 如果没有找到详细理由，使用一些默认内容
+    if not reasoning:
+        reasoning = [
+            "趋势分析: 行业趋势分析显示该领域有快速增长",
+            "技能匹配: 申请者的经历与领域需求高度匹配"
+        ]
+
+    return reasoning
+
+def legacy_parse_references(text: str) -> List[str]:
+    """旧实现：解析参考文献"""
+    references = []
+
+    # 查找"参考文献:"部分
+    lines = text.split('\n')
+    in_references = False
+
+    for line in lines:
+        stripped = line.strip()
+
+        if '参考文献:' in stripped:
+            in_references = True
+            continue
+
+        if in_references:
+            # 检查是否到了下一个细分领域或结束
+            if stripped.startswith('细分领域'):
+                break
+
+            # 跳过空行
+            if not stripped:
+                continue
+
+            # 匹配编号引用格式：1. ..., 2. ... 或 - ..., * ...
+            if re.match(r'^(\d+\.\s*|[-*]\s*)', stripped):
+                # 移除编号或项目符号
+                ref = re.sub(r'^(\d+\.\s*|[-*]\s*)', '', stripped)
+                if ref:
+                    references.append(ref)
+            elif stripped and not references:
+                # 如果没有编号格式，但这是第一个引用
+                references.append(stripped)
+
+    # 如果没有找到参考文献，返回空列表
+    return references
+
+def legacy_parse_research_options(text: str) -> List[ResearchOption]:
+    """旧实现：按标题切片后分别调用各字段的解析函数"""
+    text = text.strip()
+    matches = list(re.finditer(r'细分领域(\d+):\s*([^\n(]+)', text))
+    if len(matches) < 3:
+        matches = list(re.finditer(r'【细分领域(\d+):\s*([^】]+)】', text))
+    if len(matches) < 3:
+        raise ValueError(f"无法解析到3个细分领域，只找到{len(matches)}个。文本内容：{text[:500]}...")
+
+    research_options = []
+    for i, match in enumerate(matches):
+        end_pos = matches[i + 1].start() if i < len(matches) - 1 else len(text)
+        domain_text = text[match.end():end_pos]
+        try:
+            research_options.append(ResearchOption(
+                title=match.group(2).strip(),
+                match_score=legacy_parse_match_score(domain_text),
+                summary=legacy_parse_summary(domain_text),
+                reasoning=legacy_parse_reasoning(domain_text),
+                references=legacy_parse_references(domain_text)
+            ))
+        except Exception as e:
+            raise ValueError(f"解析第{i+1}个细分领域时出错: {str(e)}。领域文本：{domain_text[:200]}...")
+
+    if len(research_options) != 3:
+        raise ValueError(f"期望3个选项，但只解析出{len(research_options)}个")
+    return research_options
+
+def _outcome(parse, text: str):
+    try:
+        return [option.dict() for option in parse(text)]
+    except ValueError as e:
+        return ('ValueError', str(e))
+
+def incremental_parse(text: str, chunk_size: int):
+    """按chunk_size分块输入增量解析器，返回(选项列表, 领域文本列表)"""
+    parser = IncrementalResearchParser()
+    blocks = []
+    for i in range(0, len(text), chunk_size):
+        blocks.extend(parser.feed(text[i:i + chunk_size]))
+    blocks.extend(parser.close())
+    return [option for option, _ in blocks], [domain_text for _, domain_text in blocks]
+
+def builtin_corpus(variants: int = 2000, seed: int = 7) -> List[str]:
+    """内置样例，以及对其逐行删除、复制、交换、改写得到的变体"""
+    rng = random.Random(seed)
+    lines = SAMPLE.split('\n')
+    rewrites = [
+        lambda line: line.replace(': ', ':'),
+        lambda line: line.replace(':', ':\n'),
+        lambda line: '• ' + line,
+        lambda line: '-' + line,
+        lambda line: '*\u3000' + line,
+        lambda line: '  ' + line + '  ',
+        lambda line: line + '\r',
+        lambda line: line.replace('细分领域', '【细分领域') + '】' if line.startswith('细分领域') else line,
+        lambda line: line.replace('92%', '65%'),
+        lambda line: '',
+    ]
+
+    corpus = [
+        SAMPLE, SAMPLE.replace('\n', '\r\n'), SAMPLE.replace('细分领域3', '细分领域2'), SAMPLE * 2,
+        # 全部标题带方括号：不带方括号的模式仍能匹配，以及只有带方括号的格式能匹配（名称以括号开头）
+        re.sub(r'(?m)^细分领域(\d+):\s*(.*)$', r'【细分领域\1: \2】', SAMPLE),
+        re.sub(r'(?m)^细分领域(\d+):\s*(.*)$', r'【细分领域\1:(\2)】', SAMPLE)
+    ]
+    for _ in range(variants):
+        mutated = list(lines)
+        for _ in range(rng.randint(1, 6)):
+            i = rng.randrange(len(mutated))
+            action = rng.randrange(4)
+            if action == 0:
+                del mutated[i]
+            elif action == 1:
+                mutated.insert(i, mutated[rng.randrange(len(mutated))])
+            elif action == 2:
+                j = rng.randrange(len(mutated))
+                mutated[i], mutated[j] = mutated[j], mutated[i]
+            else:
+                mutated[i] = rng.choice(rewrites)(mutated[i])
+            if not mutated:
+                break
+        corpus.append('\n'.join(mutated))
+    return corpus
+
+def check(corpus: List[str]):
+    mismatches = 0
+    for i, text in enumerate(corpus):
+        expected = _outcome(legacy_parse_research_options, text)
+        actual = _outcome(parse_research_options, text)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"[mismatch] corpus[{i}]\n  legacy={expected}\n  new   ={actual}")
+    print(f"consistency: {len(corpus) - mismatches}/{len(corpus)} identical")
+    return mismatches == 0
+
+def check_incremental(corpus: List[str], chunk_sizes=(1, 7, 64, 1 << 20)):
+    """增量解析与完整解析一致（只比较完整解析成功且各标题格式统一的文本）"""
+    checked = mismatches = 0
+    for i, text in enumerate(corpus):
+        if 0 < text.count('【细分领域') < text.count('细分领域'):
+            continue
+        try:
+            options, domain_texts = parse_research_options_with_domain_texts(text)
+        except ValueError:
+            continue
+        expected = ([option.dict() for option in options], domain_texts)
+        for chunk_size in chunk_sizes:
+            options, domain_texts = incremental_parse(text, chunk_size)
+            checked += 1
+            if ([option.dict() for option in options], domain_texts) != expected:
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"[mismatch] corpus[{i}] chunk_size={chunk_size}")
+    print(f"incremental consistency: {checked - mismatches}/{checked} identical")
+    return mismatches == 0
+
+def _large_response(target_bytes: int) -> str:
+    """在每个领域的详细理由中追加内容，构造指定大小的响应"""
+    filler = "  - 该方向的应用与趋势持续发展，相关技术与创新不断涌现\n"
+    repeat = max(1, (target_bytes - len(SAMPLE.encode('utf-8'))) // (3 * len(filler.encode('utf-8'))))
+    return SAMPLE.replace('痛点识别:', filler * repeat + '痛点识别:')
+
+def bench(target_bytes: int):
+    text = _large_response(target_bytes)
+    size_kb = len(text.encode('utf-8')) / 1024
+    rounds = max(3, int(2_000_000 / max(len(text), 1)))
+
+    timings = {}
+    for name, parse in (
+        ('legacy', legacy_parse_research_options),
+        ('single-pass', parse_research_options),
+        ('incremental', lambda text: incremental_parse(text, 256))
+    ):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parse(text)
+        timings[name] = (time.perf_counter() - start) / rounds * 1000
+
+    print(
+        f"size={size_kb:8.1f}KB  legacy={timings['legacy']:8.3f}ms  "
+        f"single-pass={timings['single-pass']:8.3f}ms  speedup={timings['legacy'] / timings['single-pass']:5.2f}x  "
+        f"incremental(256B chunks)={timings['incremental']:8.3f}ms"
+    )
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        corpus = [path.read_text(encoding='utf-8') for path in sorted(Path(sys.argv[1]).glob('*.txt'))]
+    else:
+        corpus = builtin_corpus()
+
+    if not (check(corpus) and check_incremental(corpus)):
+        sys.exit(1)
+
+    for target in (4 * 1024, 64 * 1024, 1024 * 1024):
+        bench(target)
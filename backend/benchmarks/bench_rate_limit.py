@@ -0,0 +1,124 @@
+"""
+Gemini配额耗尽时的行为：失败请求 vs 短暂排队
+
+模拟的Gemini后端同时最多处理CAPACITY个请求，超出时返回429 RESOURCE_EXHAUSTED。
+一批请求在短时间内同时到达，分别：
+
+- legacy:  原来的重试逻辑（收到配额错误直接返回给用户，不限制并发）
+- limiter: 经过GeminiRateLimiter（AIMD自适应并发 + 排队）的GeminiService
+
+报告成功/失败数、请求耗时和限流器统计（排队等待时间、最终并发上限）。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_rate_limit [请求数] [后端并发容量]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+
+from google.genai import errors
+
+from app.services.gemini import GeminiService
+from app.services.ratelimit import AdaptiveConcurrencyLimiter, GeminiRateLimiter
+from app.services.retry import RetryPolicy
+
+LATENCY_SECONDS = 0.05
+RETRY_DELAY_SECONDS = 0.05
+
+class FakeModels:
+    """同时处理的请求超过capacity时返回429"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            await asyncio.sleep(0.002)
+            raise errors.ClientError(429, {'error': {
+                'code': 429, 'message': 'Resource has been exhausted (e.g. check quota).', 'status': 'RESOURCE_EXHAUSTED'
+            }})
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(LATENCY_SECONDS)
+            return SimpleNamespace(text="ok")
+        finally:
+            self.in_flight -= 1
+
+def _service(models: FakeModels, limiter: GeminiRateLimiter) -> GeminiService:
+    service = GeminiService(
+        api_key="x" * 32,
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(base_delay=RETRY_DELAY_SECONDS, max_delay=RETRY_DELAY_SECONDS * 4)
+    )
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models), close=lambda: None)
+    return service
+
+async def legacy_generate(models: FakeModels, prompt: str, max_retries: int = 3) -> str:
+    """原来的generate_content_with_retry（不经过限流器，配额错误直接抛出）"""
+    for attempt in range(max_retries + 1):
+        try:
+            response = await models.generate_content(model="gemini", contents=prompt)
+            return response.text
+        except Exception as e:
+            if attempt == max_retries:
+                raise Exception(f"Gemini API调用失败，重试{max_retries}次后仍失败: {str(e)}")
+            await asyncio.sleep(RETRY_DELAY_SECONDS * (attempt + 1))
+            if "quota" in str(e).lower() or "rate limit" in str(e).lower():
+                raise Exception(f"Gemini API配额或速率限制: {str(e)}")
+
+async def _burst(call, requests: int) -> List[float]:
+    """requests个请求在约0.2秒内到达，返回成功请求的耗时（失败为None）"""
+    async def one(i: int):
+        await asyncio.sleep(0.2 * i / requests)
+        start = time.perf_counter()
+        try:
+            await call(f"prompt {i}")
+            return time.perf_counter() - start
+        except Exception:
+            return None
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+def _report(name: str, results: List[float], elapsed: float, models: FakeModels):
+    ok = sorted(r * 1000 for r in results if r is not None)
+    failed = len(results) - len(ok)
+    latency = (
+        f"p50={statistics.median(ok):7.1f}ms  max={ok[-1]:7.1f}ms" if ok else "p50=    n/a  max=    n/a"
+    )
+    print(
+        f"{name:<8} ok={len(ok):4d}  failed={failed:4d}  {latency}  "
+        f"429s={models.rejected:4d}  total={elapsed * 1000:7.1f}ms"
+    )
+
+async def main(requests: int, capacity: int):
+    print(f"requests={requests}  backend capacity={capacity}  latency={LATENCY_SECONDS * 1000:.0f}ms")
+
+    models = FakeModels(capacity)
+    start = time.perf_counter()
+    results = await _burst(lambda prompt: legacy_generate(models, prompt), requests)
+    _report("legacy", results, time.perf_counter() - start, models)
+
+    models = FakeModels(capacity)
+    limiter = GeminiRateLimiter(AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=32, cooldown_seconds=0.2))
+    service = _service(models, limiter)
+    start = time.perf_counter()
+    results = await _burst(service.generate_content_with_retry, requests)
+    _report("limiter", results, time.perf_counter() - start, models)
+
+    stats = limiter.get_stats()
+    print(
+        f"         queued={stats['queued']}  avg_wait={stats['avg_wait_ms']}ms  max_wait={stats['max_wait_ms']}ms  "
+        f"final limit={stats['concurrency']['limit']}  decreases={stats['concurrency']['decreases']}"
+    )
+    await service.aclose()
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    asyncio.run(main(requests, capacity))
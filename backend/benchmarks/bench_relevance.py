@@ -0,0 +1,67 @@
+"""
+用户背景相关度评分的检查与基准测试
+
+- 逐个领域评分（流式输出时的调用方式）与批量评分的结果必须一致；
+- 打印内置样例在几组用户背景下的相似度和匹配度评分；
+- 测量一次请求（3个领域文本和用户背景）的评分耗时。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_relevance
+"""
+import time
+
+from app.services.parser import (
+    parse_research_options_with_domain_texts,
+    calculate_match_score_based_on_content,
+    calculate_match_scores_based_on_content,
+    _profile_similarities,
+    _profile_text
+)
+from benchmarks.bench_parser import SAMPLE, _large_response
+
+PROFILES = [
+    ("机器学习, 数据分析, 医疗信息学", "医院信息科数据分析实习"),
+    ("金融学, 风险管理, 大数据技术", "银行风控部门实习"),
+    ("运筹学, 物流管理, 供应链", "参与物流优化项目"),
+    ("Machine Learning, Statistics", "Internship at a hospital, healthcare data"),
+    ("艺术史", "博物馆志愿者"),
+    ("", ""),
+]
+
+def check(text: str) -> bool:
+    _, texts = parse_research_options_with_domain_texts(text)
+    ok = True
+    for courses, extracurricular in PROFILES:
+        batch = calculate_match_scores_based_on_content(texts, courses, extracurricular)
+        single = [calculate_match_score_based_on_content(text, courses, extracurricular) for text in texts]
+        ok = ok and batch == single
+    print(f"batch/single consistency: {ok}")
+    return ok
+
+def show(text: str):
+    _, texts = parse_research_options_with_domain_texts(text)
+    for courses, extracurricular in PROFILES:
+        similarities = _profile_similarities(texts, _profile_text(courses, extracurricular))
+        scores = calculate_match_scores_based_on_content(texts, courses, extracurricular)
+        print(
+            f"{(courses + ' / ' + extracurricular)[:36]:<36}  "
+            f"similarity={[round(s, 3) for s in similarities]}  score={scores}"
+        )
+
+def bench(target_bytes: int, rounds: int = 500):
+    text = _large_response(target_bytes)
+    _, texts = parse_research_options_with_domain_texts(text)
+    courses, extracurricular = PROFILES[0]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        calculate_match_scores_based_on_content(texts, courses, extracurricular)
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"size={len(text.encode('utf-8')) / 1024:7.1f}KB  score 3 domains with profile: {elapsed:6.3f}ms per request")
+
+if __name__ == "__main__":
+    if not check(SAMPLE) or not check(_large_response(64 * 1024)):
+        raise SystemExit(1)
+    show(SAMPLE)
+    for target in (4 * 1024, 16 * 1024, 64 * 1024):
+        bench(target)
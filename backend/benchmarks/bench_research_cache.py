@@ -0,0 +1,53 @@
+"""
+ResearchCache插入与查询的微基准测试
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_research_cache
+"""
+import asyncio
+import time
+
+from app.models.schemas import ResearchOption
+from app.services.cache import ResearchCache
+
+SIZES = [10_000, 100_000]
+
+def _make_options(i: int):
+    """构造一组大小不同的调研选项"""
+    return [
+        ResearchOption(
+            title=f"细分领域{i}-{k}",
+            match_score=85,
+            summary="通过硕士学习专业知识来应对行业挑战" * (1 + i % 10),
+            reasoning=[f"趋势分析: 第{i}条理由"],
+            references=[f"Author, A. ({2020 + k}). \"Title {i}\", Nature"]
+        )
+        for k in range(3)
+    ]
+
+async def bench(size: int):
+    options = _make_options(0)
+    inputs = [(f"学校{i}", "计算机科学", f"课程{i}", f"经历{i}") for i in range(size)]
+
+    # 缓存容量为数据量的一半，使后半段插入均触发淘汰
+    cache = ResearchCache(ttl_hours=24, max_entries=size // 2)
+
+    start = time.perf_counter()
+    for school, major, courses, extracurricular in inputs:
+        await cache.cache_research(school, major, courses, extracurricular, options)
+    insert_us = (time.perf_counter() - start) / size * 1e6
+
+    start = time.perf_counter()
+    for school, major, courses, extracurricular in inputs:
+        await cache.get_cached_research(school, major, courses, extracurricular)
+    lookup_us = (time.perf_counter() - start) / size * 1e6
+
+    stats = cache.get_cache_stats()
+    print(
+        f"entries={size:>7}  insert={insert_us:7.2f}us/op  lookup={lookup_us:7.2f}us/op  "
+        f"evictions={stats['evictions']}  hit_rate={stats['hit_rate']}"
+    )
+
+if __name__ == "__main__":
+    for size in SIZES:
+        asyncio.run(bench(size))
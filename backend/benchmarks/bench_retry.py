@@ -0,0 +1,141 @@
+"""
+Gemini故障期间的重试行为：线性重试 vs 退避抖动 + 截止时间 + 熔断
+
+模拟的Gemini后端在INCIDENT_START到INCIDENT_END之间返回503，其余时间正常。
+请求在DURATION秒内均匀到达，分别：
+
+- legacy: 原来的重试逻辑（固定线性等待，先等待再判断错误类型）
+- policy: GeminiService（RetryPolicy指数退避加完全抖动、截止时间，CircuitBreaker熔断）
+
+报告成功/失败数、请求耗时（包括失败请求得到响应的时间）的p50/p99，以及后端收到的调用次数
+（故障期间的重试风暴）。最后对比密钥无效时的响应时间（原来的逻辑会先等待一次再报错）。
+时间都按比例缩小（原来的重试间隔1秒对应这里的0.1秒）。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_retry [请求数]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from google.genai import errors
+
+from app.services.gemini import GeminiService
+from app.services.ratelimit import AdaptiveConcurrencyLimiter, GeminiRateLimiter
+from app.services.retry import CircuitBreaker, RetryPolicy
+
+DURATION = 3.0
+INCIDENT_START = 0.5
+INCIDENT_END = 2.0
+LATENCY_SECONDS = 0.05
+LEGACY_RETRY_DELAY = 0.1  # 原来的1秒
+MAX_RETRIES = 3
+
+class FakeModels:
+    """故障期间返回503，密钥无效时返回400 API_KEY_INVALID"""
+
+    def __init__(self, start: float, invalid_key: bool = False):
+        self.start = start
+        self.invalid_key = invalid_key
+        self.calls = 0
+        self.incident_calls = 0
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        self.calls += 1
+        await asyncio.sleep(LATENCY_SECONDS)
+        if self.invalid_key:
+            raise errors.ClientError(400, {'error': {
+                'code': 400, 'message': 'API key not valid.', 'status': 'INVALID_ARGUMENT',
+                'details': [{'reason': 'API_KEY_INVALID'}]
+            }})
+        elapsed = time.perf_counter() - self.start
+        if INCIDENT_START <= elapsed < INCIDENT_END:
+            self.incident_calls += 1
+            raise errors.ServerError(503, {'error': {
+                'code': 503, 'message': 'The model is overloaded.', 'status': 'UNAVAILABLE'
+            }})
+        return SimpleNamespace(text="ok")
+
+async def legacy_generate(models: FakeModels, prompt: str, max_retries: int = MAX_RETRIES) -> str:
+    """原来的generate_content_with_retry"""
+    for attempt in range(max_retries + 1):
+        try:
+            response = await models.generate_content(model="gemini", contents=prompt)
+            return response.text
+        except Exception as e:
+            if attempt == max_retries:
+                raise Exception(f"Gemini API调用失败，重试{max_retries}次后仍失败: {str(e)}")
+            await asyncio.sleep(LEGACY_RETRY_DELAY * (attempt + 1))
+            if "API_KEY_INVALID" in str(e) or "PERMISSION_DENIED" in str(e):
+                raise Exception(f"Gemini API密钥无效: {str(e)}")
+
+def _service(models: FakeModels) -> GeminiService:
+    service = GeminiService(
+        api_key="x" * 32,
+        rate_limiter=GeminiRateLimiter(AdaptiveConcurrencyLimiter(initial_limit=64, max_limit=64)),
+        retry_policy=RetryPolicy(max_retries=MAX_RETRIES, base_delay=0.05, max_delay=0.8, deadline_seconds=1.0),
+        circuit_breaker=CircuitBreaker(failure_threshold=5, recovery_seconds=0.3)
+    )
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models), close=lambda: None)
+    return service
+
+async def _arrivals(call, requests: int, duration: float) -> List[Optional[float]]:
+    """请求在duration秒内均匀到达，返回(耗时, 是否成功)"""
+    async def one(i: int):
+        await asyncio.sleep(duration * i / requests)
+        start = time.perf_counter()
+        try:
+            await call(f"prompt {i}")
+            return time.perf_counter() - start, True
+        except Exception:
+            return time.perf_counter() - start, False
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def _report(name: str, results, models: FakeModels):
+    latencies = sorted(r[0] * 1000 for r in results)
+    ok = sum(1 for r in results if r[1])
+    print(
+        f"{name:<7} ok={ok:4d}  failed={len(results) - ok:4d}  "
+        f"p50={statistics.median(latencies):7.1f}ms  p99={_percentile(latencies, 0.99):7.1f}ms  "
+        f"backend calls={models.calls:4d} (during incident {models.incident_calls:4d})"
+    )
+
+async def main(requests: int):
+    print(
+        f"requests={requests} over {DURATION}s  incident={INCIDENT_START}-{INCIDENT_END}s  "
+        f"latency={LATENCY_SECONDS * 1000:.0f}ms  max_retries={MAX_RETRIES}"
+    )
+
+    models = FakeModels(time.perf_counter())
+    results = await _arrivals(lambda prompt: legacy_generate(models, prompt), requests, DURATION)
+    _report("legacy", results, models)
+
+    models = FakeModels(time.perf_counter())
+    service = _service(models)
+    results = await _arrivals(service.generate_content_with_retry, requests, DURATION)
+    _report("policy", results, models)
+    stats = service.get_stats()
+    print(f"        retry={stats['retry']}")
+    print(f"        circuit_breakers={stats['circuit_breakers']}")
+    await service.aclose()
+
+    print("invalid API key:")
+    models = FakeModels(time.perf_counter(), invalid_key=True)
+    results = await _arrivals(lambda prompt: legacy_generate(models, prompt), 20, 0.0)
+    _report("legacy", results, models)
+    models = FakeModels(time.perf_counter(), invalid_key=True)
+    service = _service(models)
+    results = await _arrivals(service.generate_content_with_retry, 20, 0.0)
+    _report("policy", results, models)
+    await service.aclose()
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    asyncio.run(main(requests))
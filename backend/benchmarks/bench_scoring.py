@@ -0,0 +1,306 @@
+"""
+参考文献与领域文本评分的一致性检查与基准测试
+
+先在语料上比较KeywordMatcher实现的评分与旧实现（每次调用在函数内重建关键词表、
+逐个关键词用any()/in查找）的结果，必须完全一致（包括未安装pyahocorasick时的后备实现）；
+然后比较旧实现、新实现（首次评分）和新实现（参考文献评分缓存命中）的耗时，
+以及不同大小的关键词表下子串查找与自动机计数的耗时（自动机的使用门槛由此确定）。
+领域文本评分不带用户背景（旧实现忽略用户背景）；用户背景相关度见bench_relevance。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_scoring
+"""
+import random
+import re
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+from app.services import keywords
+from app.services.parser import (
+    CONTENT_KEYWORDS,
+    parse_research_options_with_domain_texts,
+    configure_scoring_lexicons,
+    validate_and_score_references,
+    calculate_match_scores_based_on_content,
+    _score_reference
+)
+from benchmarks.bench_parser import SAMPLE, builtin_corpus
+
+def legacy_validate_and_score_references(references: List[str]) -> Tuple[List[str], int, List[str]]:
+    """旧实现：逐篇参考文献用any()遍历关键词表"""
+    if not references:
+        return [], 0, ["无参考文献"]
+
+    valid_references = []
+    validation_errors = []
+    total_score = 0
+    max_score_per_ref = 20  # 每篇参考文献最大20分
+
+    # 权威来源关键词
+    authoritative_sources = [
+        'Nature', 'Science', 'Cell', 'Lancet', 'NEJM', 'JAMA',
+        'IEEE', 'ACM', 'Springer', 'Elsevier', 'Wiley',
+        'Gartner', 'IDC', 'McKinsey', 'BCG', 'Deloitte',
+        'WHO', 'UNESCO', 'World Bank', 'IMF', 'UN', 'WTO'
+    ]
+
+    for i, ref in enumerate(references, 1):
+        ref = ref.strip()
+        if not ref:
+            validation_errors.append(f"参考文献 {i}: 为空")
+            continue
+
+        ref_score = 0
+        ref_errors = []
+
+        # 检查基本格式：至少包含作者、年份、标题
+        has_author = re.search(r'[A-Z][a-z]+,\s*[A-Z]\.', ref) or 'et al.' in ref
+        has_year = re.search(r'\(\d{4}\)', ref) or re.search(r'\b(19|20)\d{2}\b', ref)
+        has_title = '"' in ref or '“' in ref or '”' in ref or ('[' in ref and ']' in ref)
+
+        # 检查期刊/来源
+        has_journal = any(keyword in ref for keyword in ['Journal', 'Proceedings', 'Conference', 'Symposium', 'Transactions'])
+
+        # 检查权威来源
+        is_authoritative = any(source.lower() in ref.lower() for source in authoritative_sources)
+
+        # 检查DOI或链接
+        has_doi = 'doi:' in ref.lower() or 'doi.org' in ref.lower() or '10.' in ref[:20]
+        has_url = 'http://' in ref.lower() or 'https://' in ref.lower()
+
+        # 评分
+        if has_author:
+            ref_score += 3
+        else:
+            ref_errors.append("缺少作者信息")
+
+        if has_year:
+            ref_score += 3
+            # 检查年份是否合理（1900-当前年份）
+            year_match = re.search(r'\((\d{4})\)', ref) or re.search(r'\b(19|20)(\d{2})\b', ref)
+            if year_match:
+                year = int(year_match.group(1) if year_match.group(1) else year_match.group(2))
+                current_year = datetime.now().year
+                if 1900 <= year <= current_year:
+                    ref_score += 2  # 合理年份额外加分
+                    if year >= 2020:
+                        ref_score += 5  # 2020年后的参考文献额外加分
+                else:
+                    ref_errors.append(f"年份{year}不合理")
+        else:
+            ref_errors.append("缺少年份")
+
+        if has_title:
+            ref_score += 3
+        else:
+            ref_errors.append("缺少标题标记")
+
+        if has_journal:
+            ref_score += 2
+        if is_authoritative:
+            ref_score += 5
+        if has_doi or has_url:
+            ref_score += 4
+
+        # 确保分数不超过最大值
+        ref_score = min(ref_score, max_score_per_ref)
+
+        if not ref_errors:
+            valid_references.append(ref)
+            total_score += ref_score
+        else:
+            validation_errors.append(f"参考文献 {i}: {ref} - 错误: {', '.join(ref_errors)}")
+
+    # 计算平均分并转换为0-100分
+    if valid_references:
+        avg_score = total_score / len(valid_references)
+        # 将平均分（0-20）转换为百分制（0-100）
+        final_score = int((avg_score / max_score_per_ref) * 100)
+    else:
+        final_score = 0
+
+    return valid_references, final_score, validation_errors
+
+def legacy_calculate_match_score_based_on_content(
+    domain_text: str,
+    user_courses: str = "",
+    user_extracurricular: str = ""
+) -> int:
+    """旧实现：逐个关键词做子串查找"""
+    base_score = 70  # 基础分
+
+    # 关键词匹配加分
+    keywords_to_check = [
+        '前沿', '趋势', '技术', '创新', '发展', '应用',
+        '人工智能', '机器学习', '大数据', '云计算', '物联网',
+        '可持续发展', '数字化转型', '智能化'
+    ]
+
+    keyword_score = 0
+    for keyword in keywords_to_check:
+        if keyword in domain_text:
+            keyword_score += 1
+
+    # 最多加10分
+    keyword_bonus = min(keyword_score, 10)
+
+    # 文本长度和质量加分
+    text_length = len(domain_text)
+    if text_length > 500:
+        length_bonus = 10
+    elif text_length > 300:
+        length_bonus = 5
+    elif text_length > 100:
+        length_bonus = 2
+    else:
+        length_bonus = 0
+
+    # 结构完整性加分
+    structure_bonus = 0
+    required_sections = ['趋势分析', '痛点识别', '机会点', '技能匹配', '参考文献']
+    for section in required_sections:
+        if section in domain_text:
+            structure_bonus += 2
+
+    # 计算最终分数
+    final_score = base_score + keyword_bonus + length_bonus + structure_bonus
+
+    # 确保在70-100范围内
+    return max(70, min(100, final_score))
+
+REFERENCE_PARTS = [
+    'Topol, E.', 'Smith, J.', 'et al.', 'Wang Lei', 'WHO', 'World Bank', 'unesco', 'McKinsey & Company',
+    '(2021)', '(1899)', '2019', '(2035)', '"Deep Learning"', '“联邦学习”', '[Online]',
+    'Nature Medicine', 'IEEE Transactions on Medical Imaging', 'Journal of Finance', 'Proceedings of KDD',
+    'doi:10.1038/x', 'https://doi.org/10.1145/x', 'http://example.com', '10.1000/xyz', 'Report', ''
+]
+
+def reference_corpus(count: int = 5000, seed: int = 11) -> List[List[str]]:
+    """随机拼接的参考文献列表，部分参考文献在不同列表中重复出现"""
+    rng = random.Random(seed)
+    references = [
+        ' '.join(rng.sample(REFERENCE_PARTS, rng.randint(1, 6))) for _ in range(count // 4)
+    ]
+    return [
+        [rng.choice(references) for _ in range(rng.randint(0, 5))] + ([''] if rng.random() < 0.05 else [])
+        for _ in range(count)
+    ]
+
+def domain_corpus() -> List[str]:
+    """内置调研语料中所有可解析的领域块"""
+    texts = []
+    for text in builtin_corpus(variants=500):
+        try:
+            texts.extend(parse_research_options_with_domain_texts(text)[1])
+        except ValueError:
+            continue
+    return texts
+
+def check(reference_lists: List[List[str]], texts: List[str]) -> bool:
+    expected_refs = [legacy_validate_and_score_references(references) for references in reference_lists]
+    expected_scores = [legacy_calculate_match_score_based_on_content(text) for text in texts]
+
+    ok = True
+    for automaton in (True, False):
+        if automaton and not keywords.AHOCORASICK_AVAILABLE:
+            continue
+        # automaton=True时所有关键词表都强制使用自动机，不受AUTOMATON_MIN_KEYWORDS限制
+        available, threshold = keywords.AHOCORASICK_AVAILABLE, keywords.AUTOMATON_MIN_KEYWORDS
+        keywords.AHOCORASICK_AVAILABLE = automaton
+        keywords.AUTOMATON_MIN_KEYWORDS = 0 if automaton else threshold
+        configure_scoring_lexicons()
+        keywords.AHOCORASICK_AVAILABLE, keywords.AUTOMATON_MIN_KEYWORDS = available, threshold
+
+        # 两轮：第二轮全部命中参考文献评分缓存
+        for _ in range(2):
+            refs_ok = [validate_and_score_references(r) for r in reference_lists] == expected_refs
+            texts_ok = calculate_match_scores_based_on_content(texts) == expected_scores
+            ok = ok and refs_ok and texts_ok
+        print(
+            f"consistency (automaton={automaton}): references={refs_ok} "
+            f"({len(reference_lists)} lists), domain texts={texts_ok} ({len(texts)} blocks)"
+        )
+
+    configure_scoring_lexicons()
+    return ok
+
+def _timed(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+def bench(reference_lists: List[List[str]], texts: List[str]):
+    rounds = 5
+    # first pass每轮先清空参考文献评分缓存（语料内部仍有重复的参考文献）
+
+    legacy_refs = _timed(lambda: [legacy_validate_and_score_references(r) for r in reference_lists], rounds)
+
+    def cold():
+        _score_reference.cache_clear()
+        [validate_and_score_references(r) for r in reference_lists]
+    cold_refs = _timed(cold, rounds)
+    warm_refs = _timed(lambda: [validate_and_score_references(r) for r in reference_lists], rounds)
+
+    legacy = _timed(lambda: [legacy_calculate_match_score_based_on_content(t) for t in texts], rounds)
+    matcher = _timed(lambda: calculate_match_scores_based_on_content(texts), rounds)
+
+    per_list = len(reference_lists)
+    per_block = len(texts)
+    print(
+        f"references per list: legacy={legacy_refs / per_list:6.2f}us  "
+        f"first pass={cold_refs / per_list:6.2f}us ({legacy_refs / cold_refs:4.2f}x)  "
+        f"memo hit={warm_refs / per_list:6.2f}us ({legacy_refs / warm_refs:4.2f}x)"
+    )
+    print(
+        f"domain text per block: legacy={legacy / per_block:6.2f}us  "
+        f"matcher={matcher / per_block:6.2f}us ({legacy / matcher:4.2f}x)"
+    )
+
+def _lexicon(size: int) -> List[str]:
+    """默认领域关键词加上随机汉字组合，共size个关键词"""
+    rng = random.Random(3)
+    chars = [c for c in SAMPLE if '\u4e00' <= c <= '\u9fff']
+    lexicon = list(CONTENT_KEYWORDS)
+    while len(lexicon) < size:
+        keyword = ''.join(rng.choice(chars) for _ in range(rng.randint(2, 4)))
+        if keyword not in lexicon:
+            lexicon.append(keyword)
+    return lexicon[:size]
+
+def bench_lexicon_sizes(texts: List[str], sizes=(5, 14, 16, 24, 64, 500)):
+    """
+    不同大小的领域关键词表下，子串查找与自动机计数的对比（AUTOMATON_MIN_KEYWORDS的依据）
+
+    两种实现都强制使用，与KeywordMatcher实际选择的实现无关。
+    """
+    if not keywords.AHOCORASICK_AVAILABLE:
+        print("lexicon sizes: pyahocorasick not installed, skipped")
+        return
+
+    threshold = keywords.AUTOMATON_MIN_KEYWORDS
+    for size in sizes:
+        lexicon = _lexicon(size)
+        keywords.AUTOMATON_MIN_KEYWORDS = len(lexicon) + 1
+        substring_matcher = keywords.KeywordMatcher(lexicon)
+        keywords.AUTOMATON_MIN_KEYWORDS = 0
+        automaton_matcher = keywords.KeywordMatcher(lexicon)
+        keywords.AUTOMATON_MIN_KEYWORDS = threshold
+
+        rounds = 20 if size < 100 else 3
+        substring = _timed(lambda: [substring_matcher.count(text) for text in texts], rounds)
+        automaton = _timed(lambda: [automaton_matcher.count(text) for text in texts], rounds)
+        chosen = 'automaton' if size >= threshold else 'substring'
+        print(
+            f"{size:3d}-keyword lexicon per block: substring={substring / len(texts):7.2f}us  "
+            f"automaton={automaton / len(texts):7.2f}us  (threshold {threshold}: {chosen})"
+        )
+
+if __name__ == "__main__":
+    reference_lists = reference_corpus()
+    texts = domain_corpus()
+    if not check(reference_lists, texts):
+        raise SystemExit(1)
+    bench(reference_lists, texts)
+    bench_lexicon_sizes(texts)
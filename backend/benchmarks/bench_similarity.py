@@ -0,0 +1,97 @@
+"""
+近似查找（MinHash + LSH）的检查与基准测试
+
+- 向量化签名与逐个哈希函数计算的旧实现对近似重复输入的召回一致（相似度达到阈值的变体都能找到）；
+- 测量不同长度的课外经历下，ResearchCache.find_similar_entry（含特征提取和签名计算）
+  和写入索引的耗时，以及旧实现计算一次签名的耗时。
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_similarity
+"""
+import asyncio
+import random
+import time
+from typing import FrozenSet, List
+
+from app.models.schemas import ResearchOption
+from app.services.cache import ResearchCache
+from app.services.similarity import MinHashLSHIndex, research_features
+
+# 旧实现的参数：梅森素数 2^61 - 1，逐个哈希函数用纯Python取最小值
+_LEGACY_PRIME = (1 << 61) - 1
+
+COURSES = "机器学习, 数据分析, 医疗信息学, 统计学习, 数据库系统"
+# 随机课外经历的字符集（常用汉字区间；字符集过小时不同请求的字符二元组大量重合，不符合实际分布）
+CHARSET = ''.join(chr(code) for code in range(0x4E00, 0x4E00 + 2000))
+
+def legacy_signature(features: FrozenSet[str], num_perm: int = 64, seed: int = 1) -> List[int]:
+    """旧实现：纯Python逐个哈希函数计算MinHash签名"""
+    rng = random.Random(seed)
+    perms = [(rng.randrange(1, _LEGACY_PRIME), rng.randrange(0, _LEGACY_PRIME)) for _ in range(num_perm)]
+    hashes = [hash(feature) & 0xFFFFFFFFFFFFFFFF for feature in features]
+    return [min((a * h + b) % _LEGACY_PRIME for h in hashes) for a, b in perms]
+
+def _extracurricular(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice(CHARSET) for _ in range(length))
+
+def _perturb(rng: random.Random, text: str, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice(CHARSET)
+    return ''.join(chars)
+
+def _options() -> List[ResearchOption]:
+    return [
+        ResearchOption(title=f"细分领域{k}", match_score=85, summary="总结", reasoning=["趋势分析: 理由"], references=[])
+        for k in range(3)
+    ]
+
+def check(trials: int = 300) -> bool:
+    """相似度达到阈值的近似重复输入都能被查到"""
+    rng = random.Random(7)
+    index = MinHashLSHIndex(threshold=0.8)
+    found = eligible = 0
+    for i in range(trials):
+        text = _extracurricular(rng, 300)
+        index.add(f"k{i}", "p", research_features(COURSES, text))
+        features = research_features(COURSES, _perturb(rng, text, 3))
+        result = index.query("p", features)
+        if result is not None and result[0] == f"k{i}":
+            found += 1
+        eligible += 1
+    print(f"near-duplicate recall: {found}/{eligible}")
+    return found >= eligible * 0.95
+
+async def bench(length: int, entries: int = 2000, rounds: int = 200):
+    rng = random.Random(length)
+    cache = ResearchCache(ttl_hours=24, max_entries=entries * 2, similarity_threshold=0.8)
+    options = _options()
+    texts = [_extracurricular(rng, length) for _ in range(entries)]
+
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        await cache.cache_research("学校", "计算机科学", COURSES, text, options)
+    insert_ms = (time.perf_counter() - start) / entries * 1000
+
+    queries = [_perturb(rng, texts[i], max(1, length // 100)) for i in range(rounds)]
+    for text in queries:
+        cache.find_similar_entry("学校", "计算机科学", COURSES, text)
+    stats = cache.get_cache_stats()['approximate']
+
+    features = research_features(COURSES, texts[0])
+    start = time.perf_counter()
+    for _ in range(20):
+        legacy_signature(features)
+    legacy_ms = (time.perf_counter() - start) / 20 * 1000
+
+    print(
+        f"extracurricular={length:>5} chars  features={len(features):>5}  insert={insert_ms:6.3f}ms  "
+        f"lookup={stats['avg_lookup_ms']:6.3f}ms (hits {stats['hits']}/{stats['lookups']})  "
+        f"legacy signature={legacy_ms:7.3f}ms"
+    )
+
+if __name__ == "__main__":
+    if not check():
+        raise SystemExit(1)
+    for length in (100, 300, 1000, 3000):
+        asyncio.run(bench(length))
@@ -0,0 +1,154 @@
+"""
+测试公共夹具
+
+- FakeGemini：按块流式返回固定文本的Gemini客户端替身，记录调用次数，可以注入异常或模拟备用模型；
+- fake_gemini / make_client：通过依赖覆盖注入FakeGemini，创建ASGI客户端，每个测试前后清空模块级缓存和会话。
+
+测试不使用共享的SQLite文件，也不启用预取（导入应用前设置环境变量）。
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Optional
+
+os.environ["CACHE_DB_PATH"] = ""
+os.environ["PS_PREFETCH_MODE"] = "off"
+
+import httpx
+import pytest
+
+from app.api import ps_write
+from app.core.dependencies import get_gemini_service
+from app.main import app
+from app.services.cascade import GenerationResult
+from app.services.routing import ModelRouter
+
+RESEARCH_TEXT = """细分领域1: 智能医疗数据分析：通过硕士阶段系统学习机器学习，以应对医疗数据孤岛的挑战。
+
+匹配度: 92%
+一句话总结: 通过硕士学习掌握医疗大数据分析技术
+详细理由:
+趋势分析: 人工智能在医疗领域的应用快速发展，深度学习推动创新
+痛点识别: 医疗数据标准不统一，存在数据孤岛
+机会点: 联邦学习等技术带来新的发展机会
+技能匹配: 申请者的数据分析实习经历高度相关
+
+参考文献:
+1. Topol, E. et al. (2021). "High-performance medicine", Nature Medicine, doi:10.1038/s41591
+2. Smith, J. (2022). "Federated Learning in Healthcare", IEEE Transactions on Medical Imaging, https://doi.org/10.1109/x
+
+细分领域2: 金融科技风控：通过硕士阶段系统学习大数据技术，以应对金融欺诈的挑战。
+
+匹配度: 88%
+一句话总结: 利用大数据技术提升风控能力
+详细理由:
+趋势分析: 数字化转型推动金融科技发展
+痛点识别: 欺诈手段不断升级
+机会点: 图神经网络应用于反欺诈
+技能匹配: 申请者有相关金融实习
+
+参考文献:
+1. Wang, L. (2023). "Graph Neural Networks for Fraud Detection", ACM Computing Surveys, doi:10.1145/x
+2. McKinsey (2022). "The future of risk", McKinsey Report
+
+细分领域3: 可持续供应链：通过硕士阶段系统学习运筹优化，以应对碳排放的挑战。
+
+匹配度: 80%
+一句话总结: 优化供应链以实现可持续发展
+详细理由:
+趋势分析: 可持续发展成为全球趋势
+痛点识别: 供应链碳排放难以追踪
+机会点: 物联网与区块链技术提升透明度
+技能匹配: 申请者参与过物流项目
+
+参考文献:
+1. Lee, K. (2020). "Sustainable Supply Chains", Journal of Operations Management
+2. World Bank (2021). "Climate and Trade", World Bank Report, https://worldbank.org/x
+"""
+
+STATEMENT_TEXT = "第一段内容。\n\n第二段内容。\n\n第三段内容。\n\n第四段内容。\n\n第五段内容。"
+
+PROFILE = {
+    "school": "测试大学",
+    "major": "数据科学",
+    "courses": "机器学习, 数据分析",
+    "extracurricular": "医疗数据分析实习"
+}
+
+class FakeGemini:
+    """Gemini服务替身：按chunk_size切块流式返回text"""
+
+    def __init__(self, text: str = RESEARCH_TEXT, chunk_size: int = 16, delay: float = 0.0):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.router = ModelRouter()
+        # 生成结果的实际模型，None表示由请求的主模型生成；设置为其他模型名模拟备用模型
+        self.fallback_model: Optional[str] = None
+        # 设置后生成（流式在发送第一块之后）抛出该异常
+        self.error: Optional[Exception] = None
+        self.calls = 0
+
+    def resolve_params(self, operation: str, **kwargs):
+        return self.router.resolve(operation, **kwargs)
+
+    def _model_name(self, params) -> str:
+        return self.fallback_model or params.model_name
+
+    async def _generate(self, prompt: str, params=None) -> GenerationResult:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return GenerationResult(self.text, self._model_name(params))
+
+    async def _stream(self, prompt: str, params=None, result: Optional[GenerationResult] = None) -> AsyncIterator[str]:
+        self.calls += 1
+        if result is not None:
+            result.model_name = self._model_name(params)
+        for start in range(0, len(self.text), self.chunk_size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield self.text[start:start + self.chunk_size]
+            if self.error is not None:
+                raise self.error
+
+    generate_enhanced_research = _generate
+    generate_personal_statement = _generate
+    stream_enhanced_research = _stream
+    stream_personal_statement = _stream
+
+    async def aclose(self):
+        pass
+
+def _reset_services():
+    ps_write.selection_service.cleanup_all()
+    ps_write.ps_cache.clear_cache()
+    asyncio.run(ps_write.research_cache.clear_cache())
+
+@pytest.fixture
+def fake_gemini():
+    gemini = FakeGemini()
+    app.dependency_overrides[get_gemini_service] = lambda: gemini
+    _reset_services()
+    yield gemini
+    app.dependency_overrides.pop(get_gemini_service, None)
+    _reset_services()
+
+@pytest.fixture
+def make_client(fake_gemini):
+    """返回创建ASGI客户端的函数（客户端需要在测试自己的事件循环中创建）"""
+    def factory() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return factory
+
+def parse_sse(body: str):
+    """将SSE响应体解析为[(event, data)]"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = block.split("\n")
+        event = next(line[len("event: "):] for line in lines if line.startswith("event: "))
+        data = next(line[len("data: "):] for line in lines if line.startswith("data: "))
+        events.append((event, json.loads(data)))
+    return events
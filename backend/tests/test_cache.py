@@ -0,0 +1,174 @@
+"""SingleFlight并发合并和缓存写入规则"""
+import asyncio
+
+import pytest
+
+from app.models.schemas import ResearchOption
+from app.services.cache import PersonalStatementCache, ResearchCache, SingleFlight
+
+def _options():
+    return [
+        ResearchOption(title=f"细分领域{k}", match_score=90 - k, summary="总结", reasoning=["趋势分析: 理由"], references=[])
+        for k in range(3)
+    ]
+
+def test_single_flight_joins_concurrent_calls():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.create_task(flight.run("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, flight.coalesced, len(flight)
+
+    calls, results, coalesced, inflight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 3
+    assert coalesced == 2
+    assert inflight == 0
+
+def test_single_flight_propagates_error_to_all_waiters():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("生成失败")
+
+        return await asyncio.gather(flight.run("k", work), flight.run("k", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+
+def test_single_flight_waiter_cancel_keeps_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.run("k", work))
+        second = asyncio.create_task(flight.run("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first.cancelled(), await second
+
+    cancelled, result = asyncio.run(scenario())
+    assert cancelled
+    assert result == "result"
+
+def test_single_flight_cancel_only_without_waiters():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "result"
+
+        task = flight.start("k", work)
+        waiter = asyncio.create_task(flight.run("k", work))
+        await asyncio.sleep(0)
+        # 有请求在等待时不取消
+        refused = flight.cancel("k")
+        release.set()
+        result = await waiter
+
+        release.clear()
+        background = flight.start("k", work)
+        await asyncio.sleep(0)
+        accepted = flight.cancel("k")
+        with pytest.raises(asyncio.CancelledError):
+            await background
+        return task.done(), refused, result, accepted, len(flight)
+
+    task_done, refused, result, accepted, inflight = asyncio.run(scenario())
+    assert task_done
+    assert not refused
+    assert result == "result"
+    assert accepted
+    assert inflight == 0
+
+def test_ps_cache_coalesces_and_caches_primary_result():
+    async def scenario():
+        cache = PersonalStatementCache()
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"paragraphs": ["p"] * 5, "selected_domain": "d", "model_name": "gemini-2.5-pro"}
+
+        first = await asyncio.gather(
+            cache.get_or_generate_statement("k", generate, "gemini-2.5-pro"),
+            cache.get_or_generate_statement("k", generate, "gemini-2.5-pro")
+        )
+        second = await cache.get_or_generate_statement("k", generate, "gemini-2.5-pro")
+        return calls, [hit for _, hit in first], second[1]
+
+    calls, first_hits, second_hit = asyncio.run(scenario())
+    assert calls == 1
+    assert first_hits == [False, False]
+    assert second_hit
+
+def test_ps_cache_does_not_cache_fallback_result():
+    async def scenario():
+        cache = PersonalStatementCache()
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            return {"paragraphs": ["p"] * 5, "selected_domain": "d", "model_name": "gemini-2.5-flash"}
+
+        first = await cache.get_or_generate_statement("k", generate, "gemini-2.5-pro")
+        second = await cache.get_or_generate_statement("k", generate, "gemini-2.5-pro")
+        return calls, first, second, cache.get_cache_stats()
+
+    calls, first, second, stats = asyncio.run(scenario())
+    assert calls == 2
+    assert first[0]["model_name"] == "gemini-2.5-flash"
+    assert not second[1]
+    assert stats["total_entries"] == 0
+    assert stats["uncached_fallbacks"] == 2
+
+def test_research_cache_does_not_cache_fallback_result():
+    async def scenario():
+        cache = ResearchCache()
+        params = {"model_name": "gemini-2.5-pro"}
+        models = iter(["gemini-2.5-flash", "gemini-2.5-pro"])
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            return _options(), next(models)
+
+        statuses = []
+        for _ in range(3):
+            entry, status, _ = await cache.get_or_generate_research("学校", "专业", "课程", "经历", generate, params)
+            statuses.append((status, entry["model_name"]))
+        return calls, statuses, cache.get_cache_stats()
+
+    calls, statuses, stats = asyncio.run(scenario())
+    assert calls == 2
+    assert statuses == [
+        ("miss", "gemini-2.5-flash"),
+        ("miss", "gemini-2.5-pro"),
+        ("hit", "gemini-2.5-pro")
+    ]
+    assert stats["uncached_fallbacks"] == 1
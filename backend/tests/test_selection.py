@@ -0,0 +1,95 @@
+"""会话存储：进程内后端和跨进程共享的SQLite后端"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from app.services.selection import SelectionService
+from app.services.store import MemoryKeyValueStore, SQLiteKeyValueStore
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESEARCH_DATA = [
+    {"title": f"细分领域{k}", "match_score": 90 - k, "summary": "总结", "reasoning": ["理由"], "references": []}
+    for k in range(3)
+]
+
+def test_memory_store_session_round_trip():
+    async def scenario():
+        service = SelectionService()
+        session_id = await service.create_session_from_data(RESEARCH_DATA, {"school": "学校"})
+        return (
+            await service.get_session(session_id),
+            await service.validate_selection(session_id, 2),
+            await service.validate_selection(session_id, 3),
+            await service.get_session("missing"),
+            service.get_stats()
+        )
+
+    session, valid, invalid, missing, stats = asyncio.run(scenario())
+    assert session["research_options"] == RESEARCH_DATA
+    assert session["profile"] == {"school": "学校"}
+    assert valid and not invalid
+    assert missing is None
+    assert stats["store"]["backend"] == "memory"
+    assert stats["store"]["total_entries"] == 1
+
+def test_memory_store_evicts_least_recently_used():
+    async def scenario():
+        service = SelectionService(max_sessions=2)
+        ids = [await service.create_session_from_data(RESEARCH_DATA) for _ in range(3)]
+        return [await service.get_session(session_id) is not None for session_id in ids]
+
+    assert asyncio.run(scenario()) == [False, True, True]
+
+def test_memory_store_expires_by_entry():
+    store = MemoryKeyValueStore()
+    now = time.time()
+    store.set("expired", {"v": 1}, now - 10, now - 1)
+    store.set("live", {"v": 2}, now, now + 60)
+
+    assert store.purge_expired() == 1
+    assert store.get("expired") is None
+    assert store.get("live") == ({"v": 2}, now)
+
+def test_sqlite_store_shares_sessions_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    # 在另一个进程中创建会话
+    script = (
+        "import asyncio, sys\n"
+        "from app.services.selection import SelectionService\n"
+        "from app.services.store import SQLiteKeyValueStore\n"
+        "service = SelectionService(store=SQLiteKeyValueStore(sys.argv[1], table='selection_sessions'))\n"
+        "data = [{'title': 't', 'match_score': 80, 'summary': 's', 'reasoning': ['r'], 'references': []}]\n"
+        "print(asyncio.run(service.create_session_from_data(data, {'school': '学校'})))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, path],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    session_id = result.stdout.strip()
+
+    store = SQLiteKeyValueStore(path, table="selection_sessions")
+    try:
+        service = SelectionService(store=store)
+        session = asyncio.run(service.get_session(session_id))
+        stats = service.get_stats()
+    finally:
+        store.close()
+
+    assert session is not None
+    assert session["research_options"][0]["title"] == "t"
+    assert session["profile"] == {"school": "学校"}
+    assert stats["store"]["backend"] == "sqlite"
+    assert stats["store"]["live_entries"] == 1
+
+def test_sqlite_store_hides_expired_sessions(tmp_path):
+    store = SQLiteKeyValueStore(str(tmp_path / "sessions.db"), table="selection_sessions")
+    try:
+        service = SelectionService(ttl_minutes=0, store=store)
+        session_id = asyncio.run(service.create_session_from_data(RESEARCH_DATA))
+        assert asyncio.run(service.get_session(session_id)) is None
+        assert store.purge_expired() == 1
+    finally:
+        store.close()
@@ -0,0 +1,162 @@
+"""流式接口的SSE事件顺序，以及与非流式接口共用的缓存和并发合并"""
+import asyncio
+
+from conftest import PROFILE, STATEMENT_TEXT, parse_sse
+
+OPTIONS = [
+    {"title": f"细分领域{k}", "match_score": 90 - k, "summary": "总结", "reasoning": ["趋势分析: 理由"], "references": []}
+    for k in range(3)
+]
+
+PS_REQUEST = {**PROFILE, "selection": {"selection_index": 1, "research_options": OPTIONS}}
+
+def _event_names(events):
+    return [event for event, _ in events]
+
+async def _post_sse(client, path, body):
+    response = await client.post(path, json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_sse(response.text)
+
+async def _create_session(client):
+    response = await client.post("/api/ps-write/generate-with-selection", json=PROFILE)
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+def test_ps_stream_sends_paragraphs_then_done(make_client, fake_gemini):
+    fake_gemini.text = STATEMENT_TEXT
+
+    async def scenario():
+        async with make_client() as client:
+            return await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+
+    events = asyncio.run(scenario())
+    assert _event_names(events) == ["paragraph"] * 5 + ["done"]
+    assert [data["index"] for _, data in events[:5]] == list(range(5))
+    done = events[-1][1]
+    assert done["paragraphs"] == [data["text"] for _, data in events[:5]]
+    assert done["paragraphs"][0] == "第一段内容。"
+    assert done["selected_domain"] == "细分领域1"
+    assert done["model_name"] == "gemini-2.5-pro"
+
+def test_ps_stream_cache_hit_replays_all_paragraphs(make_client, fake_gemini):
+    fake_gemini.text = STATEMENT_TEXT
+
+    async def scenario():
+        async with make_client() as client:
+            first = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            plain = await client.post("/api/ps-write/generate-ps", json=PS_REQUEST)
+            second = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            return first, plain.json(), second
+
+    first, plain, second = asyncio.run(scenario())
+    assert fake_gemini.calls == 1
+    assert _event_names(second) == ["paragraph"] * 5 + ["done"]
+    assert second[-1][1]["paragraphs"] == first[-1][1]["paragraphs"] == plain["paragraphs"]
+
+def test_concurrent_ps_streams_share_one_generation(make_client, fake_gemini):
+    fake_gemini.text = STATEMENT_TEXT
+    fake_gemini.delay = 0.005
+
+    async def scenario():
+        async with make_client() as client:
+            return await asyncio.gather(
+                _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST),
+                _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST),
+                client.post("/api/ps-write/generate-ps", json=PS_REQUEST)
+            )
+
+    first, second, plain = asyncio.run(scenario())
+    assert fake_gemini.calls == 1
+    for events in (first, second):
+        assert _event_names(events) == ["paragraph"] * 5 + ["done"]
+        assert [data["index"] for _, data in events[:5]] == list(range(5))
+    assert plain.json()["paragraphs"] == first[-1][1]["paragraphs"]
+
+def test_ps_stream_error_ends_with_error_event(make_client, fake_gemini):
+    fake_gemini.text = STATEMENT_TEXT
+    fake_gemini.chunk_size = 20
+    fake_gemini.error = RuntimeError("连接中断")
+
+    async def scenario():
+        async with make_client() as client:
+            failed = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            fake_gemini.error = None
+            recovered = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            return failed, recovered
+
+    failed, recovered = asyncio.run(scenario())
+    names = _event_names(failed)
+    assert names[-1] == "error"
+    assert "done" not in names
+    assert set(names[:-1]) <= {"paragraph"}
+    assert "连接中断" in failed[-1][1]["detail"]
+    # 失败的生成不写入缓存
+    assert fake_gemini.calls == 2
+    assert _event_names(recovered) == ["paragraph"] * 5 + ["done"]
+
+def test_ps_stream_does_not_cache_fallback_result(make_client, fake_gemini):
+    fake_gemini.text = STATEMENT_TEXT
+    fake_gemini.fallback_model = "gemini-2.5-flash"
+
+    async def scenario():
+        async with make_client() as client:
+            fallback = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            fake_gemini.fallback_model = None
+            recovered = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            cached = await _post_sse(client, "/api/ps-write/generate-ps/stream", PS_REQUEST)
+            return fallback, recovered, cached
+
+    fallback, recovered, cached = asyncio.run(scenario())
+    assert fallback[-1][1]["model_name"] == "gemini-2.5-flash"
+    assert recovered[-1][1]["model_name"] == "gemini-2.5-pro"
+    assert cached[-1][1]["model_name"] == "gemini-2.5-pro"
+    assert fake_gemini.calls == 2
+
+def test_research_stream_sends_options_then_session(make_client, fake_gemini):
+    async def scenario():
+        async with make_client() as client:
+            events = await _post_sse(client, "/api/ps-write/generate-with-selection/stream", PROFILE)
+            session = await client.get(f"/api/ps-write/session/{events[-1][1]['session_id']}")
+            return events, session.json()
+
+    events, session = asyncio.run(scenario())
+    assert _event_names(events) == ["option"] * 3 + ["session"]
+    assert [data["index"] for _, data in events[:3]] == [0, 1, 2]
+    assert events[-1][1]["model_name"] == "gemini-2.5-pro"
+    assert [option["title"] for option in session["research_options"]] == [
+        data["option"]["title"] for _, data in events[:3]
+    ]
+
+def test_research_stream_error_event(make_client, fake_gemini):
+    fake_gemini.text = "无法解析的内容"
+
+    async def scenario():
+        async with make_client() as client:
+            return await _post_sse(client, "/api/ps-write/generate-with-selection/stream", PROFILE)
+
+    events = asyncio.run(scenario())
+    assert _event_names(events) == ["error"]
+
+def test_by_session_stream(make_client, fake_gemini):
+    async def scenario():
+        async with make_client() as client:
+            session_id = await _create_session(client)
+            fake_gemini.text = STATEMENT_TEXT
+            events = await _post_sse(
+                client, "/api/ps-write/generate-ps/by-session/stream",
+                {"session_id": session_id, "selection_index": 0}
+            )
+            missing = await client.post(
+                "/api/ps-write/generate-ps/by-session/stream",
+                json={"session_id": "missing", "selection_index": 0}
+            )
+            return events, missing.status_code
+
+    events, missing_status = asyncio.run(scenario())
+    assert _event_names(events) == ["paragraph"] * 5 + ["done"]
+    assert events[-1][1]["selected_domain"].startswith("智能医疗数据分析")
+    assert missing_status == 404
+    # 调研一次，个人陈述一次
+    assert fake_gemini.calls == 2